@@ -1,9 +1,19 @@
 
 from API.birdEye_API import get_historical_price, get_historical_ohlcv_price_data
 import time
+from utils.logger import get_logger
 
+logger = get_logger(__name__)
 
-def fetch_data_by_date(address, interval, start_timestamp, end_timestamp, chunk_size=10000, chain="solana"):
+# Birdeye interval -> seconds
+INTERVAL_SECONDS = {
+    "1m": 60, "5m": 5 * 60, "15m": 15 * 60, "30m": 30 * 60,
+    "1H": 60 * 60, "4H": 4 * 60 * 60, "12H": 12 * 60 * 60,
+    "1D": 24 * 60 * 60, "3D": 3 * 24 * 60 * 60, "1W": 7 * 24 * 60 * 60
+}
+
+
+def fetch_data_by_date(address, interval, start_timestamp, end_timestamp, chunk_size=10000, chain="solana", ohlcv=False):
     """
     Fetches historical price data between a given start and end timestamp in chunks, working backwards.
 
@@ -13,66 +23,71 @@ def fetch_data_by_date(address, interval, start_timestamp, end_timestamp, chunk_
     :param end_timestamp: The latest UNIX timestamp to fetch.
     :param chunk_size: Maximum number of data points to fetch per API call.
     :param chain: Blockchain network (default: "solana").
-    :return: Dictionary with {"data": {"items": all_data}} in chronological order.
+    :param ohlcv: Fetch OHLCV candles instead of prices.
+    :return: Dictionary with {"data": {"items": all_data}, "covered_from": timestamp} in chronological order.
+             covered_from is the earliest timestamp the fetch is complete from: start_timestamp unless it
+             stopped early (rate limit or an unexpected response).
     """
-    interval_seconds = {
-        "1m": 60, "5m": 5 * 60, "15m": 15 * 60, "30m": 30 * 60,
-        "1H": 60 * 60, "4H": 4 * 60 * 60, "12H": 12 * 60 * 60,
-        "1D": 24 * 60 * 60, "3D": 3 * 24 * 60 * 60, "1W": 7 * 24 * 60 * 60
-    }
-    
-    if interval not in interval_seconds:
+    if interval not in INTERVAL_SECONDS:
         raise ValueError("Invalid interval! Use one of: '1m', '5m', '15m', '30m', '1H', '4H', '12H', '1D', '3D', '1W'")
     
-    all_data = []
+    chunks = []  # Newest chunk first, joined once at the end
     time_to = end_timestamp  # Start from the newest data
-    delta = chunk_size * interval_seconds[interval]  # Time range for each chunk
+    delta = chunk_size * INTERVAL_SECONDS[interval]  # Time range for each chunk
+    covered_from = start_timestamp  # Raised to the stopping point when the fetch ends early
 
     iterations = 0
     while time_to > start_timestamp:
         iterations += 1
         time_from = max(start_timestamp, time_to - delta)  # Ensure we don’t go before start_timestamp
         
-        print(f"Fetching from {time_from} to {time_to}...")
+        logger.debug("Fetching from %s to %s...", time_from, time_to)
         time.sleep(5)
         
-        data_chunk = get_historical_price(address, interval, time_from, time_to, chain=chain)
+        if ohlcv:
+            data_chunk = get_historical_ohlcv_price_data(address, interval, time_from, time_to, chain=chain)
+        else:
+            data_chunk = get_historical_price(address, interval, time_from, time_to, chain=chain)
         
         if isinstance(data_chunk, dict) and "success" in data_chunk and not data_chunk["success"]:
             if "Too many requests" in data_chunk.get("message", ""):
-                print("Rate limit hit! Returning fetched data so far.")
+                logger.warning("Rate limit hit! Returning fetched data so far.")
+                covered_from = time_to
                 break
         
         if data_chunk and "data" in data_chunk and "items" in data_chunk["data"]:
             items = data_chunk["data"]["items"]
             
             if not items:
-                print("No more data returned. Stopping fetch.")
+                logger.info("No more data returned. Stopping fetch.")
                 break
             
-            all_data = items + all_data  # Prepend to maintain chronological order
+            chunks.append(items)
             
             if len(items) < chunk_size:
-                print(f"Received only {len(items)} items, stopping fetch.")
+                logger.info("Received only %d items, stopping fetch.", len(items))
                 break
         else:
-            print("Unexpected API response format. Stopping fetch.")
+            logger.warning("Unexpected API response format. Stopping fetch.")
+            covered_from = time_to
             break
         
         try:
             oldest_timestamp = min(int(item["unixTime"]) for item in items)
         except Exception as e:
-            print(f"Error retrieving timestamp: {e}")
+            logger.error("Error retrieving timestamp: %s", e)
+            covered_from = time_to
             break
         
         if oldest_timestamp >= time_to:
-            print("Timestamps did not decrease, stopping to prevent infinite loop.")
+            logger.warning("Timestamps did not decrease, stopping to prevent infinite loop.")
+            covered_from = time_to
             break
         
         time_to = oldest_timestamp  # Move backwards
     
-    print(f"Loop executed {iterations} times.")
-    return {"data": {"items": all_data}}
+    logger.debug("Loop executed %d times.", iterations)
+    return {"data": {"items": _join_chunks(chunks)}, "covered_from": covered_from}
 
 def fetch_complete_test_data(address, interval, span_in_days, chunk_size=1000, chain="solana", ohlcv=False):
     """
@@ -88,22 +103,16 @@ def fetch_complete_test_data(address, interval, span_in_days, chunk_size=1000, c
     :return: Dictionary with {"data": {"items": all_data}} where all_data is in chronological order.
     """
     
-    interval_seconds = {
-        "1m": 60, "5m": 5 * 60, "15m": 15 * 60, "30m": 30 * 60,
-        "1H": 60 * 60, "4H": 4 * 60 * 60, "12H": 12 * 60 * 60,
-        "1D": 24 * 60 * 60, "3D": 3 * 24 * 60 * 60, "1W": 7 * 24 * 60 * 60
-    }
-    
-    if interval not in interval_seconds:
+    if interval not in INTERVAL_SECONDS:
         raise ValueError("Invalid interval! Use one of: '1m', '5m', '15m', '30m', '1H', '4H', '12H', '1D', '3D', '1W'")
     
     span_seconds = span_in_days * 24 * 60 * 60  # Total time span in seconds
     current_time = int(time.time())  # Current UNIX timestamp
     desired_start = current_time - span_seconds  # Target start timestamp
     
-    all_data = []  # Store results
+    chunks = []  # Newest chunk first, joined once at the end
     time_to = current_time  # Start from now and move backwards
-    delta = chunk_size * interval_seconds[interval]  # Time step per chunk
+    delta = chunk_size * INTERVAL_SECONDS[interval]  # Time step per chunk
 
     iterations = 0  # API call counter
     
@@ -111,7 +120,7 @@ def fetch_complete_test_data(address, interval, span_in_days, chunk_size=1000, c
         iterations += 1
         time_from = max(desired_start, time_to - delta)  # Ensure we do not go past the earliest point
 
-        print(f"Fetching from {time_from} to {time_to}...")  # Debugging log
+        logger.debug("Fetching from %s to %s...", time_from, time_to)
 
         time.sleep(5)  # Prevent rate limiting
         
@@ -122,39 +131,45 @@ def fetch_complete_test_data(address, interval, span_in_days, chunk_size=1000, c
 
         if isinstance(data_chunk, dict) and "success" in data_chunk and not data_chunk["success"]:
             if "Too many requests" in data_chunk.get("message", ""):
-                print("Rate limit hit! Returning fetched data so far.")
+                logger.warning("Rate limit hit! Returning fetched data so far.")
                 break  # Stop and return what we have
 
         if data_chunk and "data" in data_chunk and "items" in data_chunk["data"]:
             items = data_chunk["data"]["items"]
             
             if not items:
-                print("No more data returned. Stopping fetch.")
+                logger.info("No more data returned. Stopping fetch.")
                 break  # Stop if API returns empty data
             
-            # Prepend data instead of appending (to keep chronological order)
-            all_data = items + all_data
+            chunks.append(items)
             
             # Stop if we receive fewer items than expected
             if len(items) < chunk_size:
-                print(f"Received only {len(items)} items (less than chunk_size), stopping fetch.")
+                logger.info("Received only %d items (less than chunk_size), stopping fetch.", len(items))
                 break
 
         else:
-            print("Unexpected API response format. Stopping fetch.")
+            logger.warning("Unexpected API response format. Stopping fetch.")
             break
         
         try:
             oldest_timestamp = min(int(item["unixTime"]) for item in items)  # Find the oldest timestamp in chunk
         except Exception as e:
-            print(f"Error retrieving timestamp: {e}")
+            logger.error("Error retrieving timestamp: %s", e)
             break
         
         if oldest_timestamp >= time_to:  # Ensure we are moving backwards
-            print("Timestamps did not decrease, stopping to prevent infinite loop.")
+            logger.warning("Timestamps did not decrease, stopping to prevent infinite loop.")
             break
         
         time_to = oldest_timestamp  # Move backwards
     
-    print(f"Loop executed {iterations} times.")
-    return {"data": {"items": all_data}}  # Now already in chronological order
+    logger.debug("Loop executed %d times.", iterations)
+    return {"data": {"items": _join_chunks(chunks)}}  # Chronological order
+
+def _join_chunks(chunks):
+    """Chunks fetched newest first -> one chronological item list, copying every item once."""
+    all_data = []
+    for items in reversed(chunks):
+        all_data.extend(items)
+    return all_data
@@ -0,0 +1,162 @@
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from API.API_utils import INTERVAL_SECONDS
+from API.birdEye_API import API_KEY, BIRDEYE_API_URL, BIRDEYE_API_URL_OHLCV
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter for coroutines: `rate` requests per second with bursts of up to `capacity`.
+
+    pause() blocks every caller for a while (e.g., after a 429), so concurrent fetches back off together
+    instead of each one hitting the limit again.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("TokenBucket rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:  # FIFO: waiters take tokens in arrival order
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def plan_chunks(time_from: int, time_to: int, interval: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    Disjoint [from, to] windows of at most chunk_size points covering [time_from, time_to], oldest first.
+    """
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"Invalid interval: {interval}")
+    span = chunk_size * INTERVAL_SECONDS[interval]
+    windows = []
+    end = time_to
+    while end >= time_from:
+        start = max(time_from, end - span + 1)
+        windows.append((start, end))
+        end = start - 1
+    windows.reverse()
+    return windows
+
+
+async def fetch_history_async(address: str, interval: str, time_from: int, time_to: int, ohlcv: bool = False,
+                              chunk_size: int = 1000, chain: str = "solana", rate: float = 1.0,
+                              burst: Optional[float] = None, max_concurrency: int = 4, retries: int = 5,
+                              backoff: float = 1.0, session: Optional[aiohttp.ClientSession] = None,
+                              url: Optional[str] = None) -> Dict:
+    """
+    Fetch Birdeye history between two timestamps with all chunk windows planned up front and requested
+    concurrently under a token-bucket limit.
+
+    Args:
+        rate / burst: Requests per second and burst size of the limiter.
+        max_concurrency: Maximum requests in flight.
+        retries / backoff: Retries per chunk on 429, 5xx or network errors, waiting backoff * 2**attempt
+                           seconds (or the server's Retry-After) with all requests paused meanwhile.
+        session: Optional aiohttp session to reuse.
+        url: Endpoint override (defaults to the Birdeye price or OHLCV endpoint).
+
+    Returns:
+        dict: {"data": {"items": [...]}, "covered_from": timestamp, "failed": [(from, to), ...]} with items in
+              chronological order. covered_from is the start of the contiguous fetched range that ends at
+              time_to (see fetch_data_by_date); failed lists the windows that could not be fetched.
+    """
+    windows = plan_chunks(time_from, time_to, interval, chunk_size)
+    limiter = TokenBucket(rate, burst)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    url = url or (BIRDEYE_API_URL_OHLCV if ohlcv else BIRDEYE_API_URL)
+    headers = {"accept": "application/json", "x-chain": chain, "x-api-key": API_KEY or ""}
+
+    async def fetch_window(window):
+        params = {"address": address, "type": interval, "time_from": window[0], "time_to": window[1]}
+        if not ohlcv:
+            params["address_type"] = "token"
+        async with semaphore:
+            return await _fetch_chunk(own_session or session, limiter, url, params, headers, retries, backoff)
+
+    own_session = None if session is not None else aiohttp.ClientSession()
+    try:
+        responses = await asyncio.gather(*(fetch_window(window) for window in windows))
+    finally:
+        if own_session is not None:
+            await own_session.close()
+
+    items = []
+    failed = []
+    for window, response in zip(windows, responses):
+        if response is None:
+            failed.append(window)
+            continue
+        items.extend(((response.get("data") or {}).get("items")) or [])
+    covered_from = failed[-1][1] + 1 if failed else time_from
+    logger.debug("Fetched %d items in %d chunks (%d failed)", len(items), len(windows), len(failed))
+    return {"data": {"items": items}, "covered_from": covered_from, "failed": failed}
+
+
+async def _fetch_chunk(session, limiter, url, params, headers, retries, backoff) -> Optional[Dict]:
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        delay = backoff * 2 ** attempt * (1 + random.random() / 4)
+        try:
+            async with session.get(url, params=params, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if isinstance(data, dict) and data.get("success") is False:
+                        if "Too many requests" not in data.get("message", ""):
+                            logger.error("Birdeye error for %s-%s: %s", params["time_from"], params["time_to"],
+                                         data.get("message"))
+                            return None
+                    else:
+                        return data
+                elif response.status == 429 or response.status >= 500:
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after and retry_after.replace(".", "", 1).isdigit():
+                        delay = float(retry_after)
+                else:
+                    logger.error("Error %s: %s", response.status, await response.text())
+                    return None
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = type(e).__name__
+        if attempt < retries:
+            logger.warning("Chunk %s-%s: %s, retrying in %.1fs", params["time_from"], params["time_to"], status, delay)
+            limiter.pause(delay)
+    logger.error("Giving up on chunk %s-%s after %d attempts", params["time_from"], params["time_to"], retries + 1)
+    return None
+
+
+def fetch_history(address: str, interval: str, time_from: int, time_to: int, **options) -> Dict:
+    """Synchronous wrapper of fetch_history_async (runs its own event loop, e.g., inside asyncio.to_thread)."""
+    return asyncio.run(fetch_history_async(address, interval, time_from, time_to, **options))
+
+
+def fetch_span(address: str, interval: str, span_in_days: float, **options) -> Dict:
+    """Concurrent counterpart of fetch_complete_test_data: the last span_in_days up to now."""
+    now = int(time.time())
+    return fetch_history(address, interval, now - int(span_in_days * 24 * 60 * 60), now, **options)
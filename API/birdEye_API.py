@@ -4,6 +4,9 @@ import requests
 import time
 import os
 from dotenv import load_dotenv
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 load_dotenv()
 BIRDEYE_API_URL = "https://public-api.birdeye.so/defi/history_price"
@@ -31,10 +34,10 @@ def get_historical_price(token_address, interval, time_from, time_to, chain="sol
         if response.status_code == 200:
             return response.json()
         else:
-            print(f"Error {response.status_code}: {response.text}")
+            logger.error("Error %s: %s", response.status_code, response.text)
             return None
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
         return None
     
 
@@ -59,5 +62,5 @@ def get_historical_ohlcv_price_data(token_address, interval, time_from, time_to,
         response.raise_for_status()  # Raise an error for HTTP codes 4xx/5xx
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"API request error: {e}")
+        logger.error("API request error: %s", e)
         return None
\ No newline at end of file
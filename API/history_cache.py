@@ -0,0 +1,158 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analytics.time_utils import get_interval_in_minutes
+from API.async_fetcher import fetch_history
+from utils.logger import get_logger
+from utils.os_utils import (history_cache_filename, historical_columns, historical_items, load_historical_columns,
+                            write_historical_columns)
+
+logger = get_logger(__name__)
+
+
+class HistoryCache:
+    """
+    Per-token, per-interval cache of Birdeye history that knows which time ranges it holds.
+
+    Requests for a time range only fetch the parts that are not covered yet (missing head, tail or gaps
+    in between). The cache is held as columns like its columnar .bin file, whose header also lists the
+    covered ranges: fetched items are merged in as arrays, de-duplicated by unixTime (newer fetches win),
+    and ranges are read back as slices. Refreshing a token's history is then one small request for the
+    new tail.
+    """
+
+    def __init__(self, token: str, interval: str, ohlcv: bool = False, directory: str = "historical_data/",
+                 fetch: Optional[Callable] = None):
+        """
+        Args:
+            token (str): Token address.
+            interval (str): Birdeye interval (e.g., '5m').
+            ohlcv (bool): Cache OHLCV candles instead of prices.
+            directory (str): Directory of the cache files.
+            fetch (callable): fetch(token, interval, time_from, time_to) -> response dict like
+                              fetch_data_by_date; defaults to the concurrent fetch_history.
+        """
+        interval_minutes = get_interval_in_minutes(interval)
+        if interval_minutes is None:
+            raise ValueError(f"Invalid interval: {interval}")
+        self.token = token
+        self.interval = interval
+        self.interval_seconds = interval_minutes * 60
+        self.ohlcv = ohlcv
+        self.filename = history_cache_filename(token, interval, ohlcv, directory)
+        self.fetch = fetch or (lambda token, interval, time_from, time_to: fetch_history(
+            token, interval, time_from, time_to, ohlcv=ohlcv))
+        self.fields: List[str] = []  # Item fields in their original order
+        self.constants: Dict = {}  # String fields shared by every item (e.g., 'address')
+        self.columns: Dict[str, np.ndarray] = {}  # Numeric fields, sorted by the unique 'unixTime' column
+        self.covered: List[Tuple[int, int]] = []  # Sorted, disjoint [from, to] ranges (inclusive)
+        self._load()
+
+    def get_span(self, span_in_days: float, now: Optional[int] = None) -> Dict:
+        """The last span_in_days up to now (like fetch_complete_test_data), fetching only what is missing."""
+        now = int(time.time()) if now is None else now
+        return self.get(now - int(span_in_days * 24 * 60 * 60), now)
+
+    def get_span_prices(self, span_in_days: float, now: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """get_span as (prices, timestamps) arrays, the input of TradingEngine.from_price_arrays."""
+        now = int(time.time()) if now is None else now
+        window = self._range(now - int(span_in_days * 24 * 60 * 60), now)
+        if not self.columns:
+            return np.empty(0), self.timestamps
+        prices = self.columns["value"] if "value" in self.columns else self.columns["c"]
+        return prices[window], self.columns["unixTime"][window]
+
+    def get(self, time_from: int, time_to: int) -> Dict:
+        """
+        Items with time_from <= unixTime <= time_to as {'data': {'items': [...]}} in chronological order,
+        fetching the uncovered parts of the range first.
+        """
+        window = self._range(time_from, time_to)
+        columns = {name: column[window] for name, column in self.columns.items()}
+        return {"data": {"items": historical_items(self.fields, self.constants, columns)}}
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.columns.get("unixTime", np.empty(0, dtype=np.int64))
+
+    def _range(self, time_from: int, time_to: int) -> slice:
+        """Fetch the uncovered parts of [time_from, time_to], then the slice of the columns inside it."""
+        missing = self.missing_ranges(time_from, time_to)
+        for start, end in missing:
+            response = self.fetch(self.token, self.interval, start, end)
+            items = ((response or {}).get("data") or {}).get("items") or []
+            self.merge(items, response.get("covered_from", start) if response else end, end)
+        if missing:
+            self.save()
+        timestamps = self.timestamps
+        return slice(int(np.searchsorted(timestamps, time_from, side="left")),
+                     int(np.searchsorted(timestamps, time_to, side="right")))
+
+    def missing_ranges(self, time_from: int, time_to: int) -> List[Tuple[int, int]]:
+        """Parts of [time_from, time_to] not covered yet; parts shorter than one interval cannot hold a new point."""
+        missing = []
+        position = time_from
+        for start, end in self.covered:
+            if end < position:
+                continue
+            if start > time_to:
+                break
+            if start > position:
+                missing.append((position, start))
+            position = max(position, end)
+        if position < time_to:
+            missing.append((position, time_to))
+        return [(start, end) for start, end in missing if end - start >= self.interval_seconds]
+
+    def merge(self, items: List[Dict], covered_from: int, covered_to: int) -> None:
+        """
+        Add fetched items and mark [covered_from, covered_to] as covered.
+
+        Raises:
+            ValueError: If the items have other fields or constants than the cached ones.
+        """
+        if items:
+            fields, constants, columns = historical_columns(items)
+            if not self.fields:
+                self.fields, self.constants = fields, constants
+                self.columns = {name: np.empty(0, dtype=column.dtype) for name, column in columns.items()}
+            elif set(fields) != set(self.fields) or constants != self.constants:
+                raise ValueError("Fetched items do not match the cached fields")
+            # np.unique keeps the first occurrence of every timestamp: the fetched items go first, reversed
+            # so the last of duplicate fetched items wins, as with the cached ones
+            _, first = np.unique(np.concatenate([columns["unixTime"][::-1], self.timestamps]), return_index=True)
+            self.columns = {name: np.concatenate([columns[name][::-1], column])[first]
+                            for name, column in self.columns.items()}
+        if covered_from < covered_to:
+            self.covered = _merge_ranges(self.covered + [(covered_from, covered_to)])
+
+    def save(self) -> None:
+        write_historical_columns(self.filename, self.fields, self.constants, self.columns, len(self.timestamps),
+                                 token=self.token, interval=self.interval, ohlcv=self.ohlcv,
+                                 extra={"covered": [list(r) for r in self.covered]})
+
+    def _load(self) -> None:
+        if not os.path.exists(self.filename):
+            return
+        try:
+            history = load_historical_columns(self.filename)
+        except Exception as e:
+            logger.warning("Ignoring unreadable history cache %s: %s", self.filename, e)
+            return
+        self.fields = history.header["fields"]
+        self.constants = history.header["constants"]
+        self.columns = dict(history.columns)  # Memory-mapped until the next merge
+        self.covered = [tuple(r) for r in history.header["extra"].get("covered", [])]
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
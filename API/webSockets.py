@@ -4,6 +4,9 @@ import os
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
 from pyngrok import ngrok
+from utils.logger import configure_logging, get_logger, lazy
+
+logger = get_logger(__name__)
 
 # 🔹 Load environment variables
 load_dotenv()
@@ -48,14 +51,14 @@ def create_helius_webhook(token_address, ngrok_url):
         )
 
         if response.status_code == 200:
-            print("✅ Webhook successfully created!")
+            logger.info("✅ Webhook successfully created!")
             return response.json()
         else:
-            print(f"❌ Failed to create webhook. Status Code: {response.status_code}, Error: {response.text}")
+            logger.error("❌ Failed to create webhook. Status Code: %s, Error: %s", response.status_code, response.text)
             return None
 
     except Exception as e:
-        print(f"❌ An error occurred: {e}")
+        logger.error("❌ An error occurred: %s", e)
         return None
 
 # Get all webhooks (fetch)
@@ -66,10 +69,10 @@ def get_all_webhooks():
 
     if response.status_code == 200:
         data = response.json()
-        print("✅ Webhooks fetched successfully!")
+        logger.info("✅ Webhooks fetched successfully!")
         return data  # Return webhooks data
     else:
-        print(f"❌ Failed to fetch webhooks. Status Code: {response.status_code}")
+        logger.error("❌ Failed to fetch webhooks. Status Code: %s", response.status_code)
         return None
 
 # Delete specific webhook by ID
@@ -79,27 +82,24 @@ def delete_webhook(webhook_id):
     response = requests.delete(url)
 
     if response.status_code == 200:
-        print(f"✅ Webhook with ID {webhook_id} deleted successfully!")
+        logger.info("✅ Webhook with ID %s deleted successfully!", webhook_id)
     else:
-        print(f"❌ Failed to delete webhook with ID {webhook_id}. Status Code: {response.status_code}")
+        logger.error("❌ Failed to delete webhook with ID %s. Status Code: %s", webhook_id, response.status_code)
 
 @app.route("/webhook", methods=["POST"])
 def listen_to_swaps():
     """
     This endpoint listens for incoming Helius webhook events.
-    When a swap event is received, it prints the data to the console.
+    When a swap event is received, it logs the data.
     """
     data = request.json  # Get JSON data from webhook request
-    print("🔔 Incoming Data:")
-    print(json.dumps(data, indent=4))  # Print the incoming data for debugging
+    logger.debug("🔔 Incoming Data:\n%s", lazy(json.dumps, data, indent=4))  # Incoming data for debugging
 
     # Check if the event type is "SWAP"
     if isinstance(data, dict) and data.get("type") == "SWAP":
-        print("\n🔔 Swap Event Received:")
-        print(json.dumps(data, indent=4))  # Print formatted JSON data of the swap event
+        logger.info("🔔 Swap Event Received:\n%s", lazy(json.dumps, data, indent=4))  # Formatted JSON data of the swap event
     else:
-        print("\n🔔 Non-Swap Event Received:")
-        print(json.dumps(data, indent=4))  # Print other events for debugging
+        logger.debug("🔔 Non-Swap Event Received:\n%s", lazy(json.dumps, data, indent=4))  # Other events for debugging
 
     return jsonify({"message": "✅ Webhook received"}), 200  # Respond to Helius
 
@@ -108,11 +108,13 @@ def start_ngrok_webhook():
     # Start ngrok tunnel
     ngrok.set_auth_token(NGROK_AUTH_TOKEN)
     public_url = ngrok.connect(5000).public_url
-    print(f"🚀 Ngrok Public URL: {public_url}/webhook")
+    logger.info("🚀 Ngrok Public URL: %s/webhook", public_url)
 
     return public_url
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Ask user for token address input (e.g., "So11111111111111111111111111111111111111112")
     token_address = "3KiSkVkvqExtPqANkLV4ze1JdJaeuQPheNcQ2JZWDECg"
 
@@ -130,9 +132,9 @@ if __name__ == "__main__":
     if token_address:
         result = create_helius_webhook(token_address, public_url)
         if result:
-            print(f"🔔 Webhook Details: {json.dumps(result, indent=4)}")
+            logger.info("🔔 Webhook Details: %s", lazy(json.dumps, result, indent=4))
     else:
-        print("❌ No token address provided. Exiting.")
+        logger.error("❌ No token address provided. Exiting.")
 
     # Run Flask app
     app.run(host="0.0.0.0", port=5000, debug=False)
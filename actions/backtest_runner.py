@@ -0,0 +1,365 @@
+"""
+Backtests many tokens (and parameter sets) on a persistent process pool.
+
+Usage:
+    python -m actions.backtest_runner <token or historical_data/<file>.bin|.json> ... [--processes N]
+                                      [--increase 1.5,2.0] [--decrease 0.5] [--fib 0.05]
+                                      [--stage-timings timings.json]
+
+Workers replay the stored history of one token like process_historical_data, label the significant
+moves and return a compact BacktestResult (label index arrays, confidence sums, timings) instead of the
+engine, so only a few kilobytes per job cross the process boundary.
+"""
+import glob
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from actions.tradingEngine import TradingEngine
+from analytics.metrics_table import MetricsTable
+from testing.find_points import PointFinder
+from utils.instrumentation import StageTimings, export_timings
+from utils.logger import configure_logging, get_logger, set_token
+from utils.os_utils import history_cache_filename, historical_metadata_from_filename, load_historical_prices
+from utils.price_store import PriceStore
+from utils.shared_arrays import SharedArrays, remove_stale_arrays, share_arrays
+
+logger = get_logger(__name__)
+
+# Workers only need the engine and PointFinder; token_init is not imported so that they do not load the
+# API clients and the plotting stack.
+HISTORY_DIR = "historical_data/"
+DEFAULT_INTERVAL = "5m"
+
+DEFAULT_PARAMS = {
+    "increase_factors": (1.5,),
+    "decrease_factors": (0.5,),
+    "fib_tolerances": (),
+    "columns": (),  # Metric columns to return with the result (e.g., ("price", "zone_confidence"))
+    "snapshot": False,  # Return an EngineSnapshot (all columns in shared memory) for plotting
+    "stage_timings": False,  # Record per-stage latency histograms of the metric pipeline
+}
+
+
+def find_history_file(token: str, interval: str = DEFAULT_INTERVAL, directory: str = HISTORY_DIR) -> str:
+    """
+    Stored history file of a token: its history cache as written by initialize_token_environment, else a
+    historical_price_<token>_<interval>_<span>_<ohlcv>.bin or .json file from before the cache, or the
+    expected cache name if there is none.
+    """
+    cache = history_cache_filename(token, interval, directory=directory)
+    if os.path.exists(cache):
+        return cache
+    for extension in ("bin", "json"):
+        matches = sorted(glob.glob(os.path.join(directory, f"historical_price_{token}_{interval}_*.{extension}")))
+        if matches:
+            return matches[0]
+    return cache
+
+
+@dataclass
+class BacktestJob:
+    """One backtest: a token's history (file name or list of price points) with one parameter set."""
+    token: str
+    history: Union[str, List[dict]]
+    interval: str = DEFAULT_INTERVAL
+    start_idx: int = 50
+    end_idx: Optional[int] = None
+    params: Dict = field(default_factory=dict)
+
+
+@dataclass
+class BacktestResult:
+    """Compact outcome of a BacktestJob; index arrays are int32 positions in the metrics history."""
+    token: str
+    params: Dict
+    points: int = 0
+    increases: Dict[float, np.ndarray] = field(default_factory=dict)
+    decreases: Dict[float, np.ndarray] = field(default_factory=dict)
+    increase_confidence: Dict[float, float] = field(default_factory=dict)
+    decrease_confidence: Dict[float, float] = field(default_factory=dict)
+    fib_recoveries: Dict[float, np.ndarray] = field(default_factory=dict)
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    snapshot: Optional["EngineSnapshot"] = None
+    timings: Dict[str, float] = field(default_factory=dict)  # Seconds per phase inside the worker
+    stage_timings: Optional[Dict] = None  # StageTimings.to_dict() if requested with the stage_timings param
+    error: Optional[str] = None
+
+    @property
+    def elapsed_s(self) -> float:
+        return sum(self.timings.values())
+
+
+def run_backtest(job: BacktestJob) -> BacktestResult:
+    """Worker entry point: replay one job and summarize it. Failures are returned, not raised."""
+    set_token(job.token)
+    params = {**DEFAULT_PARAMS, **job.params}
+    result = BacktestResult(job.token, params)
+    try:
+        start = time.perf_counter()
+        prices, timestamps = _history_arrays(job.history)
+        end_idx = job.end_idx if job.end_idx is not None else len(prices)
+        loaded = time.perf_counter()
+        result.timings["load"] = loaded - start
+
+        stage_timings = StageTimings(enabled=params["stage_timings"], token=job.token)
+        engine = TradingEngine.from_price_arrays(job.interval, prices[:job.start_idx], timestamps[:job.start_idx],
+                                                 timings=stage_timings)
+        warmed = time.perf_counter()
+        result.timings["warmup"] = warmed - loaded
+
+        replay = slice(job.start_idx, end_idx)
+        for value, unix_time in zip(prices[replay].tolist(), timestamps[replay].tolist()):
+            engine.add_new_price(value, unix_time)
+        replayed = time.perf_counter()
+        result.timings["replay"] = replayed - warmed
+
+        metrics = engine.metric_collector.metrics
+        point_finder = PointFinder(metrics)
+        labels = point_finder.label_matrix(params["increase_factors"], params["decrease_factors"])
+        increase_sums, decrease_sums = labels.confidence_sums(np.nan_to_num(metrics.column("zone_confidence")))
+        for k, factor in enumerate(labels.increase_factors):
+            result.increases[factor] = np.flatnonzero(labels.increases[:, k]).astype(np.int32)
+            result.increase_confidence[factor] = float(increase_sums[k])
+        for k, factor in enumerate(labels.decrease_factors):
+            result.decreases[factor] = np.flatnonzero(labels.decreases[:, k]).astype(np.int32)
+            result.decrease_confidence[factor] = float(decrease_sums[k])
+        if params["fib_tolerances"]:
+            recoveries = point_finder.find_fib_618_retracement_recoveries(params["fib_tolerances"])
+            result.fib_recoveries = {tolerance: np.asarray(indices, dtype=np.int32)
+                                     for tolerance, indices in recoveries.items()}
+        result.columns = {name: metrics.column(name).copy() for name in params["columns"]}
+        if params["snapshot"]:
+            result.snapshot = EngineSnapshot(engine, indices={
+                **{f"increases/{factor}": indices for factor, indices in result.increases.items()},
+                **{f"decreases/{factor}": indices for factor, indices in result.decreases.items()},
+            })
+        if stage_timings.enabled:
+            result.stage_timings = stage_timings.to_dict()
+        result.points = len(metrics)
+        result.timings["labels"] = time.perf_counter() - replayed
+    except Exception as e:
+        logger.exception("Backtest failed: %s", e)
+        result.error = f"{type(e).__name__}: {e}"
+        if result.snapshot is not None:
+            result.snapshot.discard()
+            result.snapshot = None
+    return result
+
+
+class EngineSnapshot:
+    """
+    Picklable, read-only stand-in for a TradingEngine after a backtest, for PricePlotter and PointFinder.
+
+    Created in the worker: the price store, every metric column and optional named index arrays go into
+    one SharedArrays block, while the little analyzer state the plotter reads (key zones, Fibonacci arcs,
+    hourly candles) travels inline. open() in the receiving process returns a SnapshotEngine over
+    zero-copy views, so neither process pickles the metric history.
+    """
+
+    def __init__(self, engine, indices: Optional[Dict[str, Sequence[int]]] = None, candle_intervals=(60,)):
+        collector = engine.metric_collector
+        metrics = collector.metrics
+        self.interval = engine.interval
+        self.kinds = metrics.kinds
+        # Object columns (fields outside the schema) have no raw representation and are pickled
+        self.object_columns = {name: metrics.column(name).copy()
+                               for name, kind in self.kinds.items() if kind == "object"}
+        self.first_timestamp = collector.price_data.first_timestamp
+        self.key_zones = {f"key_zone_{i}": getattr(collector, f"key_zone_{i}") for i in range(1, 7)}
+        fibonacci = collector.fibonacci_analyzer
+        self.arcs = fibonacci.get_all_arcs()
+        self.current_arc = fibonacci.current_arc
+        self.fib_levels = fibonacci.get_current_levels()
+        self.candles = {minutes: collector.interval_data_aggregator.get_interval_data(minutes)
+                        for minutes in candle_intervals}
+
+        arrays = {f"metrics/{name}": metrics.column(name)
+                  for name, kind in self.kinds.items() if kind != "object"}
+        arrays["price_data/prices"] = collector.price_data.prices
+        arrays["price_data/timestamps"] = collector.price_data.timestamps
+        for name, values in (indices or {}).items():
+            arrays[f"indices/{name}"] = np.asarray(values, dtype=np.int64)
+        self.shared: SharedArrays = share_arrays(arrays)
+
+    def open(self) -> "SnapshotEngine":
+        """Map the shared block (once per snapshot) and return the engine-shaped view."""
+        return SnapshotEngine(self, self.shared.attach())
+
+    def discard(self) -> None:
+        self.shared.discard()
+
+
+class SnapshotEngine:
+    """
+    Engine-shaped view of an opened EngineSnapshot. It stands in for the engine, its metric collector and
+    the analyzers the plotter reads (interval_data_aggregator, fibonacci_analyzer), all read-only.
+    """
+
+    def __init__(self, snapshot: EngineSnapshot, arrays: Dict[str, np.ndarray]):
+        self.interval = snapshot.interval
+        columns = {name: snapshot.object_columns[name] if kind == "object" else arrays[f"metrics/{name}"]
+                   for name, kind in snapshot.kinds.items()}
+        self.metrics = MetricsTable.from_columns(columns, snapshot.kinds)
+        self.price_data = PriceStore.from_arrays(arrays["price_data/prices"], arrays["price_data/timestamps"],
+                                                 snapshot.first_timestamp)
+        self.indices = {name[len("indices/"):]: array for name, array in arrays.items()
+                        if name.startswith("indices/")}
+        for name, zone in snapshot.key_zones.items():
+            setattr(self, name, zone)
+        self.current_arc = snapshot.current_arc
+        self._arcs = snapshot.arcs
+        self._fib_levels = snapshot.fib_levels
+        self._candles = snapshot.candles
+        self.metric_collector = self
+        self.interval_data_aggregator = self
+        self.fibonacci_analyzer = self
+
+    def get_interval_data(self, interval_minutes: int, window: int = None) -> List[Dict]:
+        candles = self._candles.get(interval_minutes, [])
+        return candles[-window:] if window else candles
+
+    def get_all_arcs(self):
+        return self._arcs
+
+    def get_current_levels(self):
+        return self._fib_levels
+
+
+class BacktestRunner:
+    """
+    Persistent process pool for backtests, sized to the cores by default.
+
+    Use as a context manager (or call close()); the pool is reused by every run() call, so workers keep
+    their imports warm across token and parameter sweeps.
+    """
+
+    def __init__(self, processes: Optional[int] = None):
+        self.processes = processes or os.cpu_count() or 1
+        remove_stale_arrays()  # Snapshots left behind by runs that crashed
+        self.pool = Pool(self.processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
+
+    def run(self, jobs: Sequence[BacktestJob]) -> List[BacktestResult]:
+        """Run jobs in parallel, logging progress and per-job timings; results are returned in job order."""
+        jobs = list(jobs)
+        results: List[Optional[BacktestResult]] = [None] * len(jobs)
+        start = time.perf_counter()
+        indexed = self.pool.imap_unordered(_run_indexed, enumerate(jobs))
+        for done, (index, result) in enumerate(indexed, 1):
+            results[index] = result
+            elapsed = time.perf_counter() - start
+            remaining = elapsed / done * (len(jobs) - done)
+            if result.error:
+                logger.warning("[%d/%d] %s failed after %.2fs: %s", done, len(jobs), result.token,
+                               result.elapsed_s, result.error)
+            else:
+                logger.info("[%d/%d] %s: %d points in %.2fs (%s), ~%.0fs left", done, len(jobs), result.token,
+                            result.points, result.elapsed_s,
+                            ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in result.timings.items()),
+                            remaining)
+        logger.info("Backtested %d jobs on %d processes in %.2fs", len(jobs), self.processes,
+                    time.perf_counter() - start)
+        return results
+
+    def run_tokens(self, tokens: Sequence[str], param_sets: Sequence[Dict] = ({},),
+                   **job_options) -> List[BacktestResult]:
+        """Run every token (name or history file) with every parameter set."""
+        jobs = [BacktestJob(_token_name(token), _history_source(token), params=dict(params), **job_options)
+                for token in tokens for params in param_sets]
+        return self.run(jobs)
+
+
+def _history_arrays(history) -> Tuple[np.ndarray, np.ndarray]:
+    """(prices, timestamps) of a job's history: memory-mapped columns of a .bin file, or arrays built once."""
+    if isinstance(history, str):
+        return load_historical_prices(history)
+    prices = np.fromiter((point["value"] for point in history), dtype=np.float64, count=len(history))
+    timestamps = np.fromiter((point["unixTime"] for point in history), dtype=np.int64, count=len(history))
+    return prices, timestamps
+
+
+def _run_indexed(indexed_job: Tuple[int, BacktestJob]) -> Tuple[int, BacktestResult]:
+    index, job = indexed_job
+    return index, run_backtest(job)
+
+
+def _is_history_file(token: str) -> bool:
+    return token.endswith((".json", ".bin"))
+
+
+def _history_source(token: str) -> str:
+    return token if _is_history_file(token) else find_history_file(token)
+
+
+def _token_name(token: str) -> str:
+    if not _is_history_file(token):
+        return token
+    return historical_metadata_from_filename(token).get("token", os.path.basename(token))
+
+
+def _stored_tokens():
+    paths = glob.glob(os.path.join(HISTORY_DIR, "cache_*.bin"))
+    paths += glob.glob(os.path.join(HISTORY_DIR, "historical_price_*"))
+    return {historical_metadata_from_filename(path).get("token") for path in paths} - {None}
+
+
+def _factors(value: str) -> Tuple[float, ...]:
+    return tuple(float(factor) for factor in value.split(",") if factor)
+
+
+def main(argv):
+    options = {"--processes": None, "--increase": "1.5", "--decrease": "0.5", "--fib": "", "--stage-timings": None}
+    tokens = []
+    args = iter(argv)
+    for arg in args:
+        if arg in options:
+            options[arg] = next(args)
+        else:
+            tokens.append(arg)
+    if not tokens:
+        tokens = [find_history_file(name) for name in sorted(_stored_tokens())]
+
+    params = {
+        "increase_factors": _factors(options["--increase"]),
+        "decrease_factors": _factors(options["--decrease"]),
+        "fib_tolerances": _factors(options["--fib"]),
+        "stage_timings": options["--stage-timings"] is not None,
+    }
+    processes = int(options["--processes"]) if options["--processes"] else None
+    with BacktestRunner(processes) as runner:
+        results = runner.run_tokens(tokens, [params])
+
+    for result in results:
+        if result.error:
+            print(f"{result.token:<48} failed: {result.error}")
+            continue
+        increases = ", ".join(f"{factor}x: {len(indices)}" for factor, indices in result.increases.items())
+        decreases = ", ".join(f"{factor}x: {len(indices)}" for factor, indices in result.decreases.items())
+        print(f"{result.token:<48} {result.points:6d} points {result.elapsed_s:7.2f}s  "
+              f"increases [{increases}]  decreases [{decreases}]")
+
+    if options["--stage-timings"]:
+        export_timings([result.stage_timings for result in results if result.stage_timings],
+                       options["--stage-timings"])
+        logger.info("Stage timings written to %s", options["--stage-timings"])
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main(sys.argv[1:])
@@ -1,108 +1,173 @@
 import asyncio
 from multiprocessing import Pool
 from actions.tradingEngine import TradingEngine
-from API.API_utils import fetch_complete_test_data
-from utils.os_utils import load_historical_data_from_file, save_historical_data_to_file
+from API.history_cache import HistoryCache
 from testing.plotter import PricePlotter
 from testing.find_points import PointFinder
+from actions.backtest_runner import EngineSnapshot
 from analytics.time_utils import get_interval_in_minutes
 import random
+import threading
+import numpy as np
 import time
+from utils.logger import get_logger, set_token
+from utils.checkpoint import CheckpointError, CheckpointWriter, load_checkpoint
+from utils.shared_arrays import remove_stale_arrays
+
+logger = get_logger(__name__)
 
 REFRESH_INTERVAL = "5m"
 INDICATOR_WINDOW = 80
 FETCHING_SPAN_IN_DAYS = 200
 OHLCV = False
 RAW_DATA_PATH = "historical_data/"
+CHECKPOINT_PATH = "checkpoints/"
+CHECKPOINT_EVERY_SECONDS = 15 * 60
+
+def checkpoint_filename(token):
+    return f"{CHECKPOINT_PATH}{token}_{REFRESH_INTERVAL}.ckpt"
 
 async def fetch_new_data_point(token):
     await asyncio.sleep(0.5)  # Placeholder  - later interval conversion needed
     return {"price": 100, "unixTime": int(time.time() * 1000)}  # Add timestamp
 
 def process_historical_data(args):
-    interval, historical_data, testing_mode, start_idx, end_idx = args
-    engine = TradingEngine(interval, historical_data[:start_idx])
+    """
+    Build the engine for a token in a pool process. In testing mode the history is replayed and labelled,
+    and an EngineSnapshot (columns and label indices in shared memory) is returned instead of the engine;
+    otherwise the engine itself, which live monitoring continues to update.
+    """
+    interval, prices, timestamps, testing_mode, start_idx, end_idx, token = args
+    set_token(token)  # Runs in a pool process, the caller's log context does not carry over
+    engine = TradingEngine.from_price_arrays(interval, prices[:start_idx], timestamps[:start_idx])
     plotter = PricePlotter(engine)
     
     if testing_mode:
-        for i in range(start_idx, end_idx if end_idx is not None else len(historical_data)):
-            engine.add_new_price_point(historical_data[i])
+        replay = slice(start_idx, end_idx)
+        for value, unix_time in zip(prices[replay].tolist(), timestamps[replay].tolist()):
+            engine.add_new_price(value, unix_time)
             # plotter.plot_live()
         point_finder = PointFinder(engine.metric_collector.metrics)
-        point_finder.evaluate_zone_settings(price_increase=1.5, price_decrease=0.5)
-        targets = point_finder.find_all_significant_price_increases(price_increase=1.5)
-        similars_index = point_finder.find_all_significant_price_decreases(price_decrease=0.5)
-        return engine, targets, similars_index
-    return engine, None, None
+        labels = point_finder.label_matrix(increase_factors=(1.5,), decrease_factors=(0.5,))
+        point_finder.evaluate_zone_settings(price_increase=1.5, price_decrease=0.5, labels=labels)
+        return EngineSnapshot(engine, indices={
+            "targets": labels.increase_indices(1.5),
+            "similars": labels.decrease_indices(0.5),
+        })
+    return engine
+
+def restore_engine(token, prices, timestamps):
+    """
+    Restore a token's engine from its checkpoint and catch it up with the points of the history (price and
+    timestamp arrays) that are newer than the checkpoint. Returns None if there is no usable checkpoint.
+    """
+    try:
+        engine, metadata = load_checkpoint(checkpoint_filename(token))
+    except CheckpointError as e:
+        logger.info("No checkpoint restored: %s", e)
+        return None
+    if metadata["interval"] != REFRESH_INTERVAL:
+        logger.info("Checkpoint interval %s does not match %s", metadata["interval"], REFRESH_INTERVAL)
+        return None
+
+    last_timestamp = metadata["last_timestamp"]
+    first_newer = 0 if last_timestamp is None else int(np.searchsorted(timestamps, last_timestamp, side="right"))
+    for value, unix_time in zip(prices[first_newer:].tolist(), timestamps[first_newer:].tolist()):
+        engine.add_new_price(value, unix_time)
+    logger.info("Restored %d points from checkpoint, replayed %d newer points", metadata["points"],
+                len(prices) - first_newer)
+    return engine
+
+def process_live_point(trading_engine, engine_lock, checkpoint_writer, new_point):
+    # Updates and checkpoints hold the engine lock, so a checkpoint never sees a half-applied point
+    with engine_lock:
+        trading_engine.metric_collector.add_new_price_point_and_calculate_metrics(new_point)
+        checkpoint_writer.maybe_save()
+
+def save_final_checkpoint(engine_lock, checkpoint_writer):
+    with engine_lock:
+        checkpoint_writer.save()
 
 async def live_monitoring(token, trading_engine):
     """Fetch data every 5 minutes exactly, processing in parallel."""
     interval_seconds = 300  # 5 minutes
     last_fetch_time = asyncio.get_event_loop().time()  # Start time
+    checkpoint_writer = CheckpointWriter(trading_engine, checkpoint_filename(token), token,
+                                         every_seconds=CHECKPOINT_EVERY_SECONDS)
+    engine_lock = threading.Lock()
+    pending = set()  # Processing tasks still running
 
-    while True:
-        # Calculate time until next fetch
-        current_time = asyncio.get_event_loop().time()
-        elapsed = current_time - last_fetch_time
-        sleep_time = max(0, interval_seconds - elapsed)
-        await asyncio.sleep(sleep_time)
-
-        # Fetch new data point
-        new_point = await fetch_new_data_point(token)
-        last_fetch_time = asyncio.get_event_loop().time()  # Update after fetch
-        print(f"Fetched data for {token} at {new_point['unixTime'] / 1000:.0f}s")
-
-        # Process in a thread (non-blocking)
-        asyncio.create_task(
-            asyncio.to_thread(trading_engine.metric_collector.add_new_price_point_and_calculate_metrics, new_point)
-        )
+    try:
+        while True:
+            # Calculate time until next fetch
+            current_time = asyncio.get_event_loop().time()
+            elapsed = current_time - last_fetch_time
+            sleep_time = max(0, interval_seconds - elapsed)
+            await asyncio.sleep(sleep_time)
 
-async def initialize_token_environment(testing_mode, token, wallet):
-    print(f"Starting environment for {token}")
-    
-    # Fetch historical data
-    historical_data = None
-    if testing_mode:
-        print(f"Fetching data for token: {token}")
-        try:
-            historical_data = load_historical_data_from_file(
-                filename=f"{RAW_DATA_PATH}historical_price_{token}_{REFRESH_INTERVAL}_{FETCHING_SPAN_IN_DAYS}_{OHLCV}.json"
+            # Fetch new data point
+            new_point = await fetch_new_data_point(token)
+            last_fetch_time = asyncio.get_event_loop().time()  # Update after fetch
+            logger.debug("Fetched data at %.0fs", new_point['unixTime'] / 1000)
+
+            # Process in a thread (non-blocking)
+            task = asyncio.create_task(
+                asyncio.to_thread(process_live_point, trading_engine, engine_lock, checkpoint_writer, new_point)
             )
-        except Exception as e:
-            print(f"No data found for token {token}. Fetching from API.")
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    finally:
+        # Shutdown or removal of the token (task cancelled): let the points in flight finish, then save
+        # under the engine lock (a cancelled to_thread task leaves its thread running until it is done)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await asyncio.to_thread(save_final_checkpoint, engine_lock, checkpoint_writer)
+
+async def initialize_token_environment(testing_mode, token, wallet):
+    set_token(token)  # Log context of this task and the threads it starts
+    logger.info("Starting environment")
     
-    if not historical_data:
-        historical_data = await asyncio.to_thread(
-            fetch_complete_test_data, token, REFRESH_INTERVAL, FETCHING_SPAN_IN_DAYS, ohlcv=OHLCV
-        )
+    # Fetch historical data. The range-aware cache is the token's only history store: it loads what was
+    # fetched before, downloads only the part of the span that is not cached yet and saves the result.
+    logger.info("Fetching data")
+    history_cache = HistoryCache(token, REFRESH_INTERVAL, ohlcv=OHLCV, directory=RAW_DATA_PATH)
+    prices, timestamps = await asyncio.to_thread(history_cache.get_span_prices, FETCHING_SPAN_IN_DAYS)
+    logger.info("History of %d points ready", len(prices))
 
-    if historical_data:
-        save_historical_data_to_file(
-            historical_data,
-            filename=f"{RAW_DATA_PATH}historical_price_{token}_{REFRESH_INTERVAL}_{FETCHING_SPAN_IN_DAYS}_{OHLCV}.json"
-        )
-        print(f"Data saved for token: {token}")
+    # Live mode resumes from the token's checkpoint instead of replaying the whole history
+    if not testing_mode:
+        tradingEngine = await asyncio.to_thread(restore_engine, token, prices, timestamps)
+        if tradingEngine is not None:
+            await live_monitoring(token, tradingEngine)
+            return
 
     # Process historical data in a separate process
     starting_index = 50 if testing_mode else None
     end_index = None
+    remove_stale_arrays()  # Snapshots left behind by earlier runs that crashed
     with Pool(1) as pool:
-        tradingEngine, targets, similars_index = await asyncio.to_thread(
+        result = await asyncio.to_thread(
             pool.apply, 
             process_historical_data, 
-            ((REFRESH_INTERVAL, historical_data["data"]["items"], testing_mode, starting_index, end_index),)
+            ((REFRESH_INTERVAL, prices, timestamps, testing_mode, starting_index, end_index, token),)
         )
 
     if testing_mode:
-        print(f"Analyzed {(len(tradingEngine.metric_collector.metrics) * get_interval_in_minutes(REFRESH_INTERVAL)) / 60} hours of data for {token}")
+        try:
+            tradingEngine = result.open()  # Zero-copy views of the worker's price and metric columns
+        except Exception:
+            result.discard()
+            raise
+        logger.info("Analyzed %s hours of data", (len(tradingEngine.metric_collector.metrics) * get_interval_in_minutes(REFRESH_INTERVAL)) / 60)
         plotter = PricePlotter(tradingEngine)
-        plotter.add_backtesting_points(targets, similars_index)
+        plotter.add_backtesting_points(tradingEngine.indices["targets"], tradingEngine.indices["similars"])
         try:
             plotter.plot_static()
         except Exception as e:
-            print(e)
+            logger.exception("Plotting failed: %s", e)
     else:
         # Start live monitoring as a separate task
+        tradingEngine = result
         await live_monitoring(token, tradingEngine)
 
 
@@ -1,5 +1,6 @@
 from analytics.metric_collector import MetricCollector
 from collections import Counter
+import numpy as np
 
 # Global Configuration
 SLIPPAGE_PERCENTAGE = 0.02  # 2% slippage
@@ -12,24 +13,43 @@ TREND_LOOKBACK = 5
 
 
 class TradingEngine:
-    def __init__(self, interval, historical_price_data, ohlcv=False):
-        """Initialize the trading engine with historical price data, interval settings, and a portfolio."""
-        self.price_data = historical_price_data
+    def __init__(self, interval, historical_price_data, ohlcv=False, timings=None):
+        """
+        Initialize the trading engine with historical price data, interval settings, and a portfolio.
+
+        Pass an enabled StageTimings as `timings` to record per-stage latencies of the metric pipeline
+        and of check_for_action.
+        """
         self.interval = interval
         #initialize the metricCollector and calculate metrics for passed historical data
-        self.metric_collector = MetricCollector(interval)
+        self.metric_collector = MetricCollector(interval, timings=timings)
+        self.price_data = self.metric_collector.price_data  # shared PriceStore, no per-point dicts kept
 
         if historical_price_data:
-            for price_point in historical_price_data:
-                self.metric_collector.add_new_price_point_and_calculate_metrics(price_point)
-                # print(f"lenge of metric data: {len(self.metric_collector.metrics)}")
-        
+            count = len(historical_price_data)
+            prices = np.fromiter((p["value"] for p in historical_price_data), dtype=np.float64, count=count)
+            timestamps = np.fromiter((p["unixTime"] for p in historical_price_data), dtype=np.int64, count=count)
+            volumes = np.fromiter((p.get("volume", 0) for p in historical_price_data), dtype=np.float64, count=count)
+            self.metric_collector.add_prices_and_calculate_metrics(prices, timestamps, volumes)
+
+    @classmethod
+    def from_price_arrays(cls, interval, prices, timestamps, timings=None):
+        """
+        Engine warmed up from aligned price and timestamp arrays (e.g., HistoricalColumns.prices and
+        .timestamps of a memory-mapped .bin history), without building a dict per point.
+        """
+        engine = cls(interval, None, timings=timings)
+        engine.metric_collector.add_prices_and_calculate_metrics(prices, timestamps)
+        return engine
 
-    def check_for_action(self):
-        try:
-            self.metric_collector.add_new_price_point_and_calculate_metrics(self.price_data[-1])
-        except IndexError:
-            return
+    def check_for_action(self, new_price_data):
+        with self.metric_collector.timings.stage("check_for_action"):
+            self.metric_collector.add_new_price_point_and_calculate_metrics(new_price_data)
+
+    def check_for_action_at(self, value, unix_time):
+        """check_for_action for a point given as values (e.g., read from price columns)."""
+        with self.metric_collector.timings.stage("check_for_action"):
+            self.metric_collector.add_new_price_and_calculate_metrics(value, unix_time)
 
 
     def check_if_buy_signal(self):
@@ -60,8 +80,10 @@ class TradingEngine:
         return False
 
     def add_new_price_point(self, new_price_data):
-        self.price_data.append(new_price_data)
-        self.check_for_action()
+        self.check_for_action(new_price_data)
+
+    def add_new_price(self, value, unix_time):
+        self.check_for_action_at(value, unix_time)
 
     def calculate_buy_amount(self, current_price):
         available_balance = self.portfolio.holdings["USDC"]
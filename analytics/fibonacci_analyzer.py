@@ -1,5 +1,7 @@
-import pandas as pd
 import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class FibonacciAnalyzer:
     def __init__(self, metric_collector):
@@ -27,18 +29,13 @@ class FibonacciAnalyzer:
         Returns:
             float: The current ATR value, or 1e-6 if insufficient data.
         """
-        prices = list(self.metric_collector.price_data)
-        if not prices:
-            return 1e-6
-
+        prices = self.metric_collector.price_data.prices
         effective_period = min(atr_period, len(prices))
         if effective_period < 2:
             return 1e-6
 
-        close_prices = pd.Series([x["value"] for x in prices[-effective_period:]])
-        price_changes = close_prices.diff().abs()
-        atr = price_changes.rolling(window=effective_period).mean().iloc[-1]
-        return atr if not pd.isna(atr) else 1e-6
+        atr = np.mean(np.abs(np.diff(prices[-effective_period:])))
+        return atr if not np.isnan(atr) else 1e-6
 
     def calculate_overall_range(self, lookback=50):
         """
@@ -50,15 +47,11 @@ class FibonacciAnalyzer:
         Returns:
             float: The price range (high - low) over the lookback period, or 1e-6 if insufficient data.
         """
-        prices = list(self.metric_collector.price_data)
-        if not prices:
-            return 1e-6
-
-        lookback_prices = [p["value"] for x in prices[-lookback:]]
+        lookback_prices = self.metric_collector.price_data.prices[-lookback:]
         if len(lookback_prices) < 2:
             return 1e-6
 
-        return max(lookback_prices) - min(lookback_prices)
+        return lookback_prices.max() - lookback_prices.min()
 
     def detect_price_arc(self, atr_period=20, lookback=50, fib_level_threshold=0.618):
         """
@@ -76,12 +69,12 @@ class FibonacciAnalyzer:
 
         atr = self.calculate_atr(atr_period)
         if atr is None:
-            print("Warning: ATR calculation returned None")
+            logger.warning("ATR calculation returned None")
             return
 
-        # Get the latest price and index from price_data
-        new_price = price_data[-1]["value"]
-        new_index = len(price_data) - 1
+        # Get the latest price and its absolute index from price_data
+        new_price = price_data.last_price
+        new_index = price_data.last_index
 
         # If no current arc, start one with the latest price as the low
         if not self.current_arc:
@@ -92,7 +85,7 @@ class FibonacciAnalyzer:
                 'high_index': new_index,
                 'start_index': new_index
             }
-            print(f"Starting new arc at index {new_index}: low={new_price:.6f}")
+            logger.debug("Starting new arc at index %d: low=%.6f", new_index, new_price)
             self.update_fibonacci_levels()
             return
 
@@ -109,7 +102,7 @@ class FibonacciAnalyzer:
         # Check if the price has dropped to or below the 0.618 Fibonacci level
         fib_threshold_price = self.current_arc['high'] - fib_level_threshold * range_size
         if new_price <= fib_threshold_price:
-            print(f"Price hit 0.618 level at index {new_index}: price={new_price:.6f}, fib_threshold={fib_threshold_price:.6f}")
+            logger.debug("Price hit 0.618 level at index %d: price=%.6f, fib_threshold=%.6f", new_index, new_price, fib_threshold_price)
             # End the current arc by setting its end_index
             self.current_arc['end_index'] = new_index
             # Calculate Fibonacci levels for the completed arc
@@ -132,7 +125,7 @@ class FibonacciAnalyzer:
                 'end_index': new_index,
                 'fib_levels': fib_levels
             })
-            print(f"Completed arc: start={self.current_arc['start_index']}, end={new_index}, high={high:.6f}, low={low:.6f}")
+            logger.debug("Completed arc: start=%d, end=%d, high=%.6f, low=%.6f", self.current_arc['start_index'], new_index, high, low)
             # Start a new arc with the current price as the new low
             self.current_arc = {
                 'low': new_price,
@@ -141,7 +134,7 @@ class FibonacciAnalyzer:
                 'high_index': new_index,
                 'start_index': new_index
             }
-            print(f"New arc starting at index {new_index}: low={new_price:.6f}")
+            logger.debug("New arc starting at index %d: low=%.6f", new_index, new_price)
 
         # Update Fibonacci levels for the current arc
         self.update_fibonacci_levels()
@@ -1,48 +1,108 @@
-import pandas as pd
 import numpy as np
-from scipy.signal import find_peaks
+from analytics.streaming_indicators import CrossoverDetector, IndicatorEngine
+from analytics.swing_points import SwingWindow
 
 
 class IndicatorAnalyzer:
     def __init__(self, metric_collector):
         self.min_interval = metric_collector.interval
         self.price_data = metric_collector.price_data
-        self.ema_values = {}
-        self.rsi_values = {}
         self.metrics = metric_collector.metrics
+        self.series = metric_collector.series
         self.available_intervals = {
             "1m": 1, "5m": 5, "15m": 15, "30m": 30,
             "1h": 60, "4h": 240, "12h": 720,
             "1d": 1440, "3d": 4320, "1w": 10080
         }
+        self.interval_names = {minutes: name for name, minutes in self.available_intervals.items()}
+        self.aggregator = metric_collector.interval_data_aggregator
+        self.engine = IndicatorEngine()
+        self.swing_windows = {}  # (rsi field, lookback) -> (price SwingWindow, RSI SwingWindow)
+        self.crossover_detectors = {}  # (short field, long field, length) -> CrossoverDetector
 
-    def calculate_ema(self, interval, period, avg_prev=False):
+    def _minutes(self, interval):
+        return self.available_intervals[interval]
+
+    def _is_available(self, interval):
+        """True for the base interval and every interval the aggregator builds candles for."""
         if interval not in self.available_intervals:
-            return None
+            return False
+        minutes = self._minutes(interval)
+        return minutes == self._minutes(self.min_interval) or minutes in (self.aggregator.target_intervals or ())
 
-        step = self.available_intervals[interval] // self.available_intervals[self.min_interval]
-        prices = list(self.price_data)[-period * step::step]
+    def _interval_closes(self, interval):
+        """Zero-copy view of the candle closes of `interval` seen so far (raw prices for the base interval)."""
+        return self.aggregator.get_interval_arrays(self._minutes(interval))["close"]
 
-        if len(prices) < period:
-            return None
+    def _stream(self, indicator, interval, period):
+        return self.engine.get(indicator, interval, period, history=self._interval_closes(interval))
 
-        price_series = pd.Series([x["value"] for x in prices])
-        key = f"{period}-{interval}"
+    def append(self, price, new_candles):
+        """
+        Advance all running indicator states after a new base-interval price point.
 
-        if key in self.ema_values and self.ema_values[key] is not None:
-            prev_ema = self.ema_values[key]
-            multiplier = 2 / (period + 1)
-            new_ema = (price_series.iloc[-1] - prev_ema) * multiplier + prev_ema
-        else:
-            new_ema = price_series.ewm(span=period, adjust=False).mean().iloc[-1]
+        Must be called once per point after it was appended to price_data and the aggregator. The base
+        interval advances with every point, higher intervals with each candle the aggregator completed.
 
-        self.ema_values[key] = new_ema
-        
-        if avg_prev:
-            self.ema_values[key] = None  #turn on off if current should be calculated with previous
+        Args:
+            price (float): The new base-interval price.
+            new_candles (dict): {interval_minutes: [completed candles]} as returned by update_interval_data.
+        """
+        self.engine.update(self.min_interval, price)
+        for minutes, candles in new_candles.items():
+            interval = self.interval_names.get(minutes)
+            for candle in candles:
+                self.engine.update(interval, candle["close"])
+
+    def calculate_history(self, indicator, interval, period, prices, timestamps):
+        """
+        Compute an indicator for every point of a base-interval price array in one vectorized pass and
+        seed its running state from the same pass.
+
+        Candle closes are taken with the aggregator's completion rule, so the value at the last point
+        equals what calculate_ema/calculate_rsi/calculate_sma/calculate_macd return after replaying
+        `prices`, and the running state continues from there with the next close.
 
-        # self.metrics.append({key: new_ema}) # save in metrics for up to date calculations
-        return new_ema
+        Args:
+            indicator (str): 'ema', 'rsi', 'window' (SMA and Bollinger statistics) or 'macd'.
+            interval (str): The time interval (e.g., '5m', '1h').
+            period (int or tuple): The number of periods, (short, long, signal) for 'macd'.
+            prices (np.ndarray): Base-interval prices, oldest first, starting at the token's first point.
+            timestamps (np.ndarray): Unix timestamps aligned with `prices`.
+
+        Returns:
+            dict: Arrays aligned with `prices` ('value', 'mean' and 'std' for windows, 'macd', 'signal'
+                  and 'histogram' for MACD), NaN where the indicator is not available.
+        """
+        closed = self.aggregator.candle_close_mask(timestamps, self._minutes(interval))
+        series = self.engine.prime(indicator, interval, period, prices[closed])
+        if not self._is_available(interval):
+            return {name: np.full(len(prices), np.nan) for name in series}
+        # The value at base point t is the one of the last candle closed at or before t
+        close_idx = np.cumsum(closed) - 1
+        valid = close_idx >= 0
+        aligned = {}
+        for name, values in series.items():
+            out = np.full(len(prices), np.nan)
+            out[valid] = values[close_idx[valid]]
+            aligned[name] = out
+        return aligned
+
+    def calculate_ema(self, interval, period, avg_prev=False):
+        """
+        Return the current EMA for an interval and period from its running state.
+
+        Args:
+            interval (str): The time interval (e.g., '1m', '5m').
+            period (int): The number of periods for the EMA.
+            avg_prev (bool): Kept for compatibility, the EMA is always carried forward.
+
+        Returns:
+            float or None: The EMA value, or None if insufficient data or invalid interval.
+        """
+        if not self._is_available(interval):
+            return None
+        return self._stream("ema", interval, period).value
 
     def calculate_sma(self, interval, period):
         """
@@ -55,91 +115,48 @@ class IndicatorAnalyzer:
         Returns:
             float or None: The SMA value, or None if insufficient data or invalid interval.
         """
-        if interval not in self.available_intervals:
-            return None
-
-        step = self.available_intervals[interval] // self.available_intervals[self.min_interval]
-        prices = list(self.price_data)[-period * step::step]
-
-        if len(prices) < period:
+        if not self._is_available(interval):
             return None
-
-        price_series = pd.Series([x["value"] for x in prices])
-        sma = price_series.mean()
-        return sma
+        return self._stream("window", interval, period).mean
 
     def calculate_rsi(self, interval, period=15, avg_prev=False):
-        
-        if interval not in self.available_intervals:
-            return None
-
-        step = self.available_intervals[interval] // self.available_intervals[self.min_interval]
-        prices = list(self.price_data)[-period * step::step]
+        """
+        Return the current Wilder RSI for an interval and period from its running state.
 
-        # if interval == "5m":
-        #     print(f"interval: {interval}")
-        #     print(f"step: {step}")
-        #     print(f"prices: {prices}")
-            
+        Args:
+            interval (str): The time interval (e.g., '1m', '5m').
+            period (int): The number of periods for the RSI.
+            avg_prev (bool): Kept for compatibility, the averages are always carried forward.
 
-        if len(prices) < period:
+        Returns:
+            float or None: The RSI value, or None if insufficient data or invalid interval.
+        """
+        if not self._is_available(interval):
             return None
-
-        price_series = pd.Series([x["value"] for x in prices])
-        delta = price_series.diff()
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        key = f"RSI-{interval}"
-
-        if key in self.rsi_values and self.rsi_values[key] is not None:
-            prev_avg_gain, prev_avg_loss = self.rsi_values[key]
-            avg_gain = ((prev_avg_gain * (period - 1)) + gain.iloc[-1]) / period
-            avg_loss = ((prev_avg_loss * (period - 1)) + loss.iloc[-1]) / period
-        else:
-            avg_gain = gain.rolling(window=period).mean().iloc[-1]
-            avg_loss = loss.rolling(window=period).mean().iloc[-1]
-
-        if avg_loss == 0:
-            rs = 0  # Prevent division by zero
-        else:
-            rs = avg_gain / avg_loss
-
-        rsi = 100 - (100 / (1 + rs))
-        self.rsi_values[key] = (avg_gain, avg_loss)
-
-        if avg_prev:
-            self.rsi_values[key] = None  #turn on off if current should be calculated with previous
-
-        # self.metrics.append({key : rsi})  # save in metrics for up to date calculations
-
-        return rsi
+        return self._stream("rsi", interval, period).value
 
     #TODO might need to change to accept ema values
     def calculate_indicator_slopes(self, metric_type, interval, n, averaged=True):
-        """Calculate the slope of indicator values over the last n points from self.metrics."""
-        # Construct the key used in self.metrics
-        key = f"{metric_type}-{interval}" if metric_type == "RSI" else f"{n}-{interval}"
-
-        # Extract values from self.metrics for the given metric_type and interval
-        metric_values = [metric[key] for metric in self.metrics if key in metric]
+        """
+        Calculate the slope of indicator values over the last n points from the collector's series registry.
 
-        # Ensure we have enough data points (at least 2 for a slope)
-        if len(metric_values) < 2:
-            return None  
+        Args:
+            metric_type (str): 'RSI' for the 'RSI-<interval>' series, otherwise the series '<n>-<interval>'.
+            interval (str): Interval of the series (e.g., '5m').
+            n (int): Number of latest values to fit.
+            averaged (bool): Least-squares slope over the n values if True, else (last - first) / (n - 1).
 
-        # Take the last n values
-        last_n_values = metric_values[-n:]
+        Returns:
+            float or None: Slope per point, or None if the series is unknown or has fewer than 2 values.
+        """
+        # Construct the key of the series
+        key = f"{metric_type}-{interval}" if metric_type == "RSI" else f"{n}-{interval}"
+        if key not in self.series:
+            return None
 
-        # If averaged, calculate the average slope between consecutive values
         if averaged:
-            slopes = [(last_n_values[i] - last_n_values[i - 1]) for i in range(1, len(last_n_values))]
-            avg_slope = sum(slopes) / len(slopes)  # Rolling average slope
-            return avg_slope
-
-        # If not averaged, calculate the linear slope using first and last values
-        else:
-            linear_slope = (last_n_values[-1] - last_n_values[0]) / (len(last_n_values) - 1)  # Linear slope
-            return linear_slope
+            return self.series.slope(key, n)
+        return self.series[key].endpoint_slope(n)
 
     def calculate_ma_crossovers(self, short_ma_list, long_ma_list, current_short, current_long):
         """
@@ -195,6 +212,34 @@ class IndicatorAnalyzer:
 
         return crossovers
             
+    def calculate_stored_ma_crossovers(self, short_field, long_field, length, current_short, current_long):
+        """
+        calculate_ma_crossovers for the last `length` stored values of two metric columns, from a bounded
+        crossover detector that is advanced with the metric rows added since the last call.
+
+        Args:
+            short_field (str): Metric column of the short MA (e.g., 'ema.short').
+            long_field (str): Metric column of the long MA (e.g., 'ema.medium').
+            length (int): Number of stored values to report crossovers for.
+            current_short (float): The newest short MA value.
+            current_long (float): The newest long MA value.
+
+        Returns:
+            list: Same as calculate_ma_crossovers(self.metrics.last(short_field, length), ...).
+        """
+        key = (short_field, long_field, length)
+        detector = self.crossover_detectors.get(key)
+        if detector is None or detector.count > len(self.metrics):
+            detector = self.crossover_detectors[key] = CrossoverDetector(length)
+
+        start = detector.count
+        if start < len(self.metrics):
+            # Missing values are stored as NaN
+            for short, long in zip(self.metrics.column(short_field)[start:].tolist(),
+                                   self.metrics.column(long_field)[start:].tolist()):
+                detector.update(None if short != short else short, None if long != long else long)
+        return detector.signals(current_short, current_long)
+
     def calculate_bollinger_bands(self, interval, sma_period=20, std_dev_factor=2, sma=None):
         """
         Calculate Bollinger Bands for a given interval, SMA period, and standard deviation factor.
@@ -211,28 +256,21 @@ class IndicatorAnalyzer:
                 Values are set to None if the calculation cannot be performed due to invalid interval or insufficient data.
         """
         # Check if the interval is valid
-        if interval not in self.available_intervals:
+        if not self._is_available(interval):
             return {'middle_band': None, 'upper_band': None, 'lower_band': None}
 
-        # Calculate the step size based on the interval relative to the minimum interval
-        step = self.available_intervals[interval] // self.available_intervals[self.min_interval]
-        
-        # Get the latest prices for the specified period, adjusted by the step
-        prices = list(self.price_data)[-sma_period * step::step]
+        window = self._stream("window", interval, sma_period)
 
         # Ensure we have enough data
-        if len(prices) < sma_period:
+        if not window.is_full:
             return {'middle_band': None, 'upper_band': None, 'lower_band': None}
 
-        # Extract the price values into a pandas Series
-        price_series = pd.Series([x["value"] for x in prices])
-
-        # Use provided SMA or calculate it
+        # Use provided SMA or take it from the running window
         if sma is None:
-            sma = price_series.mean()
+            sma = window.mean
 
-        # Calculate the standard deviation of the price series
-        std_dev = price_series.std()  # Uses sample standard deviation by default
+        # Sample standard deviation of the window
+        std_dev = window.std
 
         # Calculate the upper and lower bands
         upper_band = sma + (std_dev_factor * std_dev)
@@ -262,32 +300,24 @@ class IndicatorAnalyzer:
         if not self.metrics or len(self.metrics) < 2:
             return 0.0
 
-        # Extract lookback period from metrics
-        past_metrics = self.metrics[-lookback:] if len(self.metrics) >= lookback else self.metrics
-        prices = [metric["price"] for metric in past_metrics]
-        rsi_values = [metric[rsi_key[0]][rsi_key[1]] for metric in past_metrics]
-
-        # Append latest values
-        rsi_values.append(latest_rsi)
-        latest_price = self.price_data[-1]["value"] if self.price_data else prices[-1]
-        prices.append(latest_price)
+        # Swing points of the lookback window, maintained as the metric rows arrive
+        price_window, rsi_window = self._swing_windows(".".join(rsi_key), lookback)
 
-        # Convert to numpy arrays, handle None values
-        price_array = np.array(prices)
-        rsi_array = np.array(rsi_values) if latest_rsi is not None and all(v is not None for v in rsi_values) else None
-
-        if rsi_array is None:
+        if latest_rsi is None or rsi_window.has_nan:
             return 0.0
 
+        # The latest values are evaluated as the provisional last point of the window
+        latest_price = self.price_data.last_price if self.price_data else self.metrics.column("price")[-1]
+
         # Calculate ranges for normalization
-        price_range = np.max(price_array) - np.min(price_array) if len(price_array) > 1 else 1.0
-        rsi_range = np.max(rsi_array) - np.min(rsi_array) if len(rsi_array) > 1 else 1.0
+        price_range = price_window.value_range(latest_price)
+        rsi_range = rsi_window.value_range(latest_rsi)
 
-        # Find peaks and troughs with configurable peak_distance
-        price_highs_idx, _ = find_peaks(price_array, distance=peak_distance)
-        price_lows_idx, _ = find_peaks(-price_array, distance=peak_distance)
-        rsi_highs_idx, _ = find_peaks(rsi_array, distance=peak_distance)
-        rsi_lows_idx, _ = find_peaks(-rsi_array, distance=peak_distance)
+        # Peaks and troughs with configurable peak_distance (same selection as find_peaks)
+        price_highs_idx, price_highs = price_window.swing_highs(latest_price, peak_distance)
+        price_lows_idx, price_lows = price_window.swing_lows(latest_price, peak_distance)
+        rsi_highs_idx, rsi_highs = rsi_window.swing_highs(latest_rsi, peak_distance)
+        rsi_lows_idx, rsi_lows = rsi_window.swing_lows(latest_rsi, peak_distance)
 
         # Check if enough points for divergence
         if len(price_highs_idx) < 2 or len(price_lows_idx) < 2 or len(rsi_highs_idx) < 2 or len(rsi_lows_idx) < 2:
@@ -309,10 +339,9 @@ class IndicatorAnalyzer:
         # Bullish divergence: Lower price lows, higher RSI lows
         if len(price_lows_idx) >= 2 and len(rsi_lows_idx) >= 2:
             p_idx1, p_idx2 = price_lows_idx[-2], price_lows_idx[-1]
-            price_low1, price_low2 = price_array[p_idx1], price_array[p_idx2]
-            r_idx1 = min(rsi_lows_idx, key=lambda x: abs(x - p_idx1))
-            r_idx2 = min(rsi_lows_idx, key=lambda x: abs(x - p_idx2))
-            rsi_low1, rsi_low2 = rsi_array[r_idx1], rsi_array[r_idx2]
+            price_low1, price_low2 = price_lows[-2], price_lows[-1]
+            rsi_low1 = rsi_lows[_nearest(rsi_lows_idx, p_idx1)]
+            rsi_low2 = rsi_lows[_nearest(rsi_lows_idx, p_idx2)]
 
             if price_low1 > price_low2 and rsi_low1 < rsi_low2:
                 strength = calc_strength(price_low1, price_low2, rsi_low1, rsi_low2, price_range, rsi_range)
@@ -322,10 +351,9 @@ class IndicatorAnalyzer:
         # Bearish divergence: Higher price highs, lower RSI highs
         if len(price_highs_idx) >= 2 and len(rsi_highs_idx) >= 2:
             p_idx1, p_idx2 = price_highs_idx[-2], price_highs_idx[-1]
-            price_high1, price_high2 = price_array[p_idx1], price_array[p_idx2]
-            r_idx1 = min(rsi_highs_idx, key=lambda x: abs(x - p_idx1))
-            r_idx2 = min(rsi_highs_idx, key=lambda x: abs(x - p_idx2))
-            rsi_high1, rsi_high2 = rsi_array[r_idx1], rsi_array[r_idx2]
+            price_high1, price_high2 = price_highs[-2], price_highs[-1]
+            rsi_high1 = rsi_highs[_nearest(rsi_highs_idx, p_idx1)]
+            rsi_high2 = rsi_highs[_nearest(rsi_highs_idx, p_idx2)]
 
             if price_high1 < price_high2 and rsi_high1 > rsi_high2:
                 strength = -calc_strength(price_high1, price_high2, rsi_high1, rsi_high2, price_range, rsi_range)
@@ -334,6 +362,23 @@ class IndicatorAnalyzer:
 
         return strength
     
+    def _swing_windows(self, rsi_field, lookback):
+        """Price and RSI swing windows for a divergence setting, advanced with the metric rows added since the last call."""
+        key = (rsi_field, lookback)
+        windows = self.swing_windows.get(key)
+        if windows is None or windows[0].count > len(self.metrics):
+            windows = (SwingWindow(lookback), SwingWindow(lookback))
+            self.swing_windows[key] = windows
+
+        price_window, rsi_window = windows
+        start = price_window.count
+        if start < len(self.metrics):
+            for price, rsi in zip(self.metrics.column("price")[start:].tolist(),
+                                  self.metrics.column(rsi_field)[start:].tolist()):
+                price_window.update(price)
+                rsi_window.update(rsi)
+        return windows
+
     def analyze_rsi_crossovers(self, latest_rsi_short, latest_rsi_long, short_key=["rsi", "short"], long_key=["rsi", "long"], lookback=5):
         """
         Analyzes RSI crossovers between short and long RSI values.
@@ -353,9 +398,8 @@ class IndicatorAnalyzer:
             return 0
 
         # Extract lookback period from metrics
-        past_metrics = self.metrics[-lookback:] if len(self.metrics) >= lookback else self.metrics
-        rsi_short_values = [metric[short_key[0]][short_key[1]] for metric in past_metrics]
-        rsi_long_values = [metric[long_key[0]][long_key[1]] for metric in past_metrics]
+        rsi_short_values = self.metrics.last(".".join(short_key), lookback)
+        rsi_long_values = self.metrics.last(".".join(long_key), lookback)
 
         # Append latest values
         rsi_short_values.append(latest_rsi_short)
@@ -381,7 +425,10 @@ class IndicatorAnalyzer:
         
     def calculate_macd(self, interval, short_period=12, long_period=26, signal_period=9):
         """
-        Calculate MACD, Signal line, and Histogram for a given interval.
+        Return MACD, Signal line, and Histogram for a given interval from its running state.
+
+        The fast, slow and signal EMAs advance only when a candle of the interval closes, so the values
+        equal a full-history computation over the interval's closes.
 
         Args:
         interval (str): The time interval (e.g., '1m', '5m').
@@ -390,59 +437,26 @@ class IndicatorAnalyzer:
         signal_period (int, optional): Period for the Signal line EMA. Defaults to 9.
 
         Returns:
-        dict: Dictionary with 'macd', 'signal', and 'histogram', or None values if calculation fails.
+        dict: Dictionary with 'macd', 'signal', and 'histogram', None while not enough closes are available.
         """
-        if interval not in self.available_intervals:
+        if not self._is_available(interval):
             # print(f"Invalid interval: {interval}. Available intervals: {self.available_intervals.keys()}")
             return {'macd': None, 'signal': None, 'histogram': None}
-            
-
-        # Calculate the step size based on the interval
-        step = self.available_intervals[interval] // self.available_intervals[self.min_interval]
-
-        # Ensure we have enough data for the longest period
-        required_data_points = max(short_period, long_period, signal_period) * step
-        prices = list(self.price_data)[-required_data_points:]
-
-        if len(prices) < required_data_points:
-            # print(f"Insufficient data for MACD calculation. Required: {required_data_points}, Available: {len(prices)}")
-            return {'macd': None, 'signal': None, 'histogram': None}
-            
-        # Extract price values
-        price_series = pd.Series([x["value"] for x in prices])
-
-        # Calculate short and long EMAs
-        short_ema = price_series.ewm(span=short_period, adjust=False).mean().iloc[-1]
-        long_ema = price_series.ewm(span=long_period, adjust=False).mean().iloc[-1]
-
-        # Calculate MACD Line
-        macd_line = short_ema - long_ema
-
-        # To calculate the Signal Line, we need a series of MACD values
-        # Get enough data points to compute a series of MACD values
-        macd_series_data = list(self.price_data)[-signal_period * step:]
-        if len(macd_series_data) < signal_period * step:
-            return {'macd': macd_line, 'signal': None, 'histogram': None}
-
-        macd_series_prices = pd.Series([x["value"] for x in macd_series_data])
-        short_ema_series = macd_series_prices.ewm(span=short_period, adjust=False).mean()
-        long_ema_series = macd_series_prices.ewm(span=long_period, adjust=False).mean()
-        macd_series = short_ema_series - long_ema_series
-
-        # Calculate Signal Line (9-period EMA of MACD)
-        signal_line = macd_series.ewm(span=signal_period, adjust=False).mean().iloc[-1]
-
-        # Calculate Histogram
-        histogram = macd_line - signal_line
 
+        stream = self._stream("macd", interval, (short_period, long_period, signal_period))
         return {
-        'macd': macd_line,
-        'signal': signal_line,
-        'histogram': histogram
+        'macd': stream.macd,
+        'signal': stream.signal,
+        'histogram': stream.histogram
         }
-        
+
 
     
+def _nearest(indices, target):
+    """Position of the first index closest to target (like min(indices, key=abs distance))."""
+    return int(np.argmin(np.abs(indices - target)))
+
+
 def normalize_ema_relative_to_price(ema_value, price):
     """Normalize EMA value relative to current price."""
     if ema_value == 0 or ema_value is None:
@@ -6,26 +6,46 @@ from analytics.fibonacci_analyzer import FibonacciAnalyzer
 from interpretation.confidence import ConfidenceCalculator
 from analytics.zones import ZoneAnalyzer
 from utils import interval_aggregator
+from utils.price_store import PriceStore
+from analytics.metrics_table import MetricsTable
+from analytics.metric_scheduler import MetricScheduler
+from utils.series_registry import SeriesRegistry
+from utils.logger import get_logger
+from utils.instrumentation import StageTimings
+import numpy as np
+
+logger = get_logger(__name__)
 
 
 class MetricCollector:
-    def __init__(self, interval):
+    def __init__(self, interval, max_history=None, timings=None):
+        """
+        Args:
+            interval (str): Base interval of the price points (e.g., '5m').
+            max_history (int): Price points (and candles per interval) to retain as ring buffers, or None to keep
+                               everything.
+            timings (StageTimings): Per-stage latency histograms to record into; disabled if omitted.
+        """
         self.interval = interval
         self.interval_in_minutes = get_interval_in_minutes(interval)
-        self.price_data = []  # List of dicts: [{"value": price, "unixTime": ts}, ...]
-        self.metrics = []
-
-        self.key_zone_1 = []
-        self.key_zone_2 = []
-        self.key_zone_3 = []
-        self.key_zone_4 = []
-        self.key_zone_5 = []
-        self.key_zone_6 = []
-
-        self.interval_data_aggregator = interval_aggregator.IntervalDataAggregator(self)
+        self.price_data = PriceStore(capacity=max_history)  # Shared columnar price/timestamp arrays, ring buffer if max_history is set
+        self.metrics = MetricsTable()  # One typed column per metric field, rows readable as the usual nested dicts
+        self.series = SeriesRegistry()  # Bounded named series for slope features
+        self.series.register("RSI-5m", 6)
+        self.timings = timings if timings is not None else StageTimings()  # Opt-in per-stage latency histograms
+
+        self.key_zone_1 = {}
+        self.key_zone_2 = {}
+        self.key_zone_3 = {}
+        self.key_zone_4 = {}
+        self.key_zone_5 = {}
+        self.key_zone_6 = {}
+
+        # Candles are never more than base points, so max_history bounds every interval's candles too
+        self.interval_data_aggregator = interval_aggregator.IntervalDataAggregator(self, max_candles=max_history)
         self.indicator_analyzer = IndicatorAnalyzer(self)
         # self.chart_analyzer = ChartAnalyzer(interval)
-        self.price_analyzer = PriceAnalytics()
+        self.price_analyzer = PriceAnalytics(self.price_data)
         self.fibonacci_analyzer = FibonacciAnalyzer(self)
         self.zone_analyzer = ZoneAnalyzer(self)
         self.confidence_calculator = ConfidenceCalculator(self,  
@@ -34,41 +54,220 @@ class MetricCollector:
                                                           decay_rate=0.05)
         self.confidence_settings = self.confidence_calculator
 
+        # Higher-timeframe metrics, recomputed only when a candle of their timeframe closes
+        self.scheduler = MetricScheduler()
+        self.scheduler.register("indicators_15m", 15, self.calculate_15m_indicators)
+        self.scheduler.register("indicators_1h", 60, self.calculate_1h_indicators)
+
     def add_new_price_point_and_calculate_metrics(self, new_price_point):
-        self.price_data.append(new_price_point)
-        self.interval_data_aggregator.update_interval_data(new_price_point, ohlcv=False) # add mimicked OHLCV data to interval_price_data
-        # self.chart_analyzer.append_price_data(new_price_point)
-        self.price_analyzer.append(new_price_point)
-        self.metrics.append(self.collect_all_metrics_for_current_point(len(self.price_data) - 1))
+        self.add_new_price_and_calculate_metrics(new_price_point["value"], new_price_point["unixTime"],
+                                                 new_price_point.get("volume", 0))
+
+    def add_new_price_and_calculate_metrics(self, value, unix_time, volume=0):
+        """add_new_price_point_and_calculate_metrics for a point given as values (no price dict needed)."""
+        with self.timings.stage("append"):
+            self._append_price(value, unix_time, volume)
+        with self.timings.stage("collect"):
+            metrics = self.collect_all_metrics_for_current_point(self.price_data.last_index)
+        self.metrics.append(metrics)
+
+    def add_prices_and_calculate_metrics(self, prices, timestamps, volumes=None):
+        """
+        Batch warmup: append a price history given as aligned arrays (e.g., the memory-mapped columns
+        of a .bin history file) and calculate the metrics of every point.
+
+        The candles of all target intervals come from one vectorized resampling pass, and all indicator
+        columns (momentum, volatility, RSI, EMA, SMA, Bollinger Bands, MACD) are computed over whole
+        arrays while seeding the running indicator states, so live updates continue exactly where a
+        point-by-point replay would. Only the path-dependent stages (zones, confidence, Fibonacci arcs,
+        divergence, crossovers) still advance point by point.
+
+        Args:
+            prices (np.ndarray): Base-interval prices, oldest first.
+            timestamps (np.ndarray): Unix timestamps aligned with `prices`.
+            volumes (np.ndarray): Volumes aligned with `prices` (optional, zeros if omitted).
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if len(self.price_data) != self.price_data.total:
+            # The ring buffer already dropped points the indicator history would start from
+            for n, (value, unix_time) in enumerate(zip(prices.tolist(), timestamps.tolist())):
+                self.add_new_price_and_calculate_metrics(value, unix_time, 0 if volumes is None else volumes[n])
+            return
+        if not len(prices):
+            return
+
+        offset = len(self.price_data)
+        candle_events = self.interval_data_aggregator.replay_interval_data(timestamps, prices, volumes)
+        with self.timings.stage("indicators.history"):
+            history = self.calculate_indicator_history(
+                np.concatenate([self.price_data.prices, prices]),
+                np.concatenate([self.price_data.timestamps, timestamps]),
+            )
+
+        # candle_events goes first so zip runs the generator to its end, which primes the accumulators
+        for n, (new_candles, value, unix_time) in enumerate(zip(candle_events, prices.tolist(), timestamps.tolist())):
+            with self.timings.stage("append"):
+                self.price_data.append_value(value, unix_time)
+            row = {name: _optional(values[offset + n]) for name, values in history.items()}
+            with self.timings.stage("collect"):
+                metrics = self.collect_all_metrics_for_current_point(self.price_data.last_index, indicators=row)
+            self.metrics.append(metrics)
+
+        # The 15m/1h caches were not read during the batch
+        self.scheduler.invalidate()
+
+    def _append_price(self, value, unix_time, volume=0):
+        """Feed a new price to the store, aggregator and indicator states, then signal candle closes."""
+        self.price_data.append_value(value, unix_time)
+        new_candles = self.interval_data_aggregator.update_interval_price(value, unix_time, volume) # add mimicked OHLCV data to interval_price_data
+        self.indicator_analyzer.append(value, new_candles)
+        # self.chart_analyzer.append_price_data(price_point)
+        self.scheduler.on_candle_close(new_candles)
     
 
-    def collect_all_metrics_for_current_point(self, i):
-        current_price = self.price_data[-1]["value"]
+    def calculate_indicators(self):
+        """Indicator values for the newest point, read from the running indicator states."""
+        current_price = self.price_data.last_price
+        data_idx = len(self.price_data) - 1  # Always use the end of price_data
+
+        with self.timings.stage("indicators.15m"):
+            indicators_15m = self.scheduler.get("indicators_15m")
+        with self.timings.stage("indicators.1h"):
+            indicators_1h = self.scheduler.get("indicators_1h")
 
-        print(i)
+        return {
+            "momentum_short": self.price_analyzer.calculate_price_momentum(15, 5), #span in min / interval in min
+            "momentum_medium": self.price_analyzer.calculate_price_momentum(60, 5), #span in min / interval in min
+            "momentum_long": self.price_analyzer.calculate_price_momentum(240, 5), #span in min / interval in min
+            "pseudo_atr": (self.price_analyzer.calculate_pseudo_atr(data_idx, 14) / current_price * 100) if current_price != 0 else 0.0,
+            "volatility_short": (self.price_analyzer.calculate_volatility(data_idx, 6) / current_price * 100) if current_price != 0 else 0.0,
+            "rsi_short": self.indicator_analyzer.calculate_rsi("5m", 15),
+            **indicators_15m,
+            "ema_short": self.indicator_analyzer.calculate_ema("5m", 10),
+            "ema_medium": self.indicator_analyzer.calculate_ema("5m", 50),
+            "ema_long": self.indicator_analyzer.calculate_ema("5m", 100),
+            "ema_longterm": self.indicator_analyzer.calculate_ema("5m", 200),
+            **indicators_1h,
+        }
+
+    def calculate_15m_indicators(self):
+        """Indicators fed by 15m closes (scheduled on the 15m candle close)."""
+        return {
+            "rsi_middle_short": self.indicator_analyzer.calculate_rsi("15m", 15),
+        }
+
+    def calculate_1h_indicators(self):
+        """Indicators fed by 1h closes (scheduled on the 1h candle close)."""
+        sma_long = self.indicator_analyzer.calculate_sma("1h", 20)
+        boilinger_bands = self.indicator_analyzer.calculate_bollinger_bands("1h", 20, 2, sma_long)
+        macd = self.indicator_analyzer.calculate_macd("1h")
+
+        return {
+            "rsi_long": self.indicator_analyzer.calculate_rsi("1h", 15),
+            "sma_short": self.indicator_analyzer.calculate_sma("1h", 5),
+            "sma_medium": self.indicator_analyzer.calculate_sma("1h", 10),
+            "sma_long": sma_long,
+            "boilinger_upper": boilinger_bands["upper_band"],
+            "boilinger_middle": boilinger_bands["middle_band"],
+            "boilinger_lower": boilinger_bands["lower_band"],
+            "macd": macd["macd"],
+            "macd_signal": macd["signal"],
+            "macd_histogram": macd["histogram"],
+        }
+
+    def calculate_mid_term_zones(self, window=10):
+        """Mid-term (1h candle) support/resistance zones, or None until two 1h candles exist."""
+        if len(self.interval_data_aggregator.interval_price_data[60]) < 2:
+            return None
+        return self.zone_analyzer.get_dynamic_zones(window=window, zone_type="mid_term")
+
+    def calculate_long_term_zones(self, window=5):
+        """Long-term (4h candle) support/resistance zones, or None until two 4h candles exist."""
+        if len(self.interval_data_aggregator.interval_price_data[240]) < 2:
+            return None
+        return self.zone_analyzer.get_dynamic_zones(window=window, zone_type="long_term")
+
+    def calculate_indicator_history(self, prices, timestamps):
+        """
+        The values of calculate_indicators for every point of a price array, in one vectorized pass.
+
+        Seeds the running indicator states from the same pass; states calculate_indicators does not
+        read are dropped and primed again from the stores on their next use.
+
+        Args:
+            prices (np.ndarray): Base-interval prices, oldest first, starting at the token's first point.
+            timestamps (np.ndarray): Unix timestamps aligned with `prices`.
+
+        Returns:
+            dict: Same keys as calculate_indicators, each an array aligned with `prices` (NaN = None).
+        """
+        def to_percent(values):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(prices != 0, values / prices * 100, 0.0)
+
+        indicators = self.indicator_analyzer
+        seeded = [
+            ("rsi", "5m", 15), ("rsi", "15m", 15), ("rsi", "1h", 15),
+            ("ema", "5m", 10), ("ema", "5m", 50), ("ema", "5m", 100), ("ema", "5m", 200),
+            ("window", "1h", 5), ("window", "1h", 10), ("window", "1h", 20), ("macd", "1h", (12, 26, 9)),
+        ]
+        indicators.engine.retain(seeded)
+        series = {key: indicators.calculate_history(*key, prices, timestamps) for key in seeded}
+        bands = series["window", "1h", 20]
+        macd = series["macd", "1h", (12, 26, 9)]
+
+        return {
+            "momentum_short": self.price_analyzer.calculate_price_momentum_history(prices, 15, 5),
+            "momentum_medium": self.price_analyzer.calculate_price_momentum_history(prices, 60, 5),
+            "momentum_long": self.price_analyzer.calculate_price_momentum_history(prices, 240, 5),
+            "pseudo_atr": to_percent(self.price_analyzer.calculate_pseudo_atr_history(prices, 14)),
+            "volatility_short": to_percent(self.price_analyzer.calculate_volatility_history(prices, 6)),
+            "rsi_short": series["rsi", "5m", 15]["value"],
+            "rsi_middle_short": series["rsi", "15m", 15]["value"],
+            "rsi_long": series["rsi", "1h", 15]["value"],
+            "ema_short": series["ema", "5m", 10]["value"],
+            "ema_medium": series["ema", "5m", 50]["value"],
+            "ema_long": series["ema", "5m", 100]["value"],
+            "ema_longterm": series["ema", "5m", 200]["value"],
+            "sma_short": series["window", "1h", 5]["mean"],
+            "sma_medium": series["window", "1h", 10]["mean"],
+            "sma_long": bands["mean"],
+            "boilinger_upper": bands["mean"] + 2 * bands["std"],
+            "boilinger_middle": bands["mean"],
+            "boilinger_lower": bands["mean"] - 2 * bands["std"],
+            "macd": macd["macd"],
+            "macd_signal": macd["signal"],
+            "macd_histogram": macd["histogram"],
+        }
+
+    def collect_all_metrics_for_current_point(self, i, indicators=None):
+        current_price = self.price_data.last_price
+
+        logger.debug("Collecting metrics for point %d", i)
 
         # Calculate window sizes
         short_window = 120  # Short-term 5 min interval
-        medium_window = 10  # Mid-term 1 hour interval
-        long_window = 5  # Long-term 4 hour interval
 
-        # Short-term zones (intraday, quick moves)
-        self.key_zone_1, self.key_zone_2 = self.zone_analyzer.get_dynamic_zones(
-            window=short_window,
-            zone_type="short_term",
-        )
+        timings = self.timings
 
-        if len(self.interval_data_aggregator.interval_price_data[60]) >= 2:
-            self.key_zone_3, self.key_zone_4 = self.zone_analyzer.get_dynamic_zones(
-                window=medium_window,
-                zone_type="mid_term",
+        # Short-term zones (intraday, quick moves)
+        with timings.stage("zones.short_term"):
+            self.key_zone_1, self.key_zone_2 = self.zone_analyzer.get_dynamic_zones(
+                window=short_window,
+                zone_type="short_term",
             )
 
-        if len(self.interval_data_aggregator.interval_price_data[240]) >= 2:
-            self.key_zone_3, self.key_zone_4 = self.zone_analyzer.get_dynamic_zones(
-                window=long_window,
-                zone_type="long_term",
-            )            
+        # Mid-term (1 hour) and long-term (4 hour) zones are served from the zone cache until such a candle closes
+        with timings.stage("zones.mid_term"):
+            mid_term_zones = self.calculate_mid_term_zones()
+        if mid_term_zones is not None:
+            self.key_zone_3, self.key_zone_4 = mid_term_zones
+
+        with timings.stage("zones.long_term"):
+            long_term_zones = self.calculate_long_term_zones()
+        if long_term_zones is not None:
+            self.key_zone_3, self.key_zone_4 = long_term_zones
 
 
         self.confidence_calculator.settings.set_parameters(                
@@ -101,64 +300,63 @@ class MetricCollector:
 
 
 
-        time_features = get_time_features(self.price_data[-1]["unixTime"])  # Corrected to use last price data point
+        time_features = get_time_features(self.price_data.last_timestamp)  # Corrected to use last price data point
 
-        # Pre-compute dependent values
-        momentum_short = self.price_analyzer.calculate_price_momentum(15, 5) #span in min / interval in min  
-        momentum_medium = self.price_analyzer.calculate_price_momentum(60, 5) #span in min / interval in min 
-        momentum_long = self.price_analyzer.calculate_price_momentum(240, 5) #span in min / interval in min
-        
-        data_idx = len(self.price_data) - 1  # Always use the end of price_data
-        pseudo_atr = (self.price_analyzer.calculate_pseudo_atr(data_idx, 14) / current_price * 100) if current_price != 0 else 0.0
-        volatility_short = (self.price_analyzer.calculate_volatility(data_idx, 6) / current_price * 100) if current_price != 0 else 0.0
-
-        rsi_short = self.indicator_analyzer.calculate_rsi("5m", 15)
-        rsi_middle_short = self.indicator_analyzer.calculate_rsi("15m", 15)
-        rsi_long = self.indicator_analyzer.calculate_rsi("1h", 15)
-        rsi_slope = self.indicator_analyzer.calculate_indicator_slopes("RSI", "5m", 6) # in class IndicatorAnalyzer
-        
-        ema_short = self.indicator_analyzer.calculate_ema("5m", 10)
-        ema_medium = self.indicator_analyzer.calculate_ema("5m", 50)
-        ema_long = self.indicator_analyzer.calculate_ema("5m", 100)
-        ema_longterm = self.indicator_analyzer.calculate_ema("5m", 200)
-
-        sma_short = self.indicator_analyzer.calculate_sma("1h", 5)
-        sma_medium = self.indicator_analyzer.calculate_sma("1h", 10)
-        sma_long = self.indicator_analyzer.calculate_sma("1h", 20)
+        # Indicator values from the running states, or precomputed rows during a batch warmup
+        if indicators is None:
+            with timings.stage("indicators"):
+                indicators = self.calculate_indicators()
+        momentum_short = indicators["momentum_short"]
+        momentum_medium = indicators["momentum_medium"]
+        momentum_long = indicators["momentum_long"]
+        pseudo_atr = indicators["pseudo_atr"]
+        volatility_short = indicators["volatility_short"]
 
-        boilinger_bands = self.indicator_analyzer.calculate_bollinger_bands("1h", 20, 2, sma_long)
- 
+        rsi_short = indicators["rsi_short"]
+        rsi_middle_short = indicators["rsi_middle_short"]
+        rsi_long = indicators["rsi_long"]
+        with timings.stage("rsi_slope"):
+            self.series.append("RSI-5m", rsi_short)
+            rsi_slope = self.indicator_analyzer.calculate_indicator_slopes("RSI", "5m", 6) # in class IndicatorAnalyzer
+
+        ema_short = indicators["ema_short"]
+        ema_medium = indicators["ema_medium"]
+        ema_long = indicators["ema_long"]
+        ema_longterm = indicators["ema_longterm"]
+
+        sma_short = indicators["sma_short"]
+        sma_medium = indicators["sma_medium"]
+        sma_long = indicators["sma_long"]
 
         normalized_ema_short = normalize_ema_relative_to_price(ema_short, current_price)
         normalized_ema_medium = normalize_ema_relative_to_price(ema_medium, current_price)
         normalized_ema_long = normalize_ema_relative_to_price(ema_long, current_price)
         normalized_ema_longterm = normalize_ema_relative_to_price(ema_longterm, current_price)
 
-        # Extract EMA histories from MetricCollectoss self.metrics
-        short_ema_values = [m["ema"]["short"] for m in self.metrics if "ema" in m and "short" in m["ema"]][-5:]
-        medium_ema_values = [m["ema"]["medium"] for m in self.metrics if "ema" in m and "medium" in m["ema"]][-5:]
-        medium_ema_values11 = [m["ema"]["long"] for m in self.metrics if "ema" in m and "medium" in m["ema"]][-11:]
-        long_ema_values = [m["ema"]["longterm"] for m in self.metrics if "ema" in m and "long" in m["ema"]][-11:]
-
-        crossover_short_medium = self.indicator_analyzer.calculate_ma_crossovers(
-            short_ema_values, medium_ema_values, ema_short, ema_medium
-        )
-        crossover_medium_long = self.indicator_analyzer.calculate_ma_crossovers(
-            medium_ema_values11, long_ema_values, ema_medium, ema_long
-        )
+        # Crossovers against the stored EMA histories, kept in bounded buffers of the last 5 / 11 rows
+        with timings.stage("crossovers"):
+            crossover_short_medium = self.indicator_analyzer.calculate_stored_ma_crossovers(
+                "ema.short", "ema.medium", 5, ema_short, ema_medium
+            )
+            crossover_medium_long = self.indicator_analyzer.calculate_stored_ma_crossovers(
+                "ema.long", "ema.longterm", 11, ema_medium, ema_long
+            )
 
-        rsi_divergence_signal = self.indicator_analyzer.analyze_rsi_divergence(
-            latest_rsi=rsi_long,
-            rsi_key= ["rsi", "long"],
-            lookback=100,
-            peak_distance=15
-        )
+        with timings.stage("divergence"):
+            rsi_divergence_signal = self.indicator_analyzer.analyze_rsi_divergence(
+                latest_rsi=rsi_long,
+                rsi_key= ["rsi", "long"],
+                lookback=100,
+                peak_distance=15
+            )
 
-        macd = self.indicator_analyzer.calculate_macd("1h")
-        # print(macd)
+        with timings.stage("fibonacci"):
+            self.fibonacci_analyzer.recalculate()
+        logger.debug("Fibonacci levels: %s", self.fibonacci_analyzer.fib_levels)
 
-        self.fibonacci_analyzer.recalculate()
-        print(self.fibonacci_analyzer.fib_levels)
+        with timings.stage("confidence"):
+            zone_confidence = self.confidence_calculator.calculate_zone_confidence(current_price)
+            zone_confidence_slope = self.confidence_calculator.calculate_confidence_slope()
 
         # Build and return metrics dict
         return {
@@ -194,14 +392,14 @@ class MetricCollector:
             "divergence": rsi_divergence_signal,
 
             "boilinger_bands": {
-                "upper": boilinger_bands["upper_band"],
-                "middle": boilinger_bands["middle_band"],
-                "lower": boilinger_bands["lower_band"],
+                "upper": indicators["boilinger_upper"],
+                "middle": indicators["boilinger_middle"],
+                "lower": indicators["boilinger_lower"],
             },
             "macd": {
-                "macd": macd["macd"],
-                "signal": macd["signal"],
-                "histogram": macd["histogram"],
+                "macd": indicators["macd"],
+                "signal": indicators["macd_signal"],
+                "histogram": indicators["macd_histogram"],
             },
 
             "key_zone_1": self.key_zone_1,
@@ -215,13 +413,15 @@ class MetricCollector:
             # "drawdown_tight": self.chart_analyzer.calculate_drawdown(3, 288)["short"],
             # "drawdown_short": self.chart_analyzer.calculate_drawdown(12, 288)["short"],
             # "drawdown_long": self.chart_analyzer.calculate_drawdown(12, 288)["long"],
-            "zone_confidence": self.confidence_calculator.calculate_zone_confidence(current_price),
-            "zone_confidence_slope": self.confidence_calculator.calculate_confidence_slope(),      
+            "zone_confidence": zone_confidence,
+            "zone_confidence_slope": zone_confidence_slope,
             "time": {
                 "minute_of_day": time_features["minute_of_day"],
                 "day_of_week": time_features["day_of_week"],
             }
         }
 
-    
-   
\ No newline at end of file
+
+def _optional(value):
+    """Map the NaN placeholders of history arrays back to None."""
+    return None if np.isnan(value) else float(value)
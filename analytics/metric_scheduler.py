@@ -0,0 +1,49 @@
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+class MetricScheduler:
+    """
+    Candle-close driven cache for metrics of higher timeframes.
+
+    Each metric is registered with the timeframe (in minutes) whose candles are its only input. Its
+    value is computed on first request and served from the cache until a candle of that timeframe
+    closes, so hourly and 4-hour metrics are recomputed once per candle instead of on every tick.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Tuple[int, Callable]] = {}
+        self.names_by_timeframe: Dict[int, List[str]] = defaultdict(list)
+        self.cache: Dict[str, object] = {}
+        self.computations = defaultdict(int)  # name -> number of (re)computations
+        self.requests = defaultdict(int)  # name -> number of reads
+
+    def register(self, name: str, timeframe_minutes: int, compute: Callable) -> None:
+        """
+        Declare a metric.
+
+        Args:
+            name: Unique metric name.
+            timeframe_minutes: Timeframe whose candle closes change the metric's inputs (e.g., 60).
+            compute: Zero-argument callable returning the current value.
+        """
+        self.metrics[name] = (timeframe_minutes, compute)
+        self.names_by_timeframe[timeframe_minutes].append(name)
+
+    def get(self, name: str):
+        """Cached value of a metric, computed first if its timeframe closed a candle since the last read."""
+        self.requests[name] += 1
+        if name not in self.cache:
+            self.cache[name] = self.metrics[name][1]()
+            self.computations[name] += 1
+        return self.cache[name]
+
+    def on_candle_close(self, timeframes: Iterable[int]) -> None:
+        """Mark the metrics of every timeframe that just closed a candle for recomputation."""
+        for timeframe in timeframes:
+            for name in self.names_by_timeframe.get(timeframe, ()):
+                self.cache.pop(name, None)
+
+    def invalidate(self) -> None:
+        """Drop all cached values (e.g., after the underlying states were rebuilt)."""
+        self.cache.clear()
@@ -0,0 +1,310 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Fields of the per-point metric dict built by MetricCollector, as (dotted path, kind, width).
+# 'float' columns store None as NaN, 'signals' columns hold the fixed-length crossover lists
+# (1 / 0 / None) as int8 rows, right-aligned and padded for the shorter lists of the first points.
+METRIC_SCHEMA = (
+    ("price", "float", 1),
+    ("momentum.short", "float", 1),
+    ("momentum.medium", "float", 1),
+    ("momentum.long", "float", 1),
+    ("volatility.pseudo_atr", "float", 1),
+    ("volatility.short", "float", 1),
+    ("rsi.short", "float", 1),
+    ("rsi.middle_short", "float", 1),
+    ("rsi.long", "float", 1),
+    ("rsi.slope", "float", 1),
+    ("ema.short", "float", 1),
+    ("ema.medium", "float", 1),
+    ("ema.long", "float", 1),
+    ("ema.longterm", "float", 1),
+    ("ema.crossover_short_medium", "signals", 6),
+    ("ema.crossover_medium_long", "signals", 12),
+    ("sma.short", "float", 1),
+    ("sma.medium", "float", 1),
+    ("sma.long", "float", 1),
+    ("divergence", "float", 1),
+    ("boilinger_bands.upper", "float", 1),
+    ("boilinger_bands.middle", "float", 1),
+    ("boilinger_bands.lower", "float", 1),
+    ("macd.macd", "float", 1),
+    ("macd.signal", "float", 1),
+    ("macd.histogram", "float", 1),
+    ("key_zone_1.level", "float", 1),
+    ("key_zone_1.strength", "float", 1),
+    ("key_zone_2.level", "float", 1),
+    ("key_zone_2.strength", "float", 1),
+    ("key_zone_3.level", "float", 1),
+    ("key_zone_3.strength", "float", 1),
+    ("key_zone_4.level", "float", 1),
+    ("key_zone_4.strength", "float", 1),
+    ("key_zone_5.level", "float", 1),
+    ("key_zone_5.strength", "float", 1),
+    ("key_zone_6.level", "float", 1),
+    ("key_zone_6.strength", "float", 1),
+    ("token_age", "float", 1),
+    ("zone_confidence", "float", 1),
+    ("zone_confidence_slope", "float", 1),
+    ("time.minute_of_day", "int", 1),
+    ("time.day_of_week", "int", 1),
+)
+
+# Groups that hold a zone dict ({'level', 'strength'}), or {} while no zone is known
+ZONE_GROUPS = {"key_zone_1", "key_zone_2", "key_zone_3", "key_zone_4", "key_zone_5", "key_zone_6"}
+
+_SIGNAL_NONE = -1
+_SIGNAL_PAD = -2
+
+
+class MetricsTable:
+    """
+    Columnar history of the per-point metric dicts.
+
+    Every field is kept in its own typed array (struct of arrays), so history queries such as the last
+    n RSI values are NumPy slices instead of walks over a list of nested dicts. Rows appended as the
+    usual nested dicts can be read back through a dict-like MetricsRow, so existing code indexing
+    `metrics[-1]["rsi"]["long"]` keeps working. Slicing returns a table view sharing the columns.
+    Fields that are not part of the schema are kept in object columns created on first use.
+    """
+
+    def __init__(self, schema=METRIC_SCHEMA, initial_size: int = 1024):
+        self._size = max(1, initial_size)
+        self._len = 0
+        self._is_view = False
+        self._columns: Dict[str, np.ndarray] = {}
+        self._kinds: Dict[str, str] = {}
+        self._groups: Dict[str, Optional[List[str]]] = {}  # top-level key -> sub keys (None for scalars)
+        for name, kind, width in schema:
+            self._add_column(name, kind, width)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __getitem__(self, index):
+        """MetricsRow for an integer index, or a table view for a slice."""
+        if isinstance(index, slice):
+            return self._slice(index)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("MetricsTable index out of range")
+        return MetricsRow(self, index)
+
+    def __iter__(self) -> Iterator["MetricsRow"]:
+        for i in range(self._len):
+            yield MetricsRow(self, i)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], kinds: Dict[str, str]) -> "MetricsTable":
+        """Read-only table view over existing column arrays (e.g., attached shared memory), without copying."""
+        view = cls.__new__(cls)
+        view._columns = {}
+        view._kinds = {}
+        view._groups = {}
+        for name, column in columns.items():
+            view._columns[name] = column
+            view._kinds[name] = kinds[name]
+            view._add_group(name)
+        view._len = len(next(iter(columns.values()))) if columns else 0
+        view._size = view._len
+        view._is_view = True
+        return view
+
+    @property
+    def fields(self) -> List[str]:
+        """Dotted names of all columns (e.g., 'rsi.long')."""
+        return list(self._columns)
+
+    @property
+    def kinds(self) -> Dict[str, str]:
+        """Column kind per field ('float', 'int', 'signals' or 'object')."""
+        return dict(self._kinds)
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of one column over all rows, oldest first (None stored as NaN for floats)."""
+        return self._columns[name][:self._len]
+
+    def last(self, name: str, n: int) -> list:
+        """The last n values of a column as Python values, with None where the metric was missing."""
+        return [self._cell(name, i) for i in range(max(0, self._len - n), self._len)]
+
+    def append(self, metrics: Dict) -> None:
+        """Append one nested metric dict as a new row."""
+        if self._is_view:
+            raise TypeError("Cannot append to a MetricsTable view")
+        if self._len == self._size:
+            self._grow()
+
+        i = self._len
+        values = _flatten(metrics)
+        for name, value in values.items():
+            if name not in self._columns:
+                self._add_column(name, "object", 1)
+        for name, column in self._columns.items():
+            self._write(name, column, i, values.get(name))
+        self._len += 1
+
+    def row(self, index: int) -> Dict:
+        """Materialize one row as the original nested dict."""
+        return dict(self[index])
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """All rows as a flat DataFrame, one column per field (dots replaced by underscores)."""
+        data = {}
+        for name in self._columns:
+            if self._kinds[name] == "signals":
+                data[name.replace(".", "_")] = self.last(name, self._len)
+            else:
+                data[name.replace(".", "_")] = self.column(name)
+        return pd.DataFrame(data)
+
+    def state(self) -> Dict:
+        """Column kinds and the filled part of every column (e.g., for a checkpoint)."""
+        return {"kinds": dict(self._kinds), "columns": {name: self.column(name) for name in self._columns}}
+
+    def load_state(self, state: Dict) -> None:
+        """Restore a state() into this empty table; columns outside its schema are added as in append."""
+        if self._is_view or self._len:
+            raise ValueError("MetricsTable state can only be loaded into an empty table")
+        columns = state["columns"]
+        count = len(next(iter(columns.values()))) if columns else 0
+        while self._size < count:
+            self._grow()
+        for name, kind in state["kinds"].items():
+            column = columns[name]
+            if name not in self._columns:
+                self._add_column(name, kind, column.shape[1] if column.ndim > 1 else 1)
+            if self._kinds[name] != kind or self._columns[name].shape[1:] != column.shape[1:] or len(column) != count:
+                raise ValueError(f"Column {name} does not match the table schema")
+            self._columns[name][:count] = column
+        self._len = count
+
+    # Internals
+
+    def _add_column(self, name: str, kind: str, width: int) -> None:
+        if kind == "float":
+            column = np.full(self._size, np.nan)
+        elif kind == "int":
+            column = np.zeros(self._size, dtype=np.int64)
+        elif kind == "signals":
+            column = np.full((self._size, width), _SIGNAL_PAD, dtype=np.int8)
+        elif kind == "object":
+            column = np.full(self._size, None, dtype=object)
+        else:
+            raise ValueError(f"Unknown column kind: {kind}")
+        self._columns[name] = column
+        self._kinds[name] = kind
+        self._add_group(name)
+
+    def _add_group(self, name: str) -> None:
+        group, _, sub = name.partition(".")
+        if sub:
+            self._groups.setdefault(group, []).append(sub)
+        else:
+            self._groups[group] = None
+
+    def _write(self, name: str, column: np.ndarray, i: int, value) -> None:
+        kind = self._kinds[name]
+        if kind == "float":
+            column[i] = np.nan if value is None else value
+        elif kind == "signals":
+            encoded = [_SIGNAL_NONE if v is None else v for v in (value or [])][-column.shape[1]:]
+            column[i, :] = _SIGNAL_PAD
+            if encoded:
+                column[i, column.shape[1] - len(encoded):] = encoded
+        elif kind == "int":
+            column[i] = 0 if value is None else value
+        else:
+            column[i] = value
+
+    def _cell(self, name: str, i: int):
+        kind = self._kinds[name]
+        value = self._columns[name][i]
+        # Cells are returned as Python scalars, so rows stay JSON serializable like the original dicts
+        if kind == "float":
+            return None if np.isnan(value) else value.item()
+        if kind == "int":
+            return int(value)
+        if kind == "signals":
+            return [None if v == _SIGNAL_NONE else int(v) for v in value if v != _SIGNAL_PAD]
+        return value
+
+    def _value(self, i: int, key: str):
+        subs = self._groups[key]
+        if subs is None:
+            return self._cell(key, i)
+        if key in ZONE_GROUPS and np.isnan(self._columns[f"{key}.level"][i]):
+            return {}
+        return {sub: self._cell(f"{key}.{sub}", i) for sub in subs}
+
+    def _grow(self) -> None:
+        size = 2 * self._size
+        for name, column in self._columns.items():
+            grown = np.empty((size,) + column.shape[1:], dtype=column.dtype)
+            grown[:self._size] = column
+            grown[self._size:] = _empty_value(self._kinds[name])
+            self._columns[name] = grown
+        self._size = size
+
+    def _slice(self, index: slice) -> "MetricsTable":
+        view = MetricsTable.__new__(MetricsTable)
+        view._columns = {name: self.column(name)[index] for name in self._columns}
+        view._kinds = self._kinds
+        view._groups = self._groups
+        view._len = len(range(*index.indices(self._len)))
+        view._size = view._len
+        view._is_view = True
+        return view
+
+
+class MetricsRow(Mapping):
+    """Read-only, dict-like view of one MetricsTable row in the original nested layout."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: MetricsTable, index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key):
+        if key not in self.table._groups:
+            raise KeyError(key)
+        return self.table._value(self.index, key)
+
+    def __iter__(self):
+        return iter(self.table._groups)
+
+    def __len__(self) -> int:
+        return len(self.table._groups)
+
+    def __repr__(self) -> str:
+        return f"MetricsRow({dict(self)!r})"
+
+
+def _flatten(metrics: Dict, prefix: str = "") -> Dict:
+    """Nested metric dict -> {dotted name: value}. Empty zone dicts/lists leave their fields missing."""
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict) or (key in ZONE_GROUPS and not value):
+            flat.update(_flatten(value or {}, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _empty_value(kind: str):
+    if kind == "float":
+        return np.nan
+    if kind == "signals":
+        return _SIGNAL_PAD
+    if kind == "object":
+        return None
+    return 0
@@ -1,60 +1,83 @@
-
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.price_store import PriceStore
+
 class PriceAnalytics:
-    def __init__(self, initial_price_data=[], max_window=288):
+    def __init__(self, price_data=None, max_window=288):
+        """
+        Args:
+            price_data: PriceStore to read from (shared with the MetricCollector). If omitted, an own
+                        ring buffer of max_window points is created and filled through append().
+            max_window: Capacity of the own ring buffer.
+        """
         self.max_window = max_window
-        # Start with last max_window entries if initial data exceeds it
-        self.price_data = initial_price_data[-max_window:] if initial_price_data and len(initial_price_data) > max_window else initial_price_data or []
+        self.price_data = price_data if price_data is not None else PriceStore(capacity=max_window)
 
     def append(self, price_point):
-        """Append a new price point, cap at max_window."""
+        """Append a new price point to the store (only needed when the store is not shared)."""
         self.price_data.append(price_point)
-        if len(self.price_data) > self.max_window:
-            self.price_data.pop(0)
 
     def calculate_price_momentum(self, span_in_minutes, interval_in_minutes):
         """Calculates relative momentum (price change percentage) for a given span in minutes."""
         num_candles = span_in_minutes // interval_in_minutes
-        i = len(self.price_data) - 1
-        if i < num_candles or i >= len(self.price_data):
+        prices = self.price_data.prices
+        i = len(prices) - 1
+        if i < num_candles:
             return 0.0
-        current_price = self.price_data[-1]["value"]
-        past_price = self.price_data[i - num_candles]["value"]
-        return ((current_price - past_price) / past_price) * 100 if past_price != 0 else 0.0
+        current_price = prices[-1]
+        past_price = prices[i - num_candles]
+        return float((current_price - past_price) / past_price * 100) if past_price != 0 else 0.0
+
+    def _window(self, i, window):
+        """Zero-copy view of up to `window` prices ending at index i (capped at the latest price)."""
+        prices = self.price_data.prices
+        effective_i = min(i, len(prices) - 1) if i >= 0 else 0
+        start_idx = max(0, effective_i - window + 1)
+        return prices[start_idx:effective_i + 1]
 
     def calculate_volatility(self, i, window):
         """Calculate standard deviation (volatility) over a window, using latest data."""
         if len(self.price_data) < 2:
-     
             return 0.0
-        # Cap i at the last index
-        effective_i = min(i, len(self.price_data) - 1) if i >= 0 else 0
-        start_idx = max(0, effective_i - window + 1)
-        window_data = [entry["value"] for entry in self.price_data[start_idx:effective_i + 1]]
-       
+        window_data = self._window(i, window)
         if len(window_data) < 2:
-   
             return 0.0
-        result = np.std(window_data, ddof=1)
-
-        return result
+        return np.std(window_data, ddof=1)
 
     def calculate_pseudo_atr(self, i, window):
         """Calculate average true range approximation, using latest data."""
-
         if len(self.price_data) < 2:
-     
             return 0.0
-        # Cap i at the last index
-        effective_i = min(i, len(self.price_data) - 1) if i >= 0 else 0
-        start_idx = max(0, effective_i - window + 1)
-        window_data = [entry["value"] for entry in self.price_data[start_idx:effective_i + 1]]
-       
+        window_data = self._window(i, window)
         if len(window_data) < 2:
-
             return 0.0
-        diff_data = np.abs(np.diff(window_data))
-    
-        result = np.mean(diff_data)
-   
-        return result
\ No newline at end of file
+        return np.mean(np.abs(np.diff(window_data)))
+
+    # Whole-history variants used by the batch warmup. Each returns one value per point of `prices`,
+    # equal to what the method above returns right after that point was appended.
+
+    def calculate_price_momentum_history(self, prices, span_in_minutes, interval_in_minutes):
+        num_candles = span_in_minutes // interval_in_minutes
+        momentum = np.zeros(len(prices))
+        if len(prices) > num_candles:
+            current = prices[num_candles:]
+            past = prices[:len(prices) - num_candles]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                momentum[num_candles:] = np.where(past != 0, (current - past) / past * 100, 0.0)
+        return momentum
+
+    def calculate_volatility_history(self, prices, window):
+        return _trailing_window_history(prices, window, lambda w: np.std(w, ddof=1, axis=-1))
+
+    def calculate_pseudo_atr_history(self, prices, window):
+        return _trailing_window_history(prices, window, lambda w: np.mean(np.abs(np.diff(w, axis=-1)), axis=-1))
+
+
+def _trailing_window_history(prices, window, reducer):
+    """Apply reducer (over the last axis) to the up-to-`window` prices ending at every point, 0.0 below two prices."""
+    result = np.zeros(len(prices))
+    for i in range(1, min(window - 1, len(prices))):
+        result[i] = reducer(prices[:i + 1])
+    if len(prices) >= window and window >= 2:
+        result[window - 1:] = reducer(sliding_window_view(prices, window))
+    return result
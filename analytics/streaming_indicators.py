@@ -0,0 +1,450 @@
+import math
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamingEMA:
+    """Exponential moving average advanced one close at a time (same recursion as pandas ewm(adjust=False))."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.ema = None
+
+    def update(self, value: float) -> Optional[float]:
+        if self.ema is None:
+            self.ema = value
+        else:
+            self.ema = (value - self.ema) * self.alpha + self.ema
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        """The EMA once `period` closes have been seen, otherwise None."""
+        return self.ema if self.count >= self.period else None
+
+    def prime(self, values) -> Dict[str, np.ndarray]:
+        """
+        Compute the EMA over a whole array of closes in one vectorized pass and continue from its end.
+
+        Args:
+            values: Closes in chronological order, fed to a fresh state.
+
+        Returns:
+            Dict with 'value': EMA per close, NaN until `period` closes are available.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return {"value": values.copy()}
+        ema = pd.Series(values).ewm(span=self.period, adjust=False).mean().to_numpy(copy=True)
+        self.ema = float(ema[-1])
+        self.count = len(values)
+        ema[:self.period - 1] = np.nan
+        return {"value": ema}
+
+
+class StreamingRSI:
+    """
+    Wilder RSI with running average gain/loss.
+
+    The first value is produced after `period` closes and is seeded with the mean gain/loss over that
+    window (the first close contributes a zero delta), matching the original windowed calculation.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self.prev_close = None
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.avg_gain = None
+        self.avg_loss = None
+
+    def update(self, value: float) -> Optional[float]:
+        gain = loss = 0.0
+        if self.prev_close is not None:
+            delta = value - self.prev_close
+            if delta > 0:
+                gain = delta
+            elif delta < 0:
+                loss = -delta
+        self.prev_close = value
+        self.count += 1
+
+        if self.avg_gain is None:
+            self.gain_sum += gain
+            self.loss_sum += loss
+            if self.count == self.period:
+                self.avg_gain = self.gain_sum / self.period
+                self.avg_loss = self.loss_sum / self.period
+        else:
+            self.avg_gain = ((self.avg_gain * (self.period - 1)) + gain) / self.period
+            self.avg_loss = ((self.avg_loss * (self.period - 1)) + loss) / self.period
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.avg_gain is None:
+            return None
+        rs = 0 if self.avg_loss == 0 else self.avg_gain / self.avg_loss  # Prevent division by zero
+        return 100 - (100 / (1 + rs))
+
+    def prime(self, values) -> Dict[str, np.ndarray]:
+        """
+        Compute the RSI over a whole array of closes in one vectorized pass and continue from its end.
+
+        Wilder smoothing is an EMA with alpha = 1 / period started from the seed average, so both
+        averages are computed with pandas ewm.
+
+        Args:
+            values: Closes in chronological order, fed to a fresh state.
+
+        Returns:
+            Dict with 'value': RSI per close, NaN until `period` closes are available.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        rsi = np.full(len(values), np.nan)
+        if len(values) == 0:
+            return {"value": rsi}
+
+        deltas = np.diff(values, prepend=values[0])
+        gains = np.where(deltas > 0, deltas, 0.0)
+        losses = np.where(deltas < 0, -deltas, 0.0)
+        self.prev_close = float(values[-1])
+        self.count = len(values)
+
+        if len(values) < self.period:
+            self.gain_sum = float(gains.sum())
+            self.loss_sum = float(losses.sum())
+            return {"value": rsi}
+
+        self.gain_sum = float(gains[:self.period].sum())
+        self.loss_sum = float(losses[:self.period].sum())
+        smoothing = dict(alpha=1 / self.period, adjust=False)
+        avg_gain = pd.Series(np.r_[self.gain_sum / self.period, gains[self.period:]]).ewm(**smoothing).mean().to_numpy()
+        avg_loss = pd.Series(np.r_[self.loss_sum / self.period, losses[self.period:]]).ewm(**smoothing).mean().to_numpy()
+        self.avg_gain = float(avg_gain[-1])
+        self.avg_loss = float(avg_loss[-1])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = np.where(avg_loss == 0, 0.0, avg_gain / avg_loss)
+        rsi[self.period - 1:] = 100 - (100 / (1 + rs))
+        return {"value": rsi}
+
+
+class RollingWindow:
+    """
+    Fixed-length window with running sum and sum of squares for SMA and Bollinger Bands.
+
+    Values are accumulated relative to a shift (the oldest value of the window) so the sum of squares
+    keeps its precision for very small token prices. The sums are rebuilt from the window once per
+    `period` updates to stop floating point drift, which keeps the update amortised O(1).
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = deque(maxlen=period)
+        self.shift = 0.0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.updates_since_rebuild = 0
+
+    def update(self, value: float) -> Optional[float]:
+        if len(self.values) == self.period:
+            old = self.values[0] - self.shift
+            self.sum -= old
+            self.sum_sq -= old * old
+        elif not self.values:
+            self.shift = value
+        self.values.append(value)
+        x = value - self.shift
+        self.sum += x
+        self.sum_sq += x * x
+
+        self.updates_since_rebuild += 1
+        if self.updates_since_rebuild >= self.period:
+            self._rebuild()
+        return self.mean
+
+    def _rebuild(self) -> None:
+        self.shift = self.values[0]
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        for v in self.values:
+            x = v - self.shift
+            self.sum += x
+            self.sum_sq += x * x
+        self.updates_since_rebuild = 0
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.values) == self.period
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self.is_full:
+            return None
+        return self.shift + self.sum / self.period
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation (ddof=1) of the window, or None until the window is full."""
+        if not self.is_full or self.period < 2:
+            return None
+        variance = (self.sum_sq - self.sum * self.sum / self.period) / (self.period - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.mean
+
+    def prime(self, values) -> Dict[str, np.ndarray]:
+        """
+        Compute rolling mean and sample std over a whole array in one vectorized pass and keep the last
+        window as running state.
+
+        Args:
+            values: Closes in chronological order, fed to a fresh state.
+
+        Returns:
+            Dict with 'mean' and 'std' per close, NaN until the window is full.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        mean = np.full(len(values), np.nan)
+        std = np.full(len(values), np.nan)
+        if len(values) >= self.period:
+            windows = sliding_window_view(values, self.period)
+            mean[self.period - 1:] = windows.mean(axis=1)
+            if self.period >= 2:
+                std[self.period - 1:] = windows.std(axis=1, ddof=1)
+
+        self.values = deque(values[-self.period:].tolist(), maxlen=self.period)
+        if self.values:
+            self._rebuild()
+        return {"mean": mean, "std": std}
+
+
+class StreamingMACD:
+    """
+    MACD with persistent fast, slow and signal EMA states, advanced once per close.
+
+    All three EMAs run from the first close (the signal EMA over the MACD line), exactly like the
+    pandas ewm(adjust=False) chain over the full close history. The MACD line is reported once
+    `long_period` closes were seen and the signal once it has averaged `signal_period` MACD values.
+    """
+
+    def __init__(self, periods: Tuple[int, int, int] = (12, 26, 9)):
+        self.short_period, self.long_period, self.signal_period = periods
+        self.period = periods
+        self.fast = StreamingEMA(self.short_period)
+        self.slow = StreamingEMA(self.long_period)
+        self.signal_ema = StreamingEMA(self.signal_period)
+        self.count = 0
+
+    def update(self, value: float) -> Optional[float]:
+        self.fast.update(value)
+        self.slow.update(value)
+        self.signal_ema.update(self.fast.ema - self.slow.ema)
+        self.count += 1
+        return self.macd
+
+    @property
+    def macd(self) -> Optional[float]:
+        if self.count < self.long_period:
+            return None
+        return self.fast.ema - self.slow.ema
+
+    @property
+    def signal(self) -> Optional[float]:
+        if self.count < self.long_period + self.signal_period - 1:
+            return None
+        return self.signal_ema.ema
+
+    @property
+    def histogram(self) -> Optional[float]:
+        signal = self.signal
+        return None if signal is None else self.macd - signal
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.macd
+
+    def prime(self, values) -> Dict[str, np.ndarray]:
+        """
+        Compute MACD, signal and histogram over a whole array of closes in one vectorized pass and
+        continue from its end.
+
+        Args:
+            values: Closes in chronological order, fed to a fresh state.
+
+        Returns:
+            Dict with 'macd', 'signal' and 'histogram' per close, NaN until available.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            empty = values.copy()
+            return {"macd": empty, "signal": empty.copy(), "histogram": empty.copy()}
+
+        closes = pd.Series(values)
+        fast = closes.ewm(span=self.short_period, adjust=False).mean()
+        slow = closes.ewm(span=self.long_period, adjust=False).mean()
+        line = fast - slow
+        signal = line.ewm(span=self.signal_period, adjust=False).mean()
+
+        self.count = len(values)
+        for stream, series in ((self.fast, fast), (self.slow, slow), (self.signal_ema, signal)):
+            stream.ema = float(series.iloc[-1])
+            stream.count = len(values)
+
+        macd = line.to_numpy(copy=True)
+        macd[:self.long_period - 1] = np.nan
+        signal = signal.to_numpy(copy=True)
+        signal[:self.long_period + self.signal_period - 2] = np.nan
+        return {"macd": macd, "signal": signal, "histogram": macd - signal}
+
+
+class CrossoverDetector:
+    """
+    Crossovers of a short and a long moving average over a bounded history of stored values.
+
+    Every stored pair is compared with the previous pair where both averages were known when it
+    arrives, so each crossover event is computed once. The last `length` pairs are kept in a
+    fixed-size buffer to report the recent events in the list layout of calculate_ma_crossovers.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.history = deque(maxlen=length)  # (short, long, event) per stored pair, None if a value was missing
+        self.last_valid = None  # Newest (short, long) with both values known
+        self.count = 0
+
+    def update(self, short: Optional[float], long: Optional[float]) -> Optional[int]:
+        """
+        Store a new pair of MA values.
+
+        Returns:
+            1 (bullish crossover), 0 (bearish crossover) or None against the previous complete pair.
+        """
+        self.count += 1
+        if short is None or long is None:
+            self.history.append(None)
+            return None
+        event = _crossover(self.last_valid, (short, long)) if self.last_valid is not None else None
+        self.history.append((short, long, event))
+        self.last_valid = (short, long)
+        return event
+
+    def signals(self, current_short: Optional[float], current_long: Optional[float]) -> List[Optional[int]]:
+        """
+        Crossovers of the buffered pairs followed by the current values, as calculate_ma_crossovers returns
+        them for the buffered values: one entry per buffered pair plus one for the current values, with the
+        events of the complete pairs right-aligned.
+        """
+        n = len(self.history) + 1
+        crossovers = [None] * n
+        valid = [entry for entry in self.history if entry is not None]
+        # The first complete pair of the buffer has no predecessor inside it
+        for j in range(1, len(valid)):
+            crossovers[n - len(valid) - 1 + j] = valid[j][2]
+        if valid and current_short is not None and current_long is not None:
+            crossovers[n - 1] = _crossover(valid[-1], (current_short, current_long))
+        return crossovers
+
+
+def _crossover(previous: Tuple[float, float], current: Tuple[float, float]) -> Optional[int]:
+    prev_short, prev_long = previous[0], previous[1]
+    curr_short, curr_long = current
+    if prev_short <= prev_long and curr_short > curr_long:
+        return 1  # Bullish crossover
+    if prev_short >= prev_long and curr_short < curr_long:
+        return 0  # Bearish crossover
+    return None
+
+
+STREAM_TYPES = {
+    "ema": StreamingEMA,
+    "rsi": StreamingRSI,
+    "window": RollingWindow,
+    "macd": StreamingMACD,
+}
+
+
+class IndicatorEngine:
+    """
+    Registry of running indicator states keyed by (indicator, interval, period).
+
+    Every new close of an interval advances all states registered for that interval in constant time,
+    so reading an indicator never touches the price history again. States are created lazily on first
+    request and primed once, vectorized, from the interval's close history.
+    """
+
+    def __init__(self):
+        self.streams: Dict[Tuple[str, str, object], object] = {}
+        self.streams_by_interval: Dict[str, List[object]] = defaultdict(list)
+
+    def get(self, indicator: str, interval: str, period, history: Iterable[float] = ()):
+        """
+        Return the running state for (indicator, interval, period), creating it if needed.
+
+        Args:
+            indicator: One of the keys in STREAM_TYPES ('ema', 'rsi', 'window', 'macd').
+            interval: The interval whose closes drive the state (e.g., '5m', '1h').
+            period: Indicator period in closes of that interval, for 'macd' the tuple
+                    (short_period, long_period, signal_period).
+            history: Closes seen so far for the interval, used to prime a newly created state.
+
+        Returns:
+            The stream object for the key.
+        """
+        key = (indicator, interval, period)
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = STREAM_TYPES[indicator](period)
+            if len(history):
+                stream.prime(history)
+            self.streams[key] = stream
+            self.streams_by_interval[interval].append(stream)
+        return stream
+
+    def prime(self, indicator: str, interval: str, period, history: Iterable[float]) -> Dict[str, np.ndarray]:
+        """
+        Seed the state for (indicator, interval, period) from a whole close history, replacing any
+        existing state for the key.
+
+        Args:
+            indicator, interval, period: As in get.
+            history: All closes of the interval so far, oldest first.
+
+        Returns:
+            The per-close series of the state's prime() (e.g. {'value': ...}).
+        """
+        key = (indicator, interval, period)
+        stream = STREAM_TYPES[indicator](period)
+        series = stream.prime(history)
+        previous = self.streams.get(key)
+        streams = self.streams_by_interval[interval]
+        if previous is None:
+            streams.append(stream)
+        else:
+            streams[streams.index(previous)] = stream
+        self.streams[key] = stream
+        return series
+
+    def retain(self, keys: Iterable[Tuple[str, str, object]]) -> None:
+        """Drop every state not in `keys`; dropped states are primed again from the history on their next get."""
+        keys = set(keys)
+        self.streams = {key: stream for key, stream in self.streams.items() if key in keys}
+        self.streams_by_interval = defaultdict(list)
+        for (indicator, interval, period), stream in self.streams.items():
+            self.streams_by_interval[interval].append(stream)
+
+    def update(self, interval: str, close: float) -> None:
+        """Advance every state registered for `interval` with a newly closed value."""
+        for stream in self.streams_by_interval.get(interval, ()):
+            stream.update(close)
@@ -0,0 +1,175 @@
+import math
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class SwingTracker:
+    """
+    Local maxima of a streamed series, confirmed as they form.
+
+    A swing is confirmed by the first value below its top, using the same rules as scipy's find_peaks:
+    the top must be preceded by a strictly lower value, and a flat top is reported at its middle
+    index. Swings are kept as (left edge, index, value) so a trailing window can drop the ones whose
+    rising edge left it. For lows, track the negated series.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.last = None
+        self.rise_start = None  # Left edge of a possible top that has not been confirmed yet
+        self.swings = deque()  # (left_edge, index, value), oldest first
+        self.version = 0  # Bumped whenever the confirmed swings change
+
+    def update(self, value: float) -> None:
+        index = self.count
+        if self.last is not None:
+            if value > self.last:
+                self.rise_start = index
+            elif value < self.last:
+                if self.rise_start is not None:
+                    self.swings.append((self.rise_start, (self.rise_start + index - 1) // 2, self.last))
+                    self.version += 1
+                self.rise_start = None
+            elif value != self.last:  # NaN on either side ends the possible top
+                self.rise_start = None
+        self.last = value
+        self.count += 1
+
+    def pending(self, value: float) -> Optional[Tuple[int, int, float]]:
+        """The swing `value` would confirm if it were the next point, without consuming it."""
+        if self.rise_start is None or not value < self.last:
+            return None
+        return self.rise_start, (self.rise_start + self.count - 1) // 2, self.last
+
+    def prune(self, start: int) -> None:
+        """Drop swings that are no local maxima within a window starting at index `start`."""
+        while self.swings and self.swings[0][0] - 1 < start:
+            self.swings.popleft()
+            self.version += 1
+
+
+class SlidingExtremes:
+    """Running max and min over a trailing window with monotonic deques (amortised O(1) per point)."""
+
+    def __init__(self):
+        self.count = 0
+        self.maxima = deque()  # (index, value) with decreasing values
+        self.minima = deque()  # (index, value) with increasing values
+
+    def update(self, value: float) -> None:
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        self.maxima.append((self.count, value))
+        while self.minima and self.minima[-1][1] >= value:
+            self.minima.pop()
+        self.minima.append((self.count, value))
+        self.count += 1
+
+    def prune(self, start: int) -> None:
+        while self.maxima and self.maxima[0][0] < start:
+            self.maxima.popleft()
+        while self.minima and self.minima[0][0] < start:
+            self.minima.popleft()
+
+    def range_with(self, value: float) -> float:
+        """max - min of the window extended by `value`."""
+        high = max(self.maxima[0][1], value) if self.maxima else value
+        low = min(self.minima[0][1], value) if self.minima else value
+        return high - low
+
+
+class SwingWindow:
+    """
+    Swing highs and lows plus the value range of a series over a trailing window of `lookback` points,
+    followed by one provisional latest point that is not part of the history yet.
+
+    Equivalent to running find_peaks(x, distance) and find_peaks(-x, distance) on the last `lookback`
+    values with the latest value appended, but each point is processed once on arrival and the
+    distance filter only looks at the confirmed swings of the window.
+    """
+
+    def __init__(self, lookback: int):
+        self.lookback = lookback
+        self.highs = SwingTracker()
+        self.lows = SwingTracker()
+        self.extremes = SlidingExtremes()
+        self.count = 0
+        self.last_nan = -1  # Index of the newest NaN value
+        self._selected = {}  # (side, distance) -> (key, peak indices)
+
+    def update(self, value: float) -> None:
+        """Append one value of the history."""
+        if math.isnan(value):
+            # NaN breaks every comparison like in find_peaks; the window is unusable until it has left
+            self.last_nan = self.count
+        self.highs.update(value)
+        self.lows.update(-value)
+        self.extremes.update(value)
+        self.count += 1
+        start = self.window_start
+        self.highs.prune(start)
+        self.lows.prune(start)
+        self.extremes.prune(start)
+
+    @property
+    def window_start(self) -> int:
+        return max(0, self.count - self.lookback)
+
+    @property
+    def has_nan(self) -> bool:
+        return self.last_nan >= self.window_start
+
+    def value_range(self, latest: float) -> float:
+        return self.extremes.range_with(latest)
+
+    def swing_highs(self, latest: float, distance: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and values of the swing highs of the window plus `latest`, as find_peaks(x, distance)."""
+        return self._select("highs", self.highs, latest, distance)
+
+    def swing_lows(self, latest: float, distance: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and values of the swing lows of the window plus `latest`, as find_peaks(-x, distance)."""
+        indices, values = self._select("lows", self.lows, -latest, distance)
+        return indices, -values
+
+    def _select(self, side: str, tracker: SwingTracker, latest: float, distance: int):
+        pending = tracker.pending(latest)
+        if pending is not None and pending[0] - 1 < self.window_start:
+            pending = None
+
+        key = (tracker.version, pending)
+        cached = self._selected.get((side, distance))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        swings = list(tracker.swings)
+        if pending is not None:
+            swings.append(pending)
+        positions = [swing[1] for swing in swings]
+        values = [swing[2] for swing in swings]
+        kept = [i for i, keep in enumerate(select_by_distance(positions, values, distance)) if keep]
+        selected = (np.array([positions[i] for i in kept], dtype=np.intp),
+                    np.array([values[i] for i in kept], dtype=np.float64))
+        self._selected[(side, distance)] = (key, selected)
+        return selected
+
+
+def select_by_distance(positions: List[int], values: List[float], distance: int) -> List[bool]:
+    """Keep mask of find_peaks' distance filter: higher swings remove lower ones closer than `distance`."""
+    count = len(positions)
+    keep = [True] * count
+    distance = math.ceil(distance)
+    # Same priority order as find_peaks (np.argsort), so ties between equal swings resolve identically
+    for j in np.argsort(np.array(values, dtype=np.float64))[::-1].tolist():
+        if not keep[j]:
+            continue
+        k = j - 1
+        while k >= 0 and positions[j] - positions[k] < distance:
+            keep[k] = False
+            k -= 1
+        k = j + 1
+        while k < count and positions[k] - positions[j] < distance:
+            keep[k] = False
+            k += 1
+    return keep
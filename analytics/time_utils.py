@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from utils.price_store import PriceStore
 
 def get_interval_in_minutes(interval):
     """Converts time interval (like 1m, 5m, 1H, 1D) to minutes."""
@@ -30,11 +31,16 @@ def get_time_features(unix_time):
     return {"minute_of_day": minute_of_day, "day_of_week": day_of_week}
 
 def calculate_token_age(price_data):
-    """Calculates token age in minutes from earliest to latest entry."""
+    """Calculates token age in minutes from earliest to latest entry (list of price dicts or PriceStore)."""
     if not price_data or len(price_data) < 1:
         return 0.0
-    earliest_time = price_data[0]["unixTime"]
-    current_time = price_data[-1]["unixTime"]
+    if isinstance(price_data, PriceStore):
+        # The first timestamp survives even when the ring buffer dropped the oldest points
+        earliest_time = price_data.first_timestamp
+        current_time = price_data.last_timestamp
+    else:
+        earliest_time = price_data[0]["unixTime"]
+        current_time = price_data[-1]["unixTime"]
     age_seconds = current_time - earliest_time
     return max(0.0, age_seconds / 60.0)
 
@@ -1,5 +1,6 @@
 import numpy as np
-from scipy.signal import find_peaks
+from scipy.signal import find_peaks, peak_prominences
+from analytics.swing_points import select_by_distance
 from dataclasses import dataclass
 from typing import Dict, Tuple, List
 
@@ -13,6 +14,34 @@ class ZoneConfig:
     k_pivot: float
     interval_in_minutes: int  # Added interval for specific OHLCV data
 
+# Tuning factors for each zone type
+ZONE_CONFIGS: Dict[str, ZoneConfig] = {
+    "short_term": ZoneConfig(
+        k_strong_distance=0.2,
+        k_prominence=0.05,
+        k_peak_distance=0.1,
+        k_width=0.1,
+        k_pivot=0.01,
+        interval_in_minutes=5  # 5m
+    ),
+    "mid_term": ZoneConfig(
+        k_strong_distance=0.15,  # Adjusted to allow more strong peaks
+        k_prominence=0.02,      # Reduced to detect less prominent peaks
+        k_peak_distance=0.05,   # Reduced to allow closer general peaks
+        k_width=0.05,           # Increased to widen binning range
+        k_pivot=0.005,          # Reduced to lower the pivot rank threshold
+        interval_in_minutes=60  # 1h
+    ),
+    "long_term": ZoneConfig(
+        k_strong_distance=0.10,
+        k_prominence=0.05,
+        k_peak_distance=0.2,
+        k_width=0.05,
+        k_pivot=0.005,
+        interval_in_minutes=240  # 4h
+    )
+}
+
 class ZoneAnalyzer:
     def __init__(self, metric_collector):
         """
@@ -25,6 +54,27 @@ class ZoneAnalyzer:
         self.support_zones = []  # List of lists of zone dicts
         self.resistance_zones = []  # List of lists of zone dicts
 
+        # Last zones per zone type, keyed by (last candle timestamp, window) of the data they were built from
+        self.zone_cache: Dict[str, Tuple[Tuple, Tuple[Dict, Dict]]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        metric_collector.interval_data_aggregator.add_candle_listener(self.on_candle_close)
+
+    def on_candle_close(self, interval_in_minutes: int) -> None:
+        """Aggregator hook: drop cached zones built from candles of an interval that just closed a candle."""
+        for zone_type in list(self.zone_cache):
+            if ZONE_CONFIGS.get(zone_type, ZONE_CONFIGS["mid_term"]).interval_in_minutes == interval_in_minutes:
+                del self.zone_cache[zone_type]
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of get_dynamic_zones calls served from the zone cache."""
+        requests = self.cache_hits + self.cache_misses
+        return self.cache_hits / requests if requests else 0.0
+
+    def cache_stats(self) -> Dict[str, float]:
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "hit_rate": self.cache_hit_rate}
+
     def calculate_std_dev(self, window: int, interval_in_minutes: int) -> float:
         """
         Calculate the coefficient of variation of close prices over the window for a specific interval.
@@ -37,18 +87,16 @@ class ZoneAnalyzer:
             float: Coefficient of variation (std_dev / mean_price), or 0.3 if insufficient data.
         """
         # Fetch OHLCV data for the specified interval
-        data = self.metric_collector.interval_data_aggregator.get_interval_data(interval_in_minutes, window)
-        prices = [entry["close"] for entry in data]
-        if len(prices) < 2:
-            return 0.3
-        std_dev = np.std(prices, ddof=1)
-        mean_price = np.mean(prices)
-        return std_dev / mean_price if mean_price != 0 else 0.3
+        prices = self.metric_collector.interval_data_aggregator.get_interval_arrays(interval_in_minutes, window)["close"]
+        return _coefficient_of_variation(prices)
 
     def get_dynamic_zones(self, window: int, zone_type: str) -> Tuple[Dict, Dict]:
         """
         Calculate and return one dynamic support and one resistance zone based on zone type.
 
+        The result is cached per zone type and only recalculated when the candle window changes, i.e.
+        a new candle of the zone's interval arrived or a different window is requested.
+
         Args:
             window: Number of intervals to consider (e.g., 80 for 5-minute candles).
             zone_type: 'short_term', 'mid_term', or 'long_term' to determine tuning factors.
@@ -57,49 +105,35 @@ class ZoneAnalyzer:
             Tuple: (support_zone, resistance_zone), each a dict with 'level' and 'strength',
                 or empty dicts {} if no zones are found or insufficient data.
         """
-        # Define tuning factors for each zone type
-        zone_configs: Dict[str, ZoneConfig] = {
-            "short_term": ZoneConfig(
-                k_strong_distance=0.2,
-                k_prominence=0.05,
-                k_peak_distance=0.1,
-                k_width=0.1,
-                k_pivot=0.01,
-                interval_in_minutes=5  # 5m
-            ),
-            "mid_term": ZoneConfig(
-                k_strong_distance=0.15,  # Adjusted to allow more strong peaks
-                k_prominence=0.02,      # Reduced to detect less prominent peaks
-                k_peak_distance=0.05,   # Reduced to allow closer general peaks
-                k_width=0.05,           # Increased to widen binning range
-                k_pivot=0.005,          # Reduced to lower the pivot rank threshold
-                interval_in_minutes=60  # 1h
-            ),
-            "long_term": ZoneConfig(
-                k_strong_distance=0.10,
-                k_prominence=0.05,
-                k_peak_distance=0.2,
-                k_width=0.05,
-                k_pivot=0.005,
-                interval_in_minutes=240  # 4h
-            )
-        }
-
-        config = zone_configs.get(zone_type, zone_configs["mid_term"])
+        config = ZONE_CONFIGS.get(zone_type, ZONE_CONFIGS["mid_term"])
         interval_in_minutes = config.interval_in_minutes
 
         # Fetch OHLCV data for the specified interval
-        data = self.metric_collector.interval_data_aggregator.get_interval_data(interval_in_minutes, window)
-        if len(data) < 2:
+        data = self.metric_collector.interval_data_aggregator.get_interval_arrays(interval_in_minutes, window)
+        timestamps = data["timestamp"]
+        key = (int(timestamps[-1]) if len(timestamps) else None, len(timestamps), window)
+        cached = self.zone_cache.get(zone_type)
+        if cached is not None and cached[0] == key:
+            self.cache_hits += 1
+            return cached[1]
+
+        self.cache_misses += 1
+        zones = self._calculate_dynamic_zones(data, window, config)
+        self.zone_cache[zone_type] = (key, zones)
+        return zones
+
+    def _calculate_dynamic_zones(self, data: Dict[str, np.ndarray], window: int, config: ZoneConfig) -> Tuple[Dict, Dict]:
+        """Zones of get_dynamic_zones for the given window of OHLCV arrays, without caching."""
+        if len(data["close"]) < 2:
             return {}, {}
 
-        # Extract high, low, and close prices
-        highs = [entry["high"] for entry in data]
-        lows = [entry["low"] for entry in data]
-        close_prices = [entry["close"] for entry in data]
+        # High, low, and close prices as array views
+        highs = data["high"]
+        lows = data["low"]
+        close_prices = data["close"]
 
         # Ensure window is valid
-        window = min(window, len(data))
+        window = min(window, len(close_prices))
         windowed_highs = highs[-window:] if len(highs) >= window else highs
         windowed_lows = lows[-window:] if len(lows) >= window else lows
         windowed_close_prices = close_prices[-window:] if len(close_prices) >= window else close_prices
@@ -108,7 +142,7 @@ class ZoneAnalyzer:
 
         # Calculate dynamic parameters
         mean_price = np.mean(windowed_close_prices)
-        cv = self.calculate_std_dev(window, interval_in_minutes)
+        cv = _coefficient_of_variation(windowed_close_prices)
 
         strong_distance = max(1, int(config.k_strong_distance * window * cv))
         strong_prominence = max(0.01, config.k_prominence * mean_price * cv)
@@ -117,91 +151,142 @@ class ZoneAnalyzer:
         min_pivot_rank = max(2, int(config.k_pivot * window))
 
         # Calculate ATH and ATL within the window
-        ath = max(windowed_highs)
-        atl = min(windowed_lows)
+        ath = windowed_highs.max()
+        atl = windowed_lows.min()
+
+        zone_params = dict(
+            strong_distance=strong_distance,
+            strong_prominence=strong_prominence,
+            peak_distance=peak_distance,
+            peak_rank_width=peak_rank_width,
+            min_pivot_rank=min_pivot_rank,
+        )
 
         # Resistance Zones Calculation (using highs)
-        strong_peaks, _ = find_peaks(windowed_highs, distance=strong_distance, prominence=strong_prominence)
-        strong_peak_values = [{'level': windowed_highs[i], 'strength': 50.0} for i in strong_peaks]
-        if ath not in [p['level'] for p in strong_peak_values]:
-            strong_peak_values.append({'level': ath, 'strength': 100.0})
-
-        peaks, _ = find_peaks(windowed_highs, distance=peak_distance)
-        peak_to_rank = {peak: 0 for peak in peaks}
-        for i, curr_peak in enumerate(peaks):
-            curr_price = windowed_highs[curr_peak]
-            for prev_peak in peaks[:i]:
-                if abs(curr_price - windowed_highs[prev_peak]) <= peak_rank_width:
-                    peak_to_rank[curr_peak] += 1
-        general_resistances = [
-            {'level': windowed_highs[peak], 'strength': 10.0 * (rank + 1)}
-            for peak, rank in peak_to_rank.items() if rank >= min_pivot_rank
-        ]
+        resistance_zone = self._strongest_zone(windowed_highs, windowed_highs, ath, **zone_params)
 
-        resistances = strong_peak_values + general_resistances
-        resistances.sort(key=lambda x: x['level'])
+        # Support Zones Calculation (using lows, troughs are the peaks of the negated lows)
+        support_zone = self._strongest_zone(windowed_lows, -windowed_lows, atl, **zone_params)
 
-        resistance_bins = []
-        if resistances:
-            current_bin = [resistances[0]]
-            for r in resistances[1:]:
-                if r['level'] - current_bin[-1]['level'] < peak_rank_width:
-                    current_bin.append(r)
-                else:
-                    resistance_bins.append(current_bin)
-                    current_bin = [r]
-            resistance_bins.append(current_bin)
-        resistance_zones = [
-            {'level': np.mean([z['level'] for z in bin]), 'strength': sum(z['strength'] for z in bin)}
-            for bin in resistance_bins
-        ]
+        return support_zone, resistance_zone
+
+    def _strongest_zone(self, levels: np.ndarray, peak_source: np.ndarray, extreme: float,
+                        strong_distance: int, strong_prominence: float, peak_distance: int,
+                        peak_rank_width: float, min_pivot_rank: int) -> Dict:
+        """
+        Build the zones of one side (resistance or support) and return the strongest one.
 
-        # Select the resistance zone with the highest strength
-        resistance_zone = max(resistance_zones, key=lambda x: x['strength'], default={})
-
-        # Support Zones Calculation (using lows)
-        neg_lows = [-p for p in windowed_lows]
-        strong_troughs, _ = find_peaks(neg_lows, distance=strong_distance, prominence=strong_prominence)
-        strong_trough_values = [{'level': windowed_lows[i], 'strength': 50.0} for i in strong_troughs]
-        if atl not in [p['level'] for p in strong_trough_values]:
-            strong_trough_values.append({'level': atl, 'strength': 100.0})
-
-        troughs, _ = find_peaks(neg_lows, distance=peak_distance)
-        trough_to_rank = {trough: 0 for trough in troughs}
-        for i, curr_trough in enumerate(troughs):
-            curr_price = windowed_lows[curr_trough]
-            for prev_trough in troughs[:i]:
-                if abs(curr_price - windowed_lows[prev_trough]) <= peak_rank_width:
-                    trough_to_rank[curr_trough] += 1
-        general_supports = [
-            {'level': windowed_lows[trough], 'strength': 10.0 * (rank + 1)}
-            for trough, rank in trough_to_rank.items() if rank >= min_pivot_rank
+        Args:
+            levels: Prices of the side (highs for resistance, lows for support).
+            peak_source: Array whose peaks are the pivots of the side (highs, or negated lows).
+            extreme: ATH for resistance, ATL for support (always added as a strong level).
+            strong_distance, strong_prominence: find_peaks parameters for strong pivots.
+            peak_distance: find_peaks distance for general pivots.
+            peak_rank_width: Price distance within which pivots count as neighbours and get binned.
+            min_pivot_rank: Minimum number of earlier neighbouring pivots for a general pivot.
+
+        Returns:
+            Dict: {'level', 'strength'} of the strongest zone, or {} if there is none.
+        """
+        # The local maxima are found once and thinned to both pivot sets with find_peaks' selection rules
+        maxima, _ = find_peaks(peak_source)
+        positions, heights = maxima.tolist(), peak_source[maxima].tolist()
+
+        strong_pivots = maxima[np.array(select_by_distance(positions, heights, strong_distance), dtype=bool)]
+        if len(strong_pivots):
+            strong_pivots = strong_pivots[peak_prominences(peak_source, strong_pivots)[0] >= strong_prominence]
+        strong_values = [{'level': levels[i], 'strength': 50.0} for i in strong_pivots]
+        if extreme not in [p['level'] for p in strong_values]:
+            strong_values.append({'level': extreme, 'strength': 100.0})
+
+        pivots = maxima[np.array(select_by_distance(positions, heights, peak_distance), dtype=bool)]
+        ranks = _count_earlier_neighbours(levels[pivots], peak_rank_width)
+        general_values = [
+            {'level': levels[pivot], 'strength': 10.0 * (rank + 1)}
+            for pivot, rank in zip(pivots, ranks) if rank >= min_pivot_rank
         ]
 
-        supports = strong_trough_values + general_supports
-        supports.sort(key=lambda x: x['level'])
+        candidates = strong_values + general_values
+        candidates.sort(key=lambda x: x['level'])
 
-        support_bins = []
-        if supports:
-            current_bin = [supports[0]]
-            for s in supports[1:]:
-                if s['level'] - current_bin[-1]['level'] < peak_rank_width:
-                    current_bin.append(s)
+        bins = []
+        if candidates:
+            current_bin = [candidates[0]]
+            for c in candidates[1:]:
+                if c['level'] - current_bin[-1]['level'] < peak_rank_width:
+                    current_bin.append(c)
                 else:
-                    support_bins.append(current_bin)
-                    current_bin = [s]
-            support_bins.append(current_bin)
-        support_zones = [
+                    bins.append(current_bin)
+                    current_bin = [c]
+            bins.append(current_bin)
+        zones = [
             {'level': np.mean([z['level'] for z in bin]), 'strength': sum(z['strength'] for z in bin)}
-            for bin in support_bins
+            for bin in bins
         ]
 
-        # Select the support zone with the highest strength
-        support_zone = max(support_zones, key=lambda x: x['strength'], default={})
-
-        return support_zone, resistance_zone
+        # Select the zone with the highest strength
+        return max(zones, key=lambda x: x['strength'], default={})
 
     # def get_zones(self, strong_distance=60, strong_prominence=20, peak_distance=10,
     #               peak_rank_width=5, min_pivot_rank=3, window=100) -> Tuple[Dict, Dict]:
     #     """Original method retained for compatibility."""
-    #     return self.get_dynamic_zones(window, "mid_term")
\ No newline at end of file
+    #     return self.get_dynamic_zones(window, "mid_term")
+
+
+def _coefficient_of_variation(prices: np.ndarray) -> float:
+    """std_dev / mean_price of the prices, or 0.3 if there are fewer than two or the mean is 0."""
+    if len(prices) < 2:
+        return 0.3
+    std_dev = np.std(prices, ddof=1)
+    mean_price = np.mean(prices)
+    return std_dev / mean_price if mean_price != 0 else 0.3
+
+
+def _count_earlier_neighbours(levels: np.ndarray, width: float) -> List[int]:
+    """
+    For every level, count the earlier levels within `width` (abs(difference) <= width).
+
+    Runs in O(p log p): the neighbours of a level form one contiguous run of the sorted levels, whose
+    ends are found with searchsorted and then settled with the same abs(difference) <= width comparison
+    as a pairwise scan (level +- width can round across a bound). Levels are then visited in order and
+    inserted into a Fenwick tree over their sorted positions, which counts the earlier ones in the run.
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    n = len(levels)
+    if n < 2:
+        return [0] * n
+
+    order = np.argsort(levels, kind="stable")
+    sorted_levels = levels[order]
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n)
+
+    lo = np.searchsorted(sorted_levels, levels - width, side="left")
+    hi = np.searchsorted(sorted_levels, levels + width, side="right")
+    while True:
+        lo_down = (lo > 0) & (np.abs(levels - sorted_levels[np.maximum(lo - 1, 0)]) <= width)
+        lo_up = ~lo_down & (np.abs(levels - sorted_levels[lo]) > width)
+        hi_down = (hi > 0) & (np.abs(levels - sorted_levels[np.maximum(hi - 1, 0)]) > width)
+        hi_up = ~hi_down & (hi < n) & (np.abs(levels - sorted_levels[np.minimum(hi, n - 1)]) <= width)
+        if not (lo_down.any() or lo_up.any() or hi_down.any() or hi_up.any()):
+            break
+        lo += lo_up.astype(np.int64) - lo_down
+        hi += hi_up.astype(np.int64) - hi_down
+
+    tree = [0] * (n + 1)  # Fenwick tree of the inserted levels by sorted position
+    counts = []
+    for start, end, pos in zip(lo.tolist(), hi.tolist(), position.tolist()):
+        count = 0
+        while end > 0:
+            count += tree[end]
+            end -= end & -end
+        while start > 0:
+            count -= tree[start]
+            start -= start & -start
+        counts.append(count)
+
+        pos += 1
+        while pos <= n:
+            tree[pos] += 1
+            pos += pos & -pos
+    return counts
@@ -1,4 +1,3 @@
-import numpy as np
 from dataclasses import dataclass
 from typing import Dict, Optional
 
@@ -58,7 +57,8 @@ class ConfidenceCalculator:
         Initialize the ConfidenceCalculator with given parameters.
 
         Args:
-            metrics_collector: Object with attributes key_zone_1 to key_zone_6 as single dicts and metrics list.
+            metrics_collector: Object with attributes key_zone_1 to key_zone_6 as single dicts, metrics list
+                               and a SeriesRegistry `series`.
             alpha (float): Default rate of confidence adjustment (default: 0.05).
             threshold (float): Default proximity threshold (default: 0.2).
             decay_rate (float): Default decay rate (default: 0.02).
@@ -67,7 +67,7 @@ class ConfidenceCalculator:
         self.metrics_collector = metrics_collector
         self.zone_confidence = 0.0
         self.slope_window = slope_window
-        self.confidence_history = []
+        self.confidence_history = metrics_collector.series.register("zone_confidence", slope_window)
         self.settings = ZoneSettings(
             default_alpha=alpha,
             default_threshold=threshold,
@@ -131,8 +131,6 @@ class ConfidenceCalculator:
         self.zone_confidence = max(min(self.zone_confidence + net_influence, 1.0), 0.0)
 
         self.confidence_history.append(self.zone_confidence)
-        if len(self.confidence_history) > self.slope_window:
-            self.confidence_history = self.confidence_history[-self.slope_window:]
 
         return self.zone_confidence
 
@@ -142,8 +140,7 @@ class ConfidenceCalculator:
         if lookback < 2:
             return 0.0
 
-        y = np.array(self.confidence_history[-lookback:])
-        x = np.arange(lookback)
+        y = self.confidence_history.last(lookback)
         initial_confidence = y[0]
         final_confidence = y[-1]
         
@@ -1,6 +1,9 @@
 from chains.wallets.phantom import PhantomWallet
 from tasks.task_manager import TokenTaskManager
 import asyncio
+from utils.logger import configure_logging, get_logger
+
+logger = get_logger(__name__)
 
 TEST_TOKENS = [ 
                     #   "CniPCE4b3s8gSUPhUiyMjXnytrEqUrMfSsnbBjLCpump",
@@ -58,7 +61,7 @@ async def main():
     user_id = "user1"  # Single user for now
     wallet = PhantomWallet()
     sol_balance = await wallet.solanaUtils.fetch_sol_balance()
-    print(f"Initial SOL Balance: {sol_balance}")
+    logger.info("Initial SOL Balance: %s", sol_balance)
 
     task_manager = TokenTaskManager()
     initial_tokens = collect_and_filter_candidates(testing_mode)
@@ -81,4 +84,5 @@ async def main():
         await wallet.close()
 
 if __name__ == "__main__":
+    configure_logging()
     asyncio.run(main())
@@ -1,6 +1,9 @@
 import asyncio
 from collections import defaultdict
 from actions.token_init import initialize_token_environment
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class TokenTaskManager:
     def __init__(self):
@@ -10,18 +13,18 @@ class TokenTaskManager:
     async def add_token(self, user_id, testing_mode, token, wallet):
         """Start monitoring a token for a user."""
         if token in self.tasks[user_id]:
-            print(f"Token {token} already monitored for user {user_id}")
+            logger.info("Token %s already monitored for user %s", token, user_id)
             return
         
         # Create a task for this token
         task = asyncio.create_task(initialize_token_environment(testing_mode, token, wallet))
         self.tasks[user_id][token] = task
-        print(f"Started monitoring {token} for user {user_id}")
+        logger.info("Started monitoring %s for user %s", token, user_id)
 
     async def remove_token(self, user_id, token):
         """Stop monitoring a token for a user."""
         if token not in self.tasks[user_id]:
-            print(f"Token {token} not monitored for user {user_id}")
+            logger.info("Token %s not monitored for user %s", token, user_id)
             return
         
         task = self.tasks[user_id].pop(token)
@@ -29,7 +32,7 @@ class TokenTaskManager:
         try:
             await task  # Wait for cancellation
         except asyncio.CancelledError:
-            print(f"Stopped monitoring {token} for user {user_id}")
+            logger.info("Stopped monitoring %s for user %s", token, user_id)
 
     async def shutdown(self, user_id):
         """Stop all tasks for a user."""
@@ -37,4 +40,4 @@ class TokenTaskManager:
             task.cancel()
         await asyncio.gather(*self.tasks[user_id].values(), return_exceptions=True)
         self.tasks[user_id].clear()
-        print(f"Shutdown monitoring for user {user_id}")
\ No newline at end of file
+        logger.info("Shutdown monitoring for user %s", user_id)
\ No newline at end of file
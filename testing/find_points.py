@@ -1,6 +1,101 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Tuple
+
+from utils.logger import get_logger
+from utils.range_query import SparseTable, next_greater_index, next_smaller_index
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class MoveLabels:
+    """Significant move labels of every index (rows) for each threshold factor (columns)."""
+    increase_factors: Tuple[float, ...]
+    decrease_factors: Tuple[float, ...]
+    increases: np.ndarray  # bool, shape (n, len(increase_factors))
+    decreases: np.ndarray  # bool, shape (n, len(decrease_factors))
+
+    def increase_indices(self, factor):
+        return np.flatnonzero(self.increases[:, self.increase_factors.index(float(factor))]).tolist()
+
+    def decrease_indices(self, factor):
+        return np.flatnonzero(self.decreases[:, self.decrease_factors.index(float(factor))]).tolist()
+
+    def counts(self):
+        """Number of labelled indices per factor: ({increase factor: count}, {decrease factor: count})."""
+        return (dict(zip(self.increase_factors, self.increases.sum(axis=0).tolist())),
+                dict(zip(self.decrease_factors, self.decreases.sum(axis=0).tolist())))
+
+    def confidence_sums(self, values):
+        """
+        Sum of `values` (e.g., the zone_confidence column) over the labelled indices of every factor:
+        (array per increase factor, array per decrease factor).
+        """
+        values = np.asarray(values, dtype=np.float64)[:, None]
+        return (np.where(self.increases, values, 0.0).sum(axis=0),
+                np.where(self.decreases, values, 0.0).sum(axis=0))
+
+
 class PointFinder:
     def __init__(self, metrics):
-        self.metrics = metrics
+        self.metrics = metrics  # MetricsTable of the analyzed token
+        self._ranges = None  # (row count, range structures) of the price column, see _range_structures
+
+    def _prices(self):
+        """Price column as a plain list (fast scalar access in the scanning loops below)."""
+        return self.metrics.column("price").tolist()
+
+    def _range_structures(self):
+        """
+        Shared precomputation over the price column, built once per table length:
+        (prices, next smaller index, next greater index, range-max SparseTable, range-min SparseTable, highs, lows).
+
+        highs[i] is the highest price reached from i until the price first drops below prices[i], lows[i]
+        the lowest price until it first rises above prices[i]; NaN where i cannot start a move (no next
+        point before the break, or a price that is not positive). A move by any factor is then one
+        comparison against these arrays.
+        """
+        n = len(self.metrics)
+        if self._ranges is None or self._ranges[0] != n:
+            prices = self.metrics.column("price")
+            next_smaller = next_smaller_index(prices)
+            next_greater = next_greater_index(prices)
+            range_max = SparseTable(prices, "max")
+            range_min = SparseTable(prices, "min")
+            highs = self._move_extremes(prices, next_smaller, range_max, np.fmax)
+            lows = self._move_extremes(prices, next_greater, range_min, np.fmin)
+            self._ranges = (n, (prices, next_smaller, next_greater, range_max, range_min, highs, lows))
+        return self._ranges[1]
+
+    @staticmethod
+    def _move_extremes(prices, breaks, table, combine):
+        n = len(prices)
+        extremes = np.full(n, np.nan)
+        candidates = np.flatnonzero((prices > 0) & (breaks > np.arange(n) + 1))
+        if len(candidates):
+            extremes[candidates] = combine(prices[candidates], table.query_many(candidates + 1, breaks[candidates]))
+        return extremes
+
+    def label_matrix(self, increase_factors=(), decrease_factors=()):
+        """
+        Labels every index for several thresholds at once (see find_all_significant_price_increases /
+        find_all_significant_price_decreases), from one shared precomputation over the prices.
+
+        Args:
+            increase_factors (iterable): Price increase factors (e.g., [1.5, 2.0]).
+            decrease_factors (iterable): Price decrease factors (e.g., [0.5]).
+
+        Returns:
+            MoveLabels: Boolean (index x factor) matrices for increases and decreases.
+        """
+        prices, _, _, _, _, highs, lows = self._range_structures()
+        increase_factors = tuple(float(f) for f in increase_factors)
+        decrease_factors = tuple(float(f) for f in decrease_factors)
+        # NaN extremes compare False, so indices that cannot start a move are never labelled
+        increases = highs[:, None] >= prices[:, None] * np.array(increase_factors, dtype=np.float64)
+        decreases = lows[:, None] <= prices[:, None] * np.array(decrease_factors, dtype=np.float64)
+        return MoveLabels(increase_factors, decrease_factors, increases, decreases)
 
     def find_significant_price_increases(self, price_increase):
         """
@@ -15,43 +110,19 @@ class PointFinder:
             list: List of indices in self.metrics where the condition is met.
         """
         targets = []
-        n = len(self.metrics)
+        prices, next_smaller, _, range_max, _, _, _ = self._range_structures()
+        qualifies = self.label_matrix(increase_factors=(price_increase,)).increases[:, 0]
+        n = len(prices)
         i = 0
 
         while i < n:
-            initial_price = self.metrics[i]["price"]
-            if initial_price <= 0:  # Skip invalid prices
-                i += 1
-                continue
-
-            target_price = initial_price * price_increase
-            qualifies = False
-            max_price_seen = initial_price
-
-            # Check all subsequent points from i
-            for j in range(i + 1, n):
-                current_price = self.metrics[j]["price"]
-                max_price_seen = max(max_price_seen, current_price)
-
-                # If price drops below initial, this point doesn’t qualify
-                if current_price < initial_price:
-                    break
-
-                # If price reaches or exceeds target without dropping below initial
-                if max_price_seen >= target_price:
-                    qualifies = True
-                    break
-
-            if qualifies:
+            if qualifies[i]:
                 targets.append(i)
-                # Skip ahead to the next point after the increase to avoid overlapping sequences
-                next_i = i + 1
-                while next_i < n:
-                    next_price = self.metrics[next_i]["price"]
-                    if next_price < initial_price or next_price >= target_price:
-                        break
-                    next_i += 1
-                i = next_i
+                # Skip ahead to the next point after the increase to avoid overlapping sequences:
+                # the first later price below the initial price or at/above the target
+                initial_price = prices[i]
+                target_price = initial_price * price_increase
+                i = range_max.first_reaching(i + 1, int(next_smaller[i]), target_price)
             else:
                 i += 1
 
@@ -87,78 +158,101 @@ class PointFinder:
         Returns:
             list: List of indices, each the first retracement point before a monotonic rise past ATH.
         """
-        retracement_indices = []
-        n = len(self.metrics)
-        i = 0
+        return self.find_fib_618_retracement_recoveries((tolerance,))[tolerance]
 
-        while i < n - 2:  # Need at least 3 points for pump, retrace, recover
-            start_price = self.metrics[i]["price"]
-            if start_price <= 0:  # Skip invalid prices
-                i += 1
-                continue
-
-            # Find the pump peak (ATH) after the start
-            ath_price = start_price
-            ath_idx = i
-            for j in range(i + 1, n):
-                current_price = self.metrics[j]["price"]
-                if current_price > ath_price:
-                    ath_price = current_price
-                    ath_idx = j
-                elif current_price < start_price:  # Drop below start ends the pump
-                    break
-                if j == n - 1:  # Reached end without breaking
-                    break
-
-            # If no higher peak found, move to next point
-            if ath_idx == i:
-                i += 1
-                continue
-
-            # Calculate 61.8% retracement level with tolerance
-            price_range = ath_price - start_price
-            fib_618_level = ath_price - (price_range * 0.618)
-            lower_bound = fib_618_level * (1 - tolerance)
-            upper_bound = fib_618_level * (1 + tolerance)
-
-            # Look for the first retracement point hitting ~61.8%
-            retrace_idx = None
-            for k in range(ath_idx + 1, n):
-                current_price = self.metrics[k]["price"]
-                if lower_bound <= current_price <= upper_bound:
-                    retrace_idx = k
-                    break
-                # If price drops below start or rises above ATH before retracing, skip
-                if current_price < start_price or current_price > ath_price:
-                    break
-
-            if retrace_idx is None:
-                i = ath_idx + 1
-                continue
-
-            # Check if price only increases from retrace_idx and hits ATH
-            valid_recovery = True
-            last_price = self.metrics[retrace_idx]["price"]
-            reached_ath = False
-
-            for m in range(retrace_idx + 1, n):
-                current_price = self.metrics[m]["price"]
-                if current_price < last_price:  # Price dipped, invalid
-                    valid_recovery = False
-                    break
-                if current_price >= ath_price:  # Reached or exceeded ATH
-                    reached_ath = True
-                    break
-                last_price = current_price
-
-            if valid_recovery and reached_ath:
-                retracement_indices.append(retrace_idx)
-                i = m + 1  # Skip past the recovery point
-            else:
-                i = ath_idx + 1  # Move past the ATH if no valid recovery
+    def find_fib_618_retracement_recoveries(self, tolerances):
+        """
+        find_fib_618_retracement_recovery for several tolerances, sharing the precomputed price structures
+        and the pump peak of every start index between them.
+
+        Every phase of a candidate is a lookup instead of a rescan: the pump ends at the next smaller price
+        and peaks at the range maximum, the retracement search ends at the next price below the start or
+        above the ATH, and the recovery is valid if the ATH is reached before the next dip. Each start index
+        costs O(log n), plus one step per time the price jumps across the retracement band in a single point.
+
+        Args:
+            tolerances (iterable): Percentage tolerances around 61.8% (e.g., [0.03, 0.05]).
+
+        Returns:
+            dict: {tolerance: list of retracement indices}
+        """
+        prices, next_smaller, next_greater, range_max, range_min, _, _ = self._range_structures()
+        n = len(prices)
+        # First index after each position where the price is lower than at the point before it
+        dips = np.flatnonzero(prices[1:] < prices[:-1]) + 1
+        next_dip = np.append(dips, n)[np.searchsorted(dips, np.arange(n) + 1)]
+        price_list = prices.tolist()
+        peaks = {}  # start index -> (ath_price, ath_idx), shared by all tolerances
+
+        def pump_peak(i):
+            peak = peaks.get(i)
+            if peak is None:
+                # The pump runs until the first price below the start; its ATH is the first maximum
+                end = int(next_smaller[i])
+                peak = (price_list[i], i)
+                if end > i + 1:
+                    ath_price = range_max.query(i + 1, end)
+                    if ath_price > price_list[i]:
+                        peak = (ath_price, range_max.first_reaching(i + 1, end, ath_price))
+                peaks[i] = peak
+            return peak
+
+        def first_in_band(start, end, lower_bound, upper_bound):
+            # Alternately skip runs above the band and runs below it
+            k = start
+            while k < end:
+                k = range_min.first_reaching(k, end, upper_bound)
+                if k == end or price_list[k] >= lower_bound:
+                    return k
+                k = range_max.first_reaching(k, end, lower_bound)
+                if k == end or price_list[k] <= upper_bound:
+                    return k
+            return end
+
+        results = {}
+        for tolerance in tolerances:
+            retracement_indices = []
+            i = 0
+
+            while i < n - 2:  # Need at least 3 points for pump, retrace, recover
+                start_price = price_list[i]
+                if start_price <= 0:  # Skip invalid prices
+                    i += 1
+                    continue
+
+                # Find the pump peak (ATH) after the start
+                ath_price, ath_idx = pump_peak(i)
 
-        return retracement_indices
+                # If no higher peak found, move to next point
+                if ath_idx == i:
+                    i += 1
+                    continue
 
+                # Calculate 61.8% retracement level with tolerance
+                price_range = ath_price - start_price
+                fib_618_level = ath_price - (price_range * 0.618)
+                lower_bound = fib_618_level * (1 - tolerance)
+                upper_bound = fib_618_level * (1 + tolerance)
+
+                # Look for the first retracement point hitting ~61.8%, up to and including the first point
+                # below the start or above the ATH
+                stop = min(int(next_smaller[i]), int(next_greater[ath_idx]))
+                search_end = min(stop + 1, n)
+                retrace_idx = first_in_band(ath_idx + 1, search_end, lower_bound, upper_bound)
+                if retrace_idx == search_end:
+                    i = ath_idx + 1
+                    continue
+
+                # Check if price only increases from retrace_idx and hits ATH (reaching it on a dip is invalid)
+                reached_idx = range_max.first_reaching(retrace_idx + 1, n, ath_price)
+                if reached_idx < n and reached_idx < next_dip[retrace_idx]:
+                    retracement_indices.append(retrace_idx)
+                    i = reached_idx + 1  # Skip past the recovery point
+                else:
+                    i = ath_idx + 1  # Move past the ATH if no valid recovery
+
+            results[tolerance] = retracement_indices
+        return results
 
     def find_all_significant_price_increases(self, price_increase):
             """
@@ -171,31 +265,7 @@ class PointFinder:
             Returns:
                 list: List of indices in self.metrics where the condition is met.
             """
-            targets = []
-            n = len(self.metrics)
-
-            for i in range(n):
-                initial_price = self.metrics[i]["price"]
-                if initial_price <= 0:
-                    continue
-
-                target_price = initial_price * price_increase
-                qualifies = False
-                max_price_seen = initial_price
-
-                for j in range(i + 1, n):
-                    current_price = self.metrics[j]["price"]
-                    max_price_seen = max(max_price_seen, current_price)
-                    if current_price < initial_price:
-                        break
-                    if max_price_seen >= target_price:
-                        qualifies = True
-                        break
-
-                if qualifies:
-                    targets.append(i)
-
-            return targets
+            return self.label_matrix(increase_factors=(price_increase,)).increase_indices(price_increase)
 
     def find_all_significant_price_decreases(self, price_decrease):
         """
@@ -208,58 +278,38 @@ class PointFinder:
         Returns:
             list: List of indices in self.metrics where the condition is met.
         """
-        targets = []
-        n = len(self.metrics)
-
-        for i in range(n):
-            initial_price = self.metrics[i]["price"]
-            if initial_price <= 0:
-                continue
-
-            target_price = initial_price * price_decrease
-            qualifies = False
-            min_price_seen = initial_price
-
-            for j in range(i + 1, n):
-                current_price = self.metrics[j]["price"]
-                min_price_seen = min(min_price_seen, current_price)
-                if current_price > initial_price:
-                    break
-                if min_price_seen <= target_price:
-                    qualifies = True
-                    break
-
-            if qualifies:
-                targets.append(i)
-
-        return targets
+        return self.label_matrix(decrease_factors=(price_decrease,)).decrease_indices(price_decrease)
 
-    def evaluate_zone_settings(self, price_increase, price_decrease):
+    def evaluate_zone_settings(self, price_increase, price_decrease, labels=None):
         """
         Evaluates zone settings by comparing confidence sums from significant price increases and decreases.
 
         Args:
             price_increase (float): Factor for significant price increases (e.g., 2.0 for 2x).
             price_decrease (float): Factor for significant price decreases (e.g., 0.5 for halving).
+            labels (MoveLabels, optional): Labels from label_matrix containing both factors, to reuse them.
 
         Returns:
             tuple: (difference, num_increase_points, num_decrease_points)
         """
-        increase_indices = self.find_all_significant_price_increases(price_increase)
-        decrease_indices = self.find_all_significant_price_decreases(price_decrease)
+        if labels is None:
+            labels = self.label_matrix((price_increase,), (price_decrease,))
+        increase_indices = labels.increase_indices(price_increase)
+        decrease_indices = labels.decrease_indices(price_decrease)
 
-        sum_increase_confidence = sum(self.metrics[i]["zone_confidence"] for i in increase_indices)
-        sum_decrease_confidence = sum(self.metrics[i]["zone_confidence"] for i in decrease_indices)
+        zone_confidence = self.metrics.column("zone_confidence")
+        sum_increase_confidence = float(zone_confidence[increase_indices].sum())
+        sum_decrease_confidence = float(zone_confidence[decrease_indices].sum())
 
         difference = sum_increase_confidence - sum_decrease_confidence
         num_increase_points = len(increase_indices)
         num_decrease_points = len(decrease_indices)
 
-        print(f"Sum of confidence from increase points: {sum_increase_confidence:.2f}")
-        print(f"Sum of confidence from decrease points: {sum_decrease_confidence:.2f}")
-        print(f"Difference (increase - decrease): {difference:.2f}")
-        print(f"Number of increase points: {num_increase_points}")
-        print(f"Number of decrease points: {num_decrease_points}")
+        logger.info("Sum of confidence from increase points: %.2f", sum_increase_confidence)
+        logger.info("Sum of confidence from decrease points: %.2f", sum_decrease_confidence)
+        logger.info("Difference (increase - decrease): %.2f", difference)
+        logger.info("Number of increase points: %d", num_increase_points)
+        logger.info("Number of decrease points: %d", num_decrease_points)
 
         return difference, num_increase_points, num_decrease_points
 
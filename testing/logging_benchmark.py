@@ -0,0 +1,48 @@
+"""
+Warmup time of a TradingEngine with the metric pipeline's logging disabled versus enabled.
+
+Usage:
+    python -m testing.logging_benchmark [historical_data/<file>.json]
+
+Every configuration processes the same stored price history; enabled logging writes to os.devnull so
+the numbers show the cost of producing the records rather than of the terminal.
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+from actions.tradingEngine import TradingEngine
+from utils.logger import configure_logging
+
+DEFAULT_HISTORY = "historical_data/historical_price_DzvWsz4eLG2i2326E81rFxjTqaa476khgPRpRzrcpump_5m_200_False.json"
+
+CONFIGURATIONS = [
+    ("disabled (WARNING)", dict(level=logging.WARNING)),
+    ("enabled (DEBUG)", dict(level=logging.DEBUG)),
+    ("enabled (DEBUG, 1 in 100 sampled)", dict(level=logging.DEBUG, sample_every=100)),
+    ("enabled (DEBUG, 10/s per message)", dict(level=logging.DEBUG, max_per_second=10)),
+]
+
+
+def run_warmup(items):
+    start = time.perf_counter()
+    TradingEngine("5m", items)
+    return time.perf_counter() - start
+
+
+def main(argv):
+    with open(argv[0] if argv else DEFAULT_HISTORY) as file:
+        items = json.load(file)["data"]["items"]
+
+    with open(os.devnull, "w") as devnull:
+        for name, options in CONFIGURATIONS:
+            configure_logging(stream=devnull, **options)
+            elapsed = run_warmup(items)
+            print(f"{name:<36} {elapsed:8.3f}s  ({len(items)} points)")
+    configure_logging()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
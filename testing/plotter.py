@@ -77,7 +77,7 @@ class PricePlotter:
         self.ax_fib.clear()
 
     def _plot_price(self, time, metrics, include_backtest=False):
-        prices = [m['price'] for m in metrics]
+        prices = metrics.column('price')
         
         if self.initial_data_size > 0:
             end_initial = min(self.initial_data_size, len(metrics))
@@ -95,12 +95,12 @@ class PricePlotter:
         
         self._plot_zones(metrics[-1])
         
-        confidences = [m.get('zone_confidence', 0) for m in metrics]
-        if confidences:
+        confidences = np.nan_to_num(metrics.column('zone_confidence'))
+        if len(confidences):
             price_min, price_max = min(prices), max(prices)
             if price_max == price_min:
                 price_max = price_min + 1
-            scaled_confidences = [price_min + (price_max - price_min) * c for c in confidences]
+            scaled_confidences = price_min + (price_max - price_min) * confidences
             self.ax_price.fill_between(
                 time, price_min, scaled_confidences,
                 color='green', alpha=0.2, zorder=1, label='Zone Confidence'
@@ -121,10 +121,10 @@ class PricePlotter:
                 )
 
     def _plot_rsi(self, time, metrics):
-        rsi_short = [m['rsi']['short'] for m in metrics]
-        rsi_mid = [m['rsi']['middle_short'] for m in metrics]
-        rsi_long = [m['rsi']['long'] for m in metrics]
-        rsi_slope = [m['rsi']['slope'] for m in metrics]
+        rsi_short = metrics.column('rsi.short')
+        rsi_mid = metrics.column('rsi.middle_short')
+        rsi_long = metrics.column('rsi.long')
+        rsi_slope = metrics.column('rsi.slope')
         
         self.ax_rsi.plot(time, rsi_short, '-', color='blue', label='RSI Short')
         self.ax_rsi.plot(time, rsi_mid, '-', color='orange', label='RSI Mid-Short')
@@ -137,8 +137,8 @@ class PricePlotter:
     def _plot_combined(self, time, metrics, include_backtest=False):
         """Plot 60-minute OHLCV candlesticks with EMA, SMA, Bollinger Bands, and crossovers"""
         # Plot RSI divergence crossovers (background)
-        divergence_strengths = [m['divergence'] for m in metrics]
-        prices = [m['price'] for m in metrics]
+        divergence_strengths = metrics.column('divergence')
+        prices = metrics.column('price')
         price_min, price_max = min(prices), max(prices)
         if price_max == price_min:
             price_max = price_min + 1
@@ -163,7 +163,7 @@ class PricePlotter:
         
         # Fetch 5-minute price data timestamps for alignment
         price_data = self.trading_engine.metric_collector.price_data
-        price_timestamps = [entry['unixTime'] for entry in price_data]
+        price_timestamps = price_data.timestamps
         print("First few 5-minute price timestamps:", price_timestamps[:3])
         
         # Calculate the first full-hour timestamp after the first price point
@@ -237,25 +237,14 @@ class PricePlotter:
         
         # Debug: Print the first few 5-minute prices and EMA values
         print("First few 5-minute prices and EMA values:")
+        # Plot EMA prices (foreground), missing EMAs are drawn at 0
+        ema_short = np.nan_to_num(metrics.column('ema.short')) * prices
+        ema_medium = np.nan_to_num(metrics.column('ema.medium')) * prices
+        ema_long = np.nan_to_num(metrics.column('ema.long')) * prices
+        ema_longterm = np.nan_to_num(metrics.column('ema.longterm')) * prices
+
         for i in range(min(3, len(metrics))):
-            ema = metrics[i].get('ema', {})
-            price = prices[i]
-            ema_short = (ema.get('short', 0) or 0) * price
-            print(f"Time index {time[i]}: Price={price}, EMA Short={ema_short}")
-        
-        # Plot EMA prices (foreground)
-        ema_short = []
-        ema_medium = []
-        ema_long = []
-        ema_longterm = []
-        
-        for i, m in enumerate(metrics):
-            ema = m.get('ema', {})
-            price = prices[i]
-            ema_short.append((ema.get('short', 0) or 0) * price)
-            ema_medium.append((ema.get('medium', 0) or 0) * price)
-            ema_long.append((ema.get('long', 0) or 0) * price)
-            ema_longterm.append((ema.get('longterm', 0) or 0) * price)
+            print(f"Time index {time[i]}: Price={prices[i]}, EMA Short={ema_short[i]}")
         
         self.ax_combined.plot(time, ema_short, '-', color='blue', label='EMA Short', alpha=0.8, zorder=2)
         self.ax_combined.plot(time, ema_medium, '-', color='orange', label='EMA Medium', alpha=0.8, zorder=2)
@@ -263,18 +252,18 @@ class PricePlotter:
         self.ax_combined.plot(time, ema_longterm, '-', color='green', label='EMA Long-term', alpha=0.8, zorder=2)
         
         # Plot Bollinger Bands
-        upper_bands = [m['boilinger_bands']['upper'] for m in metrics]
-        middle_bands = [m['boilinger_bands']['middle'] for m in metrics]
-        lower_bands = [m['boilinger_bands']['lower'] for m in metrics]
+        upper_bands = metrics.column('boilinger_bands.upper')
+        middle_bands = metrics.column('boilinger_bands.middle')
+        lower_bands = metrics.column('boilinger_bands.lower')
         
         self.ax_combined.plot(time, upper_bands, '--', color='red', label='BB Upper', alpha=0.8, zorder=2)
         self.ax_combined.plot(time, middle_bands, '-', color='black', label='BB Middle (SMA)', alpha=0.8, zorder=2)
         self.ax_combined.plot(time, lower_bands, '--', color='green', label='BB Lower', alpha=0.8, zorder=2)
         
         # Plot additional SMAs
-        sma_short = [m['sma']['short'] for m in metrics]
-        sma_medium = [m['sma']['medium'] for m in metrics]
-        sma_long = [m['sma']['long'] for m in metrics]
+        sma_short = metrics.column('sma.short')
+        sma_medium = metrics.column('sma.medium')
+        sma_long = metrics.column('sma.long')
         
         self.ax_combined.plot(time, sma_short, '-', color='cyan', label='SMA Short', alpha=0.5, zorder=2)
         self.ax_combined.plot(time, sma_medium, '-', color='magenta', label='SMA Medium', alpha=0.5, zorder=2)
@@ -309,9 +298,9 @@ class PricePlotter:
         plot_zone(key_zone_6, 'pink', 'key_zone_6')
 
     def _plot_macd(self, time, metrics):
-        macd_line = [m['macd']['macd'] if m['macd']['macd'] is not None else np.nan for m in metrics]
-        signal_line = [m['macd']['signal'] if m['macd']['signal'] is not None else np.nan for m in metrics]
-        histogram = [m['macd']['histogram'] if m['macd']['histogram'] is not None else np.nan for m in metrics]
+        macd_line = metrics.column('macd.macd')
+        signal_line = metrics.column('macd.signal')
+        histogram = metrics.column('macd.histogram')
         
         colors = ['lightblue' if h > 0 else 'pink' if h < 0 else 'gray' for h in histogram]
         self.ax_macd.bar(time, histogram, color=colors, alpha=0.5)
@@ -321,7 +310,7 @@ class PricePlotter:
         self.ax_macd.axhline(0, color='gray', linestyle='--')
 
     def _plot_fibonacci_price(self, time, metrics):
-        prices = [m['price'] for m in metrics]
+        prices = metrics.column('price')
         self.ax_fib.plot(time, prices, 'b-', label='Price')
         price_min, price_max = min(prices), max(prices)
         padding = (price_max - price_min) * 0.1
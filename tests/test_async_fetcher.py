@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("requests")  # API.birdEye_API, imported for the endpoint defaults
+pytest.importorskip("dotenv")
+from aiohttp import web
+
+from API.async_fetcher import fetch_history_async, plan_chunks
+
+STEP = 300  # 5m
+PATH = "/defi/history_price"
+
+
+class StubBirdeye:
+    """
+    Local stand-in for the Birdeye history endpoint serving one 5m point per STEP seconds.
+
+    The first request of every third window gets a 429 with Retry-After, the first request of the windows
+    after those a `success: false` "Too many requests" body; windows containing a timestamp in
+    `failing` always get a 500.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requests = []  # (monotonic time, time_from, time_to)
+        self.rejected = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request):
+        query = request.rel_url.query
+        time_from, time_to = int(query["time_from"]), int(query["time_to"])
+        self.requests.append((time.monotonic(), time_from, time_to))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            if any(time_from <= ts <= time_to for ts in self.failing):
+                return web.Response(status=500)
+            window = (time_from, time_to)
+            position = time_from // STEP
+            if window not in self.rejected and position % 3 != 2:
+                self.rejected.add(window)
+                if position % 3 == 0:
+                    return web.Response(status=429, headers={"Retry-After": "0.05"})
+                return web.json_response({"success": False, "message": "Too many requests"})
+            items = [{"address": query["address"], "unixTime": ts, "value": ts * 1e-9}
+                     for ts in range(-(-time_from // STEP) * STEP, time_to + 1, STEP)]
+            return web.json_response({"data": {"items": items}, "success": True})
+        finally:
+            self.in_flight -= 1
+
+
+async def fetch_from_stub(stub, time_from, time_to, **options):
+    app = web.Application()
+    app.router.add_get(PATH, stub.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    try:
+        return await fetch_history_async("TOKEN", "5m", time_from, time_to, url=f"http://{host}:{port}{PATH}",
+                                         **options)
+    finally:
+        await runner.cleanup()
+
+
+def expected_timestamps(time_from, time_to):
+    return list(range(-(-time_from // STEP) * STEP, time_to + 1, STEP))
+
+
+def test_plan_chunks_covers_range_oldest_first():
+    windows = plan_chunks(1_000, 1_000 + 2_500 * STEP, "5m", 1000)
+    assert windows[0][0] == 1_000 and windows[-1][1] == 1_000 + 2_500 * STEP
+    assert all(start <= end for start, end in windows)
+    assert all(b[0] == a[1] + 1 for a, b in zip(windows, windows[1:]))
+    assert all(end - start < 1000 * STEP for start, end in windows)
+
+    with pytest.raises(ValueError):
+        plan_chunks(0, 1, "7m", 10)
+
+
+def test_fetch_retries_and_assembles_in_order():
+    stub = StubBirdeye()
+    time_from, time_to = 1_000_000, 1_000_000 + 3_000 * STEP
+    rate, burst, concurrency = 20.0, 2, 3
+    response = asyncio.run(fetch_from_stub(stub, time_from, time_to, chunk_size=100, rate=rate, burst=burst,
+                                           max_concurrency=concurrency, backoff=0.01))
+
+    timestamps = [item["unixTime"] for item in response["data"]["items"]]
+    assert timestamps == expected_timestamps(time_from, time_to)  # Chronological, no duplicates or gaps
+    assert response["failed"] == []
+    assert response["covered_from"] == time_from
+
+    windows = plan_chunks(time_from, time_to, "5m", 100)
+    assert stub.rejected  # Both kinds of rate-limit answers were retried
+    assert len(stub.requests) == len(windows) + len(stub.rejected)
+    assert stub.max_in_flight <= concurrency
+    # Token bucket: the n-th request cannot start before (n - burst) / rate seconds
+    start = stub.requests[0][0]
+    for n, (sent, _, _) in enumerate(stub.requests):
+        assert sent - start >= (n + 1 - burst) / rate - 0.01
+
+
+def test_failed_window_limits_covered_range():
+    stub = StubBirdeye(failing=[1_000_000 + 150 * STEP])
+    time_from, time_to = 1_000_000, 1_000_000 + 500 * STEP
+    response = asyncio.run(fetch_from_stub(stub, time_from, time_to, chunk_size=100, rate=100.0,
+                                           max_concurrency=4, retries=2, backoff=0.01))
+
+    assert len(response["failed"]) == 1
+    failed_from, failed_to = response["failed"][0]
+    assert failed_from <= 1_000_000 + 150 * STEP <= failed_to
+    assert response["covered_from"] == failed_to + 1
+
+    timestamps = [item["unixTime"] for item in response["data"]["items"]]
+    expected = [ts for ts in expected_timestamps(time_from, time_to) if not failed_from <= ts <= failed_to]
+    assert timestamps == expected
+    failing_requests = [r for r in stub.requests if r[1:] == (failed_from, failed_to)]
+    assert len(failing_requests) == 3  # First attempt and two retries
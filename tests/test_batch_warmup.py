@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from actions.tradingEngine import TradingEngine
+
+STEP = 300  # 5m
+
+
+def random_history(n, seed=0, scale=1e-6):
+    """Random-walk 5m prices with flat stretches, starting mid-hour so the first candles are partial."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.01, n)
+    steps[rng.random(n) < 0.1] = 0.0
+    timestamps = 1_700_000_000 // 3600 * 3600 + 25 * 60 + STEP * np.arange(n, dtype=np.int64)
+    return scale * np.exp(np.cumsum(steps)), timestamps
+
+
+def streamed_engine(prices, timestamps):
+    engine = TradingEngine("5m", None)
+    for value, unix_time in zip(prices.tolist(), timestamps.tolist()):
+        engine.add_new_price(value, unix_time)
+    return engine
+
+
+def assert_same_metrics(actual, expected):
+    assert len(actual) == len(expected)
+    for name, kind in expected.kinds.items():
+        if kind == "float":
+            np.testing.assert_allclose(actual.column(name), expected.column(name), rtol=1e-9, atol=1e-15,
+                                       err_msg=name)
+        else:
+            np.testing.assert_array_equal(actual.column(name), expected.column(name), err_msg=name)
+
+
+@pytest.mark.parametrize("split", [1, 400, 800])
+def test_batch_warmup_matches_streaming(split):
+    """A batch warmup over the first `split` points, then live ticks, gives the rows of a pure tick-by-tick run."""
+    prices, timestamps = random_history(800, seed=split)
+    expected = streamed_engine(prices, timestamps)
+
+    engine = TradingEngine.from_price_arrays("5m", prices[:split], timestamps[:split])
+    for value, unix_time in zip(prices[split:].tolist(), timestamps[split:].tolist()):
+        engine.add_new_price(value, unix_time)
+
+    collector, reference = engine.metric_collector, expected.metric_collector
+    assert_same_metrics(collector.metrics, reference.metrics)
+    for minutes, candles in reference.interval_data_aggregator.interval_price_data.items():
+        for field, values in candles.arrays().items():
+            np.testing.assert_array_equal(
+                collector.interval_data_aggregator.interval_price_data[minutes].arrays()[field], values)
+
+
+def test_batch_warmup_seeds_running_states():
+    """The indicator states seeded by the batch continue like states that saw every close."""
+    prices, timestamps = random_history(600, seed=7)
+    engine = TradingEngine.from_price_arrays("5m", prices, timestamps)
+    expected = streamed_engine(prices, timestamps)
+
+    seeded = engine.metric_collector.indicator_analyzer.engine.streams
+    reference = expected.metric_collector.indicator_analyzer.engine.streams
+    assert seeded.keys() == reference.keys()
+    for key, stream in reference.items():
+        np.testing.assert_allclose(seeded[key].update(1e-6), stream.update(1e-6), rtol=1e-9, err_msg=str(key))
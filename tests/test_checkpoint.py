@@ -0,0 +1,112 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from test_batch_warmup import random_history, streamed_engine
+from utils import checkpoint
+from utils.candle_store import CandleStore
+from utils.checkpoint import CheckpointError, load_checkpoint, read_checkpoint_metadata, save_checkpoint
+from utils.price_store import PriceStore
+from utils.series_registry import RollingSeries
+
+
+def assert_identical_metrics(actual, expected):
+    assert len(actual) == len(expected)
+    assert actual.kinds == expected.kinds
+    for name in expected.fields:
+        np.testing.assert_array_equal(actual.column(name), expected.column(name), err_msg=name)
+
+
+@pytest.mark.parametrize("split", [1, 200, 400])
+def test_restore_then_ticks_matches_cold_replay(tmp_path, split):
+    """Checkpoint after `split` ticks, restore, feed the remaining ticks: every row equals a run without restart."""
+    prices, timestamps = random_history(400, seed=split)
+    expected = streamed_engine(prices, timestamps)
+
+    filename = str(tmp_path / "token.ckpt")
+    metadata = save_checkpoint(streamed_engine(prices[:split], timestamps[:split]), filename, "token")
+    engine, loaded = load_checkpoint(filename)
+    assert loaded == metadata and loaded["points"] == split
+    for value, unix_time in zip(prices[split:].tolist(), timestamps[split:].tolist()):
+        engine.add_new_price(value, unix_time)
+
+    collector, reference = engine.metric_collector, expected.metric_collector
+    assert_identical_metrics(collector.metrics, reference.metrics)
+    np.testing.assert_array_equal(collector.price_data.prices, reference.price_data.prices)
+    for minutes, candles in reference.interval_data_aggregator.interval_price_data.items():
+        for field, values in candles.arrays().items():
+            np.testing.assert_array_equal(
+                collector.interval_data_aggregator.interval_price_data[minutes].arrays()[field], values)
+    assert collector.confidence_calculator.zone_confidence == reference.confidence_calculator.zone_confidence
+
+
+def append_value(store, value):
+    if isinstance(store, PriceStore):
+        store.append_value(value, int(value * 1e6))
+    elif isinstance(store, CandleStore):
+        store.append_values(int(value * 1e6), value, value, value, value, value)
+    else:
+        store.append(value)
+
+
+@pytest.mark.parametrize("capacity", [None, 7])
+@pytest.mark.parametrize("count", [0, 5, 7, 30])
+def test_store_state_round_trip(capacity, count):
+    """Stores loaded from state() continue exactly like the originals, in growable and ring mode."""
+    values = np.random.default_rng(count).random(count + 10).tolist()
+    stores = [PriceStore(capacity, initial_size=4), CandleStore(capacity, initial_size=4), RollingSeries(capacity or 9)]
+    restored = [PriceStore(capacity), CandleStore(capacity), RollingSeries(capacity or 9)]
+    for value in values[:count]:
+        for store in stores:
+            append_value(store, value)
+    for store, copy in zip(stores, restored):
+        copy.load_state(pickle.loads(pickle.dumps(store.state())))
+
+    for value in values[count:]:
+        for store, copy in zip(stores, restored):
+            append_value(store, value)
+            append_value(copy, value)
+            assert pickle.dumps(copy.state()) == pickle.dumps(store.state())
+
+
+@pytest.fixture
+def saved(tmp_path):
+    prices, timestamps = random_history(120, seed=1)
+    filename = str(tmp_path / "token.ckpt")
+    save_checkpoint(streamed_engine(prices, timestamps), filename, "token")
+    return filename
+
+
+def test_truncated_checkpoint_raises_checkpoint_error(saved):
+    size = os.path.getsize(saved)
+    for length in (4, 40, size // 2, size - 1):
+        with open(saved, "rb") as file:
+            data = file.read(length)
+        with open(saved, "wb") as file:
+            file.write(data)
+        with pytest.raises(CheckpointError):
+            load_checkpoint(saved)
+
+
+def test_foreign_state_raises_checkpoint_error(saved):
+    with open(saved, "rb") as file:
+        header = file.read(checkpoint._HEADER.size)
+        _, _, meta_length = checkpoint._HEADER.unpack(header)
+        meta_bytes = file.read(meta_length)
+
+    for state in ({"prices": {}}, [1, 2, 3], os.getcwd):
+        with open(saved, "wb") as file:
+            file.write(header + meta_bytes + pickle.dumps(state))
+        with pytest.raises(CheckpointError):
+            load_checkpoint(saved)
+
+
+def test_other_schema_or_missing_file_raises_checkpoint_error(saved, monkeypatch):
+    assert read_checkpoint_metadata(saved)["token"] == "token"
+    monkeypatch.setattr(checkpoint, "SCHEMA_HASH", "other")
+    with pytest.raises(CheckpointError):
+        load_checkpoint(saved)
+    with pytest.raises(CheckpointError):
+        load_checkpoint(saved + ".missing")
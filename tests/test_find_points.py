@@ -0,0 +1,186 @@
+import numpy as np
+import pytest
+
+from analytics.metrics_table import MetricsTable
+from testing.find_points import PointFinder
+from utils.range_query import SparseTable, next_greater_index, next_smaller_index
+
+
+def random_prices(n, seed, kind):
+    """Random walks ('walk'), ranging integer prices with ties and zeros ('ranging') or walks with NaN gaps."""
+    rng = np.random.default_rng(seed)
+    if kind == "walk":
+        return np.exp(np.cumsum(rng.normal(0, 0.2, n)))
+    if kind == "ranging":
+        return rng.integers(0, 5, n).astype(np.float64)
+    prices = np.exp(np.cumsum(rng.normal(0, 0.2, n)))
+    prices[rng.random(n) < 0.1] = np.nan
+    return prices
+
+
+def point_finder(prices):
+    table = MetricsTable()
+    for price in prices.tolist():
+        table.append({"price": price})
+    return PointFinder(table)
+
+
+# Reference implementations: the original O(n²) scans
+
+def reference_all_increases(prices, factor):
+    targets = []
+    for i, initial in enumerate(prices):
+        if initial <= 0:
+            continue
+        highest = initial
+        for price in prices[i + 1:]:
+            highest = max(highest, price)
+            if price < initial:
+                break
+            if highest >= initial * factor:
+                targets.append(i)
+                break
+    return targets
+
+
+def reference_all_decreases(prices, factor):
+    targets = []
+    for i, initial in enumerate(prices):
+        if initial <= 0:
+            continue
+        lowest = initial
+        for price in prices[i + 1:]:
+            lowest = min(lowest, price)
+            if price > initial:
+                break
+            if lowest <= initial * factor:
+                targets.append(i)
+                break
+    return targets
+
+
+def reference_increases(prices, factor):
+    """Qualifying starts, each skipping ahead to the first later price below it or at its target."""
+    qualifying = set(reference_all_increases(prices, factor))
+    targets = []
+    i = 0
+    while i < len(prices):
+        if i not in qualifying:
+            i += 1
+            continue
+        targets.append(i)
+        initial, target = prices[i], prices[i] * factor
+        i += 1
+        while i < len(prices) and not (prices[i] < initial or prices[i] >= target):
+            i += 1
+    return targets
+
+
+def reference_fib_618(prices, tolerance):
+    n = len(prices)
+    indices = []
+    i = 0
+    while i < n - 2:
+        start = prices[i]
+        if start <= 0:
+            i += 1
+            continue
+        ath, ath_idx = start, i
+        for j in range(i + 1, n):
+            if prices[j] > ath:
+                ath, ath_idx = prices[j], j
+            elif prices[j] < start:
+                break
+        if ath_idx == i:
+            i += 1
+            continue
+
+        level = ath - (ath - start) * 0.618
+        lower, upper = level * (1 - tolerance), level * (1 + tolerance)
+        retrace_idx = None
+        for k in range(ath_idx + 1, n):
+            if lower <= prices[k] <= upper:
+                retrace_idx = k
+                break
+            if prices[k] < start or prices[k] > ath:
+                break
+        if retrace_idx is None:
+            i = ath_idx + 1
+            continue
+
+        last, reached_idx = prices[retrace_idx], None
+        for m in range(retrace_idx + 1, n):
+            if prices[m] < last:
+                break
+            if prices[m] >= ath:
+                reached_idx = m
+                break
+            last = prices[m]
+        if reached_idx is None:
+            i = ath_idx + 1
+        else:
+            indices.append(retrace_idx)
+            i = reached_idx + 1
+    return indices
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("kind", ["walk", "ranging", "gaps"])
+def test_significant_moves_match_reference(seed, kind):
+    prices = random_prices(150, seed, kind)
+    finder = point_finder(prices)
+    price_list = prices.tolist()
+    for factor in (1.0, 1.1, 1.5, 2.0):
+        assert finder.find_all_significant_price_increases(factor) == reference_all_increases(price_list, factor)
+        assert finder.find_significant_price_increases(factor) == reference_increases(price_list, factor)
+    for factor in (1.0, 0.9, 0.5):
+        assert finder.find_all_significant_price_decreases(factor) == reference_all_decreases(price_list, factor)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("kind", ["walk", "ranging"])
+def test_fib_618_recoveries_match_reference(seed, kind):
+    prices = random_prices(150, seed, kind)
+    finder = point_finder(prices)
+    tolerances = (0.0, 0.03, 0.05, 0.2)
+    recoveries = finder.find_fib_618_retracement_recoveries(tolerances)
+    for tolerance in tolerances:
+        expected = reference_fib_618(prices.tolist(), tolerance)
+        assert recoveries[tolerance] == expected
+        assert finder.find_fib_618_retracement_recovery(tolerance) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_next_smaller_and_greater_index(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 6, int(rng.integers(0, 60))).astype(np.float64)
+    values[rng.random(len(values)) < 0.1] = np.nan
+    n = len(values)
+
+    def first_after(i, condition):
+        return next((j for j in range(i + 1, n) if condition(values[j])), n)
+
+    smaller = [n if np.isnan(v) else first_after(i, lambda x, v=v: x < v) for i, v in enumerate(values)]
+    greater = [n if np.isnan(v) else first_after(i, lambda x, v=v: x > v) for i, v in enumerate(values)]
+    assert next_smaller_index(values).tolist() == smaller
+    assert next_greater_index(values).tolist() == greater
+
+
+@pytest.mark.parametrize("mode", ["max", "min"])
+@pytest.mark.parametrize("seed", range(10))
+def test_sparse_table_queries(mode, seed):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 10, int(rng.integers(1, 70))).astype(np.float64)
+    table = SparseTable(values, mode)
+    extreme = np.max if mode == "max" else np.min
+    reaches = (lambda x, t: x >= t) if mode == "max" else (lambda x, t: x <= t)
+
+    starts = rng.integers(0, len(values), 200)
+    ends = np.array([rng.integers(start + 1, len(values) + 1) for start in starts])
+    np.testing.assert_array_equal(table.query_many(starts, ends),
+                                  [extreme(values[s:e]) for s, e in zip(starts, ends)])
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        assert table.query(start, end) == extreme(values[start:end])
+        for threshold in (-1.0, 0.0, 4.5, 9.0, 10.0):
+            expected = next((i for i in range(start, end) if reaches(values[i], threshold)), end)
+            assert table.first_reaching(start, end, threshold) == expected
@@ -0,0 +1,55 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("requests")  # API.birdEye_API, imported for the default fetch
+pytest.importorskip("dotenv")
+
+from API.history_cache import HistoryCache
+
+STEP = 300  # 5m
+
+
+class RandomBirdeye:
+    """Fetch function serving random points with gaps, duplicates, shuffled order and missing values."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.responses = []
+
+    def __call__(self, token, interval, time_from, time_to):
+        items = [{"unixTime": t, "value": self.random.random() if self.random.random() > 0.1 else None,
+                  "address": token}
+                 for t in range(time_from - time_from % STEP, time_to + 1, STEP) if self.random.random() > 0.2]
+        items += [dict(item, value=self.random.random()) for item in items[:2]]
+        self.random.shuffle(items)
+        self.responses.append(items)
+        return {"data": {"items": items}}
+
+    def expected(self):
+        """The original dict cache: items by unixTime, later ones replacing earlier ones."""
+        items = {}
+        for response in self.responses:
+            for item in response:
+                items[item["unixTime"]] = item
+        return [items[t] for t in sorted(items)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_merged_columns_match_dict_cache(tmp_path, seed):
+    fetch = RandomBirdeye(seed)
+    cache = HistoryCache("token", "5m", directory=str(tmp_path), fetch=fetch)
+    for time_from, time_to in [(10_000, 20_000), (30_000, 40_000), (5_000, 45_000), (44_000, 60_000)]:
+        cache.get(time_from, time_to)
+    fetched = len(fetch.responses)
+
+    reloaded = HistoryCache("token", "5m", directory=str(tmp_path), fetch=fetch)
+    assert reloaded.get(5_000, 60_000)["data"]["items"] == [
+        item for item in fetch.expected() if 5_000 <= item["unixTime"] <= 60_000]
+    assert len(fetch.responses) == fetched  # Everything was covered already
+
+    prices, timestamps = reloaded.get_span_prices(0.25, now=60_000)
+    expected = [item for item in fetch.expected() if 60_000 - 6 * 3600 <= item["unixTime"] <= 60_000]
+    np.testing.assert_array_equal(timestamps, [item["unixTime"] for item in expected])
+    np.testing.assert_array_equal(prices, [np.nan if item["value"] is None else item["value"] for item in expected])
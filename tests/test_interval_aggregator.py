@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from utils.candle_store import OHLCV_FIELDS
+from utils.interval_aggregator import IntervalDataAggregator
+
+STEP = 300  # 5m
+
+
+def random_ticks(n, seed=0):
+    """5m ticks starting mid-candle, with random gaps (missing ticks) and volumes."""
+    rng = np.random.default_rng(seed)
+    offsets = np.cumsum(rng.choice([1, 1, 1, 2, 5], n))
+    timestamps = 1_700_000_000 // 3600 * 3600 + 35 * 60 + STEP * offsets.astype(np.int64)
+    prices = np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    volumes = rng.random(n) * 1000
+    return timestamps, prices, volumes
+
+
+def new_aggregator():
+    return IntervalDataAggregator(SimpleNamespace(interval_in_minutes=5))
+
+
+def incremental(aggregator, timestamps, prices, volumes):
+    return [aggregator.update_interval_price(value, unix_time, volume)
+            for unix_time, value, volume in zip(timestamps.tolist(), prices.tolist(), volumes.tolist())]
+
+
+def accumulator_state(accumulator):
+    return {slot: getattr(accumulator, slot) for slot in type(accumulator).__slots__}
+
+
+def assert_same_state(actual, expected):
+    assert actual.target_intervals == expected.target_intervals
+    for minutes in expected.target_intervals:
+        actual_candles = actual.interval_price_data[minutes].arrays()
+        for field, values in expected.interval_price_data[minutes].arrays().items():
+            np.testing.assert_allclose(actual_candles[field], values, rtol=1e-12, err_msg=f"{minutes} {field}")
+        expected_open = accumulator_state(expected.accumulators[minutes])
+        actual_open = accumulator_state(actual.accumulators[minutes])
+        assert actual_open.keys() == expected_open.keys()
+        for slot, value in expected_open.items():
+            assert actual_open[slot] == pytest.approx(value, rel=1e-12), (minutes, slot)
+
+
+@pytest.mark.parametrize("split", [0, 1, 7, 250, 400])
+def test_replay_matches_incremental(split):
+    """Incremental updates up to `split`, then a bulk replay, give the candles, events and open candles of updating every tick."""
+    timestamps, prices, volumes = random_ticks(400, seed=split)
+    expected = new_aggregator()
+    expected_events = incremental(expected, timestamps, prices, volumes)
+
+    aggregator = new_aggregator()
+    events = incremental(aggregator, timestamps[:split], prices[:split], volumes[:split])
+    events += list(aggregator.replay_interval_data(timestamps[split:], prices[split:], volumes[split:]))
+
+    assert len(events) == len(expected_events)
+    for event, expected_event in zip(events, expected_events):
+        assert event.keys() == expected_event.keys()
+        for minutes, candles in expected_event.items():
+            assert [candle[field] for field in OHLCV_FIELDS for candle in event[minutes]] == pytest.approx(
+                [candle[field] for field in OHLCV_FIELDS for candle in candles], rel=1e-12)
+    assert_same_state(aggregator, expected)
+
+
+def test_resample_leaves_state_unchanged():
+    timestamps, prices, volumes = random_ticks(300, seed=3)
+    aggregator = new_aggregator()
+    incremental(aggregator, timestamps[:100], prices[:100], volumes[:100])
+    before = {minutes: accumulator_state(accumulator) for minutes, accumulator in aggregator.accumulators.items()}
+    counts = {minutes: len(store) for minutes, store in aggregator.interval_price_data.items()}
+
+    candles = aggregator.resample(timestamps[100:], prices[100:], volumes[100:])
+
+    assert {minutes: accumulator_state(accumulator) for minutes, accumulator in aggregator.accumulators.items()} == before
+    assert {minutes: len(store) for minutes, store in aggregator.interval_price_data.items()} == counts
+
+    expected = incremental(aggregator, timestamps[100:], prices[100:], volumes[100:])
+    for minutes, resampled in candles.items():
+        closes = [n for n, event in enumerate(expected) if minutes in event]
+        assert resampled["close_index"].tolist() == closes
+        for field in OHLCV_FIELDS:
+            np.testing.assert_allclose(resampled[field], [expected[n][minutes][0][field] for n in closes], rtol=1e-12)
@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+
+from analytics.metrics_table import MetricsTable
+
+
+def metric_row(price):
+    return {
+        "price": np.float64(price),
+        "rsi": {"short": np.float64(55.5), "middle_short": None, "long": 40.0, "slope": None},
+        "ema": {"crossover_short_medium": [None, 1, 0]},
+        "key_zone_1": {"level": np.float64(price * 0.9), "strength": 2.0},
+        "key_zone_2": {},
+        "time": {"minute_of_day": np.int64(125), "day_of_week": 3},
+    }
+
+
+def test_rows_read_back_as_python_scalars():
+    table = MetricsTable()
+    for price in (1.5, 2.5):
+        table.append(metric_row(price))
+
+    row = table[-1]
+    assert type(row["price"]) is float and row["price"] == 2.5
+    assert type(row["rsi"]["short"]) is float and row["rsi"]["middle_short"] is None
+    assert type(row["time"]["minute_of_day"]) is int
+    assert row["ema"]["crossover_short_medium"] == [None, 1, 0]
+    assert row["key_zone_1"] == {"level": 2.25, "strength": 2.0} and row["key_zone_2"] == {}
+    assert all(type(value) is float for value in table.last("price", 2))
+
+    decoded = json.loads(json.dumps(dict(row)))
+    assert decoded["price"] == 2.5 and decoded["rsi"]["long"] == 40.0
+    assert decoded["time"] == {"minute_of_day": 125, "day_of_week": 3}
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.streaming_indicators import RollingWindow, StreamingEMA, StreamingMACD, StreamingRSI
+
+
+def random_closes(n, seed=0, scale=1e-6):
+    """Random-walk closes around `scale`, including flat stretches (zero deltas)."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.01, n)
+    steps[rng.random(n) < 0.1] = 0.0
+    return scale * np.exp(np.cumsum(steps))
+
+
+def batch_wilder_rsi(closes, period):
+    """Reference RSI: seed with the mean gain/loss of the first `period` deltas (first delta is 0), then Wilder."""
+    deltas = np.diff(closes, prepend=closes[0])
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    rsi = np.full(len(closes), np.nan)
+    if len(closes) < period:
+        return rsi
+    avg_gain = gains[:period].mean()
+    avg_loss = losses[:period].mean()
+    for i in range(period - 1, len(closes)):
+        if i >= period:
+            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        rs = 0 if avg_loss == 0 else avg_gain / avg_loss
+        rsi[i] = 100 - 100 / (1 + rs)
+    return rsi
+
+
+def streamed(stream, closes, attribute="value"):
+    values = []
+    for close in closes:
+        stream.update(close)
+        value = getattr(stream, attribute)
+        values.append(np.nan if value is None else value)
+    return np.array(values)
+
+
+@pytest.mark.parametrize("period", [1, 5, 14, 50])
+@pytest.mark.parametrize("scale", [1e-6, 100.0])
+def test_ema_matches_pandas(period, scale):
+    closes = random_closes(500, seed=period, scale=scale)
+    expected = pd.Series(closes).ewm(span=period, adjust=False).mean().to_numpy(copy=True)
+    expected[:period - 1] = np.nan
+
+    np.testing.assert_allclose(streamed(StreamingEMA(period), closes), expected, rtol=1e-12)
+    np.testing.assert_allclose(StreamingEMA(period).prime(closes)["value"], expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("period", [2, 14, 30])
+def test_rsi_matches_batch_wilder(period):
+    closes = random_closes(500, seed=period)
+    expected = batch_wilder_rsi(closes, period)
+
+    np.testing.assert_allclose(streamed(StreamingRSI(period), closes), expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(StreamingRSI(period).prime(closes)["value"], expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("period", [2, 20, 50])
+@pytest.mark.parametrize("scale", [1e-6, 100.0])
+def test_rolling_window_matches_pandas(period, scale):
+    closes = random_closes(500, seed=period, scale=scale)
+    rolling = pd.Series(closes).rolling(period)
+    expected_mean = rolling.mean().to_numpy()
+    expected_std = rolling.std().to_numpy()  # pandas leaves ~1e-8 relative noise on flat windows
+
+    window = RollingWindow(period)
+    means = streamed(window, closes, "mean")
+    window = RollingWindow(period)
+    stds = streamed(window, closes, "std")
+    np.testing.assert_allclose(means, expected_mean, rtol=1e-10)
+    np.testing.assert_allclose(stds, expected_std, rtol=1e-6, atol=scale * 1e-8)
+
+    primed = RollingWindow(period).prime(closes)
+    np.testing.assert_allclose(primed["mean"], expected_mean, rtol=1e-10)
+    np.testing.assert_allclose(primed["std"], expected_std, rtol=1e-6, atol=scale * 1e-8)
+
+
+@pytest.mark.parametrize("periods", [(12, 26, 9), (3, 7, 4)])
+@pytest.mark.parametrize("scale", [1e-6, 100.0])
+def test_macd_matches_pandas(periods, scale):
+    short_period, long_period, signal_period = periods
+    closes = pd.Series(random_closes(500, seed=long_period, scale=scale))
+    line = closes.ewm(span=short_period, adjust=False).mean() - closes.ewm(span=long_period, adjust=False).mean()
+    expected_macd = line.to_numpy(copy=True)
+    expected_signal = line.ewm(span=signal_period, adjust=False).mean().to_numpy(copy=True)
+    expected_macd[:long_period - 1] = np.nan
+    expected_signal[:long_period + signal_period - 2] = np.nan
+    atol = scale * 1e-12  # The MACD line crosses zero
+
+    macd = StreamingMACD(periods)
+    signal = []
+    for close in closes:
+        macd.update(close)
+        signal.append(np.nan if macd.signal is None else macd.signal)
+    np.testing.assert_allclose(streamed(StreamingMACD(periods), closes, "macd"), expected_macd, rtol=1e-12, atol=atol)
+    np.testing.assert_allclose(signal, expected_signal, rtol=1e-12, atol=atol)
+
+    primed = StreamingMACD(periods).prime(closes.to_numpy())
+    np.testing.assert_allclose(primed["macd"], expected_macd, rtol=1e-12, atol=atol)
+    np.testing.assert_allclose(primed["signal"], expected_signal, rtol=1e-12, atol=atol)
+    np.testing.assert_allclose(primed["histogram"], expected_macd - expected_signal, rtol=1e-12, atol=atol)
+
+
+@pytest.mark.parametrize("stream_type, period", [(StreamingEMA, 10), (StreamingRSI, 14), (RollingWindow, 20),
+                                                 (StreamingMACD, (12, 26, 9))])
+@pytest.mark.parametrize("split", [0, 5, 250])
+def test_prime_then_update_matches_streaming(stream_type, period, split):
+    """Priming on a prefix and streaming the rest gives the same values as streaming everything."""
+    closes = random_closes(400, seed=split)
+    reference = stream_type(period)
+    expected = streamed(reference, closes)
+
+    primed = stream_type(period)
+    primed.prime(closes[:split])
+    continued = streamed(primed, closes[split:])
+    np.testing.assert_allclose(continued, expected[split:], rtol=1e-9, atol=1e-12)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from scipy.signal import find_peaks
+
+from analytics.swing_points import SwingWindow
+
+
+def random_series(n, seed, decimals):
+    """Random walk rounded to `decimals`, so flat tops, flat bottoms and equal swings occur."""
+    rng = np.random.default_rng(seed)
+    return np.round(50 + np.cumsum(rng.normal(0, 1, n)), decimals)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("lookback, distance", [(100, 15), (30, 1), (30, 4), (10, 50)])
+@pytest.mark.parametrize("decimals", [0, 2])
+def test_swing_window_matches_find_peaks(seed, lookback, distance, decimals):
+    """Swings of the window plus a provisional latest value equal find_peaks on that same array."""
+    values = random_series(300, seed, decimals)
+    window = SwingWindow(lookback)
+    for t, latest in enumerate(values.tolist()):
+        start = window.window_start
+        x = np.append(values[start:t], latest)
+
+        highs_idx, highs = window.swing_highs(latest, distance)
+        expected, _ = find_peaks(x, distance=distance)
+        np.testing.assert_array_equal(highs_idx - start, expected)
+        np.testing.assert_array_equal(highs, x[expected])
+
+        lows_idx, lows = window.swing_lows(latest, distance)
+        expected, _ = find_peaks(-x, distance=distance)
+        np.testing.assert_array_equal(lows_idx - start, expected)
+        np.testing.assert_array_equal(lows, x[expected])
+
+        assert window.value_range(latest) == x.max() - x.min()
+        window.update(latest)
+
+
+def test_swing_window_reports_nan_until_it_leaves():
+    values = random_series(60, 1, 2)
+    values[20] = np.nan
+    window = SwingWindow(10)
+    for t, value in enumerate(values.tolist()):
+        window.update(value)
+        assert window.has_nan == (20 <= t < 30)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from scipy.signal import find_peaks
+
+from analytics.swing_points import select_by_distance
+from analytics.zones import _count_earlier_neighbours
+
+
+def random_levels(n, seed, decimals=None):
+    """Random-walk levels; rounding creates plateaus, ties and exact width-apart pairs."""
+    rng = np.random.default_rng(seed)
+    levels = np.cumsum(rng.normal(0, 1, n))
+    return levels if decimals is None else np.round(levels, decimals)
+
+
+def pairwise_earlier_neighbours(levels, width):
+    """Reference: the original O(p²) scan over all earlier levels."""
+    return [sum(1 for j in range(i) if abs(levels[i] - levels[j]) <= width) for i in range(len(levels))]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("decimals", [None, 1, 0])
+def test_select_by_distance_matches_find_peaks(seed, decimals):
+    x = random_levels(int(np.random.default_rng(seed).integers(2, 300)), seed, decimals)
+    maxima, _ = find_peaks(x)
+    for distance in (1, 2, 3, 7, 25, 500):
+        expected, _ = find_peaks(x, distance=distance)
+        keep = select_by_distance(maxima.tolist(), x[maxima].tolist(), distance)
+        np.testing.assert_array_equal(maxima[np.array(keep, dtype=bool)], expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("decimals", [None, 1, 0])
+def test_count_earlier_neighbours_matches_pairwise(seed, decimals):
+    levels = random_levels(int(np.random.default_rng(seed).integers(0, 200)), seed, decimals)
+    for width in (0.0, 0.1, 0.5, 1.0, 3.0):
+        assert _count_earlier_neighbours(levels, width) == pairwise_earlier_neighbours(levels.tolist(), width)
+
+
+def test_count_earlier_neighbours_at_rounding_bounds():
+    """Neighbours exactly `width` apart in decimal count even where level +- width rounds across them."""
+    levels = np.array([0.1, 0.3, 0.2, 0.30000000000000004, 0.7, 0.5, 0.1])
+    for width in (0.1, 0.2, 0.2 + 1e-17):
+        assert _count_earlier_neighbours(levels, width) == pairwise_earlier_neighbours(levels.tolist(), width)
@@ -0,0 +1,162 @@
+import numpy as np
+from typing import Dict, Iterator, Optional
+
+OHLCV_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+class CandleStore:
+    """
+    Columnar store for the completed OHLCV candles of one interval.
+
+    Every field lives in its own contiguous array (int64 timestamps, float64 prices and volume), so
+    indicator and zone code reads zero-copy NumPy windows of the aggregated candles. Single candles are
+    still available as the usual {'timestamp', 'open', 'high', 'low', 'close', 'volume'} dicts.
+    With `capacity` set the store keeps only the newest candles, using the same double-write ring
+    layout as PriceStore so the retained candles stay one contiguous slice.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, initial_size: int = 256):
+        """
+        Args:
+            capacity: Number of candles to retain (ring-buffer mode), or None to keep everything.
+            initial_size: Initial allocation for the growable mode, doubled whenever it is exhausted.
+        """
+        self.capacity = capacity
+        size = 2 * capacity if capacity else max(1, initial_size)
+        self._columns = {
+            field: np.empty(size, dtype=np.int64 if field == 'timestamp' else np.float64)
+            for field in OHLCV_FIELDS
+        }
+        self._start = 0
+        self._end = 0
+        self.total = 0  # Candles appended since creation, including ones dropped from the ring
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __bool__(self) -> bool:
+        return self._end > self._start
+
+    def __getitem__(self, index):
+        """Dict view of a single candle or a list of them for a slice."""
+        if isinstance(index, slice):
+            return [self._candle(i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("CandleStore index out of range")
+        return self._candle(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self._candle(i)
+
+    def _candle(self, i: int) -> Dict:
+        return {field: column[self._start + i].item() for field, column in self._columns.items()}
+
+    @property
+    def closes(self) -> np.ndarray:
+        """Zero-copy view of the retained close prices, oldest first."""
+        return self._columns['close'][self._start:self._end]
+
+    def arrays(self, window: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of every field over the last `window` candles (all retained candles if None)."""
+        start = max(self._start, self._end - window) if window else self._start
+        return {field: column[start:self._end] for field, column in self._columns.items()}
+
+    def append(self, candle: Dict) -> None:
+        """Append a completed candle given as an OHLCV dict."""
+        self.append_values(candle['timestamp'], candle['open'], candle['high'], candle['low'],
+                           candle['close'], candle['volume'])
+
+    def append_values(self, timestamp: int, open_: float, high: float, low: float, close: float,
+                      volume: float) -> None:
+        """Append a completed candle without building a dict."""
+        values = (timestamp, open_, high, low, close, volume)
+
+        if self.capacity:
+            pos = self.total % self.capacity
+            for column, value in zip(self._columns.values(), values):
+                column[pos] = value
+                column[pos + self.capacity] = value
+            self.total += 1
+            if self.total > self.capacity:
+                self._start = self.total % self.capacity
+                self._end = self._start + self.capacity
+            else:
+                self._end = self.total
+            return
+
+        if self._end == len(self._columns['close']):
+            self._grow()
+        for column, value in zip(self._columns.values(), values):
+            column[self._end] = value
+        self._end += 1
+        self.total += 1
+
+    def state(self) -> Dict:
+        """Retained candles and counters as plain arrays and scalars (e.g., for a checkpoint)."""
+        return {"capacity": self.capacity, "total": self.total, "columns": self.arrays()}
+
+    def load_state(self, state: Dict) -> None:
+        """Restore a state() into this empty store, which must have the same capacity."""
+        if state["capacity"] != self.capacity or self.total:
+            raise ValueError("CandleStore state does not fit this store")
+        columns, total = state["columns"], state["total"]
+        count = len(columns['close'])
+        if any(len(columns[field]) != count for field in OHLCV_FIELDS) or count > total:
+            raise ValueError("Inconsistent CandleStore state")
+
+        if self.capacity:
+            if count != min(total, self.capacity):
+                raise ValueError("Inconsistent CandleStore state")
+            positions = np.arange(total - count, total) % self.capacity
+            for field, column in self._columns.items():
+                column[positions] = columns[field]
+                column[positions + self.capacity] = columns[field]
+            self._start = total % self.capacity if total > self.capacity else 0
+        else:
+            while count > len(self._columns['close']):
+                self._grow()
+            for field, column in self._columns.items():
+                column[:count] = columns[field]
+            self._start = 0
+        self._end = self._start + count
+        self.total = total
+
+    def _grow(self) -> None:
+        for field, column in self._columns.items():
+            grown = np.empty(2 * len(column), dtype=column.dtype)
+            grown[:self._end] = column[:self._end]
+            self._columns[field] = grown
+
+
+class OHLCVAccumulator:
+    """Running open/high/low/close/volume of the candle that is currently being built, updated in place."""
+
+    __slots__ = ('open', 'high', 'low', 'close', 'volume', 'count')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.open = self.high = self.low = self.close = None
+        self.volume = 0.0
+        self.count = 0
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float, count: int = 1) -> None:
+        """Add one tick, or `count` ticks already reduced to their open/high/low/close/volume."""
+        if self.count == 0:
+            self.open = open_
+            self.high = high
+            self.low = low
+            self.volume = volume
+        else:
+            if high > self.high:
+                self.high = high
+            if low < self.low:
+                self.low = low
+            self.volume += volume
+        self.close = close
+        self.count += count
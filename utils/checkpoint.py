@@ -0,0 +1,323 @@
+import hashlib
+import io
+import os
+import pickle
+import struct
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional, Tuple
+
+from analytics.metrics_table import METRIC_SCHEMA
+from analytics.streaming_indicators import CrossoverDetector
+from analytics.swing_points import SwingWindow
+from interpretation.confidence import ZoneParameters
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bump whenever the layout of the checkpoint file itself changes. Changes of the saved state are caught by
+# the schema hash below.
+CHECKPOINT_VERSION = 2
+_MAGIC = b"SENTRYCP"
+_HEADER = struct.Struct("<8sII")  # magic, format version, length of the metadata pickle
+
+# Running state saved per object, by attribute name. Everything else (periods, lengths, capacities,
+# wiring between analyzers) is rebuilt by constructing a fresh engine and comes from the keys.
+_STATE_FIELDS = {
+    "ema": ("count", "ema"),
+    "rsi": ("count", "prev_close", "gain_sum", "loss_sum", "avg_gain", "avg_loss"),
+    "window": ("values", "shift", "sum", "sum_sq", "updates_since_rebuild"),
+    "macd": ("count",),
+    "accumulator": ("open", "high", "low", "close", "volume", "count"),
+    "crossover": ("history", "last_valid", "count"),
+    "swing_window": ("count", "last_nan"),
+    "swing_tracker": ("count", "last", "rise_start", "swings", "version"),
+    "extremes": ("count", "maxima", "minima"),
+    "fibonacci": ("current_arc", "fib_levels", "arcs"),
+    "zones": ("support_zones", "resistance_zones", "zone_cache", "cache_hits", "cache_misses"),
+    "scheduler": ("cache", "computations", "requests"),
+    "collector": ("key_zone_1", "key_zone_2", "key_zone_3", "key_zone_4", "key_zone_5", "key_zone_6"),
+}
+_MACD_EMAS = ("fast", "slow", "signal_ema")
+
+# Metric columns plus saved state fields: a checkpoint of another layout is rejected and the token replayed
+SCHEMA_HASH = hashlib.sha256(repr((METRIC_SCHEMA, _STATE_FIELDS)).encode()).hexdigest()
+
+# The state is plain containers, scalars and NumPy arrays, so nothing else may be loaded from a file
+_ALLOWED_GLOBALS = {
+    ("numpy", "ndarray"),
+    ("numpy", "dtype"),
+    ("numpy._core.multiarray", "_reconstruct"),
+    ("numpy._core.multiarray", "scalar"),
+    ("numpy._core.numeric", "_frombuffer"),
+    ("numpy.core.multiarray", "_reconstruct"),
+    ("numpy.core.multiarray", "scalar"),
+    ("numpy.core.numeric", "_frombuffer"),
+}
+
+
+class CheckpointError(ValueError):
+    """The checkpoint file is missing, corrupt or written by an incompatible version."""
+
+
+def save_checkpoint(engine, filename: str, token: Optional[str] = None) -> Dict:
+    """
+    Write the analytical state of a TradingEngine to `filename`.
+
+    Only explicit state is stored (see engine_state): the price, candle, metric and series arrays with
+    their counters, the running indicator, crossover and swing states, the partial candles of the
+    aggregator and the plain Fibonacci, zone, confidence and scheduler state. A restored engine computes
+    bit-identical metrics for the next tick. The file is replaced atomically.
+
+    Returns:
+        dict: The metadata stored in the header.
+    """
+    collector = engine.metric_collector
+    metadata = {
+        "version": CHECKPOINT_VERSION,
+        "token": token,
+        "interval": engine.interval,
+        "points": len(collector.metrics),
+        "last_timestamp": collector.price_data.last_timestamp if collector.price_data else None,
+        "schema_hash": SCHEMA_HASH,
+        "created": time.time(),
+    }
+    meta_bytes = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+    state_bytes = pickle.dumps(engine_state(engine), protocol=pickle.HIGHEST_PROTOCOL)
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{filename}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, CHECKPOINT_VERSION, len(meta_bytes)))
+        file.write(meta_bytes)
+        file.write(state_bytes)
+    os.replace(temporary, filename)
+    return metadata
+
+
+def read_checkpoint_metadata(filename: str) -> Dict:
+    """Header metadata of a checkpoint without loading the engine state."""
+    try:
+        with open(filename, "rb") as file:
+            return _read_header(file)
+    except FileNotFoundError as e:
+        raise CheckpointError(f"No checkpoint at {filename}") from e
+
+
+def load_checkpoint(filename: str, timings=None) -> Tuple[object, Dict]:
+    """
+    Restore a TradingEngine written by save_checkpoint into a freshly constructed engine.
+
+    Args:
+        filename: Checkpoint file.
+        timings: Optional StageTimings for the restored engine, as for TradingEngine.
+
+    Returns:
+        tuple: (engine, metadata)
+
+    Raises:
+        CheckpointError: If the file is missing, corrupt, or was written by another format version or
+                         state schema.
+    """
+    try:
+        with open(filename, "rb") as file:
+            metadata = _read_header(file)
+            state = _Unpickler(file).load()
+        engine = restore_engine_state(metadata["interval"], state, timings)
+    except CheckpointError:
+        raise
+    except FileNotFoundError as e:
+        raise CheckpointError(f"No checkpoint at {filename}") from e
+    except Exception as e:
+        # Any failure to read or apply the state means the checkpoint is unusable, never a crash
+        raise CheckpointError(f"Corrupt checkpoint {filename}: {e!r}") from e
+    return engine, metadata
+
+
+def engine_state(engine) -> Dict:
+    """Explicit state of a TradingEngine as plain containers, scalars and NumPy arrays."""
+    collector = engine.metric_collector
+    aggregator = collector.interval_data_aggregator
+    indicators = collector.indicator_analyzer
+    confidence = collector.confidence_calculator
+    return {
+        "prices": collector.price_data.state(),
+        "metrics": collector.metrics.state(),
+        "series": {name: series.state() for name, series in collector.series.series.items()},
+        "collector": _fields(collector, "collector"),
+        "target_intervals": aggregator.target_intervals,
+        "candles": {minutes: store.state() for minutes, store in aggregator.interval_price_data.items()},
+        "accumulators": {minutes: _fields(accumulator, "accumulator")
+                         for minutes, accumulator in aggregator.accumulators.items()},
+        "streams": [(key, _stream_state(key[0], stream)) for key, stream in indicators.engine.streams.items()],
+        "crossovers": {key: _fields(detector, "crossover")
+                       for key, detector in indicators.crossover_detectors.items()},
+        "swing_windows": {key: tuple(_swing_window_state(window) for window in windows)
+                          for key, windows in indicators.swing_windows.items()},
+        "fibonacci": _fields(collector.fibonacci_analyzer, "fibonacci"),
+        "zones": _fields(collector.zone_analyzer, "zones"),
+        "scheduler": _fields(collector.scheduler, "scheduler"),
+        "zone_confidence": confidence.zone_confidence,
+        "zone_settings": {zone: (params.alpha, params.threshold, params.decay_rate)
+                          for zone, params in confidence.settings.zone_settings.items()},
+    }
+
+
+def restore_engine_state(interval: str, state: Dict, timings=None):
+    """New TradingEngine for `interval` with the state of engine_state() loaded into it."""
+    from actions.tradingEngine import TradingEngine  # actions builds on utils, not the other way round
+
+    engine = TradingEngine(interval, None, timings=timings)
+    collector = engine.metric_collector
+    aggregator = collector.interval_data_aggregator
+    indicators = collector.indicator_analyzer
+    confidence = collector.confidence_calculator
+
+    collector.price_data.load_state(state["prices"])
+    collector.metrics.load_state(state["metrics"])
+    for name, series_state in state["series"].items():
+        collector.series.register(name, series_state["capacity"]).load_state(series_state)
+    _set_fields(collector, state["collector"], "collector")
+
+    if state["target_intervals"] is not None:
+        aggregator.initialize_intervals(state["target_intervals"])
+    for minutes, store_state in state["candles"].items():
+        aggregator.interval_price_data[minutes].load_state(store_state)
+    for minutes, fields in state["accumulators"].items():
+        _set_fields(aggregator.accumulators[minutes], fields, "accumulator")
+
+    for (indicator, stream_interval, period), stream_state in state["streams"]:
+        _load_stream_state(indicator, indicators.engine.get(indicator, stream_interval, period), stream_state)
+    for key, fields in state["crossovers"].items():
+        detector = indicators.crossover_detectors[key] = CrossoverDetector(key[2])
+        _set_fields(detector, fields, "crossover")
+    for (rsi_field, lookback), window_states in state["swing_windows"].items():
+        windows = (SwingWindow(lookback), SwingWindow(lookback))
+        for window, window_state in zip(windows, window_states):
+            _load_swing_window_state(window, window_state)
+        indicators.swing_windows[(rsi_field, lookback)] = windows
+
+    _set_fields(collector.fibonacci_analyzer, state["fibonacci"], "fibonacci")
+    _set_fields(collector.zone_analyzer, state["zones"], "zones")
+    _set_fields(collector.scheduler, state["scheduler"], "scheduler")
+    confidence.zone_confidence = state["zone_confidence"]
+    confidence.settings.zone_settings = {zone: ZoneParameters(*params)
+                                         for zone, params in state["zone_settings"].items()}
+    return engine
+
+
+def _fields(obj, kind: str) -> Dict:
+    """Saved attributes of `obj`; deques and defaultdicts become lists and dicts."""
+    fields = {}
+    for name in _STATE_FIELDS[kind]:
+        value = getattr(obj, name)
+        if isinstance(value, deque):
+            value = list(value)
+        elif isinstance(value, defaultdict):
+            value = dict(value)
+        fields[name] = value
+    return fields
+
+
+def _set_fields(obj, fields: Dict, kind: str) -> None:
+    """Inverse of _fields: containers take the type (and deque maxlen) of the freshly constructed object."""
+    for name in _STATE_FIELDS[kind]:
+        current, value = getattr(obj, name), fields[name]
+        if isinstance(current, deque):
+            value = deque(value, maxlen=current.maxlen)
+        elif isinstance(current, defaultdict):
+            value = defaultdict(current.default_factory, value)
+        setattr(obj, name, value)
+
+
+def _stream_state(indicator: str, stream) -> Dict:
+    fields = _fields(stream, indicator)
+    if indicator == "macd":
+        for name in _MACD_EMAS:
+            fields[name] = _fields(getattr(stream, name), "ema")
+    return fields
+
+
+def _load_stream_state(indicator: str, stream, fields: Dict) -> None:
+    _set_fields(stream, fields, indicator)
+    if indicator == "macd":
+        for name in _MACD_EMAS:
+            _set_fields(getattr(stream, name), fields[name], "ema")
+
+
+def _swing_window_state(window: SwingWindow) -> Dict:
+    fields = _fields(window, "swing_window")
+    fields["highs"] = _fields(window.highs, "swing_tracker")
+    fields["lows"] = _fields(window.lows, "swing_tracker")
+    fields["extremes"] = _fields(window.extremes, "extremes")
+    return fields
+
+
+def _load_swing_window_state(window: SwingWindow, fields: Dict) -> None:
+    _set_fields(window, fields, "swing_window")
+    _set_fields(window.highs, fields["highs"], "swing_tracker")
+    _set_fields(window.lows, fields["lows"], "swing_tracker")
+    _set_fields(window.extremes, fields["extremes"], "extremes")
+
+
+class _Unpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) not in _ALLOWED_GLOBALS:
+            raise pickle.UnpicklingError(f"Checkpoint refers to {module}.{name}")
+        return super().find_class(module, name)
+
+
+def _read_header(file) -> Dict:
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise CheckpointError("Truncated checkpoint header")
+    magic, version, meta_length = _HEADER.unpack(header)
+    if magic != _MAGIC:
+        raise CheckpointError("Not a checkpoint file")
+    if version != CHECKPOINT_VERSION:
+        raise CheckpointError(f"Checkpoint version {version}, expected {CHECKPOINT_VERSION}")
+    try:
+        metadata = _Unpickler(io.BytesIO(file.read(meta_length))).load()
+        schema_hash = metadata["schema_hash"]
+    except Exception as e:
+        raise CheckpointError(f"Corrupt checkpoint header: {e!r}") from e
+    if schema_hash != SCHEMA_HASH:
+        raise CheckpointError("Checkpoint was written with a different metric or state schema")
+    return metadata
+
+
+class CheckpointWriter:
+    """
+    Periodic checkpoints of one engine: call maybe_save() after each processed point and save() on
+    shutdown. A checkpoint is written when `every_seconds` have passed or `every_points` new points were
+    processed since the last one, whichever comes first.
+    """
+
+    def __init__(self, engine, filename: str, token: Optional[str] = None,
+                 every_seconds: Optional[float] = 900, every_points: Optional[int] = None):
+        self.engine = engine
+        self.filename = filename
+        self.token = token
+        self.every_seconds = every_seconds
+        self.every_points = every_points
+        self.last_saved = time.monotonic()
+        self.saved_points = len(engine.metric_collector.metrics)
+
+    def maybe_save(self) -> bool:
+        points = len(self.engine.metric_collector.metrics)
+        due = (self.every_points and points - self.saved_points >= self.every_points) or \
+              (self.every_seconds and time.monotonic() - self.last_saved >= self.every_seconds)
+        if not due:
+            return False
+        self.save()
+        return True
+
+    def save(self) -> None:
+        start = time.perf_counter()
+        metadata = save_checkpoint(self.engine, self.filename, self.token)
+        self.last_saved = time.monotonic()
+        self.saved_points = metadata["points"]
+        logger.info("Checkpoint of %d points written to %s in %.3fs", metadata["points"], self.filename,
+                    time.perf_counter() - start)
@@ -0,0 +1,138 @@
+import json
+import time
+from typing import Dict, Iterable, Optional, Union
+
+# Log-linear buckets: values below 2 * _SUB ns are exact, above that every power of two is split into
+# _SUB buckets (relative error below 1 / _SUB). 1024 buckets cover far beyond any realistic latency.
+_SUB_BITS = 4
+_SUB = 1 << _SUB_BITS
+_BUCKETS = 1024
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of durations, recording in constant time without keeping samples."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record_ns(self, duration_ns: int) -> None:
+        if duration_ns < 2 * _SUB:
+            index = max(duration_ns, 0)
+        else:
+            shift = duration_ns.bit_length() - _SUB_BITS - 1
+            index = min(shift * _SUB + (duration_ns >> shift), _BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Duration in seconds below which a fraction q (0-1) of the recorded durations fall, or None if empty."""
+        if not self.count:
+            return None
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(_bucket_midpoint(index), self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_s": self.total_ns / 1e9,
+            "mean_s": self.total_ns / self.count / 1e9 if self.count else None,
+            "p50_s": self.percentile(0.50),
+            "p95_s": self.percentile(0.95),
+            "p99_s": self.percentile(0.99),
+            "max_s": self.max_ns / 1e9 if self.count else None,
+        }
+
+
+def _bucket_midpoint(index: int) -> float:
+    if index < 2 * _SUB:
+        return index
+    shift = index // _SUB - 1
+    mantissa = index - shift * _SUB
+    return ((mantissa << shift) + ((mantissa + 1) << shift)) / 2
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: "StageTimings", name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record_ns(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimings:
+    """
+    Opt-in wall-time histograms per named pipeline stage of one token.
+
+    Use `with timings.stage("zones"): ...` around a stage. While disabled, stage() returns a shared no-op
+    context manager, so instrumented code pays only a method call per stage.
+    """
+
+    def __init__(self, enabled: bool = False, token: Optional[str] = None):
+        self.enabled = enabled
+        self.token = token
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record_ns(self, name: str, duration_ns: int) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record_ns(duration_ns)
+
+    def reset(self) -> None:
+        self.histograms.clear()
+
+    def to_dict(self) -> Dict:
+        return {
+            "token": self.token,
+            "stages": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+
+
+def export_timings(timings: Iterable[Union[StageTimings, Dict]], filename: str) -> None:
+    """
+    Write the stage histograms of several tokens as one JSON document ({'tokens': [...]}).
+
+    Entries are StageTimings or their to_dict() (e.g., as returned by backtest worker processes).
+    """
+    with open(filename, "w") as file:
+        json.dump({"tokens": [entry if isinstance(entry, dict) else entry.to_dict() for entry in timings]},
+                  file, indent=4)
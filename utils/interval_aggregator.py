@@ -1,22 +1,41 @@
 from collections import defaultdict
-from typing import Dict, List
-import pandas as pd
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+from utils.candle_store import CandleStore, OHLCVAccumulator, OHLCV_FIELDS
 
 class IntervalDataAggregator:
-    def __init__(self, metrics_collector):
+    def __init__(self, metrics_collector, max_candles: Optional[int] = None):
         """
         Initialize aggregator for multi-time-frame OHLCV data.
 
         Args:
             metrics_collector: Instance of MetricCollector, providing base interval and other attributes.
+            max_candles: Completed candles retained per interval, or None (the default) to keep all of
+                         them. Plots and engine snapshots read the full candle history, so only bound
+                         it for engines that never export it.
         """
         self.metrics_collector = metrics_collector
         self.base_interval_in_minutes = metrics_collector.interval_in_minutes
+        self.max_candles = max_candles
 
-        # Interval-based OHLCV data
-        self.interval_price_data = defaultdict(list)  # {interval_minutes: [{'timestamp', 'open', 'high', 'low', 'close', 'volume'}, ...]}
-        self.partial_candles = defaultdict(list)  # {interval_minutes: [price_points for current candle]}
+        # Interval-based OHLCV data. Plain price ticks of the base interval are not duplicated here,
+        # they are read from the collector's PriceStore.
+        self.interval_price_data = defaultdict(self._new_candle_store)  # {interval_minutes: CandleStore of completed candles}
+        self.accumulators = {}  # {interval_minutes: OHLCVAccumulator of the candle being built}
         self.target_intervals = None  # Set in initialize_intervals
+        self.candle_listeners: List[Callable[[int], None]] = []  # Called with the interval of every closed candle
+
+    def add_candle_listener(self, callback: Callable[[int], None]) -> None:
+        """Register a callback invoked with interval_minutes whenever candles of that interval are completed."""
+        self.candle_listeners.append(callback)
+
+    def _notify_candle_close(self, intervals: Iterable[int]) -> None:
+        for interval_minutes in intervals:
+            for callback in self.candle_listeners:
+                callback(interval_minutes)
+
+    def _new_candle_store(self) -> CandleStore:
+        return CandleStore(capacity=self.max_candles)
 
     def initialize_intervals(self, target_intervals: List[int] = None) -> None:
         """
@@ -24,21 +43,26 @@ class IntervalDataAggregator:
 
         Args:
             target_intervals: List of target interval minutes (e.g., [60, 240] for 1h, 4h).
-                              Defaults to [60, 240].
+                              Defaults to [15, 60, 240].
         """
-        self.target_intervals = target_intervals if target_intervals is not None else [60, 240]
+        self.target_intervals = target_intervals if target_intervals is not None else [15, 60, 240]
         # Initialize base interval
         if self.base_interval_in_minutes not in self.interval_price_data:
-            self.interval_price_data[self.base_interval_in_minutes] = []
+            self.interval_price_data[self.base_interval_in_minutes] = self._new_candle_store()
         # Initialize target intervals
         for interval_minutes in self.target_intervals:
             if interval_minutes not in self.interval_price_data:
-                self.interval_price_data[interval_minutes] = []
+                self.interval_price_data[interval_minutes] = self._new_candle_store()
+            if interval_minutes not in self.accumulators:
+                self.accumulators[interval_minutes] = OHLCVAccumulator()
 
     def update_interval_data(self, price_point: Dict, ohlcv: bool = False) -> Dict[int, List[Dict]]:
         """
         Update interval-based OHLCV data with a new price point.
 
+        The running candle of every target interval is updated in place; a candle dict is only built
+        when a candle completes.
+
         Args:
             price_point: Dict with 'value' and 'unixTime' (or OHLCV if ohlcv=True).
             ohlcv: If True, treat as OHLCV.
@@ -46,65 +70,145 @@ class IntervalDataAggregator:
         Returns:
             Dict: {interval_minutes: [new_candles]} for completed candles.
         """
-        # Initialize intervals if not already done
+        unix_time = price_point['unixTime']  # Already in Unix time (seconds)
+        volume = price_point.get('volume', 0)
+        if not ohlcv:
+            return self.update_interval_price(price_point['value'], unix_time, volume)
+
         if self.target_intervals is None:
             self.initialize_intervals()
+        open_, high, low, close = price_point['open'], price_point['high'], price_point['low'], price_point['close']
+        # Add to base interval (e.g., 5m); plain price ticks already live in the shared PriceStore
+        self.interval_price_data[self.base_interval_in_minutes].append_values(unix_time, open_, high, low, close, volume)
+        return self._update_candles(unix_time, open_, high, low, close, volume)
 
-        # Normalize price point to OHLCV format with Unix timestamp
-        unix_time = price_point['unixTime']  # Already in Unix time (seconds)
-        if ohlcv:
-            candle = {
-                'timestamp': unix_time,
-                'open': price_point['open'],
-                'high': price_point['high'],
-                'low': price_point['low'],
-                'close': price_point['close'],
-                'volume': price_point.get('volume', 0)
-            }
-        else:
-            candle = {
-                'timestamp': unix_time,
-                'open': price_point['value'],
-                'high': price_point['value'],
-                'low': price_point['value'],
-                'close': price_point['value'],
-                'volume': price_point.get('volume', 0)
-            }
-
-        # Add to base interval (e.g., 5m)
-        self.interval_price_data[self.base_interval_in_minutes].append(candle)
+    def update_interval_price(self, value: float, unix_time: int, volume: float = 0) -> Dict[int, List[Dict]]:
+        """update_interval_data for a plain price tick given as values (e.g., read from price columns)."""
+        if self.target_intervals is None:
+            self.initialize_intervals()
+        return self._update_candles(unix_time, value, value, value, value, volume)
 
-        # Update larger intervals
+    def _update_candles(self, unix_time, open_, high, low, close, volume) -> Dict[int, List[Dict]]:
+        """Advance the running candle of every target interval and return the completed candles."""
         new_candles = {}
+        next_ts = unix_time + (self.base_interval_in_minutes * 60)
+        for interval_minutes in self.target_intervals:
+            accumulator = self.accumulators[interval_minutes]
+            accumulator.update(open_, high, low, close, volume)
+
+            # The candle is complete if the next price point would fall into a new interval
+            interval_seconds = interval_minutes * 60
+            interval_start = (unix_time // interval_seconds) * interval_seconds
+            if interval_start != (next_ts // interval_seconds) * interval_seconds:
+                new_candle = {
+                    'timestamp': interval_start,  # Start of interval (Unix time)
+                    'open': accumulator.open,
+                    'high': accumulator.high,
+                    'low': accumulator.low,
+                    'close': accumulator.close,
+                    'volume': accumulator.volume
+                }
+                self.interval_price_data[interval_minutes].append(new_candle)
+                new_candles[interval_minutes] = [new_candle]
+                accumulator.reset()
+
+        self._notify_candle_close(new_candles)
+        return new_candles
+
+    def resample(self, timestamps: np.ndarray, prices: np.ndarray,
+                 volumes: np.ndarray = None) -> Dict[int, Dict[str, np.ndarray]]:
+        """
+        Vectorized resampling of consecutive base-interval ticks to every target interval.
+
+        Candles complete with the same rule as update_interval_data, and the first candle of each
+        interval continues the partial candle currently held by its accumulator. The aggregator state
+        is not modified.
+
+        Args:
+            timestamps: Unix timestamps (seconds) of the ticks, oldest first.
+            prices: Tick prices aligned with `timestamps`.
+            volumes: Tick volumes (optional, zeros if omitted).
+
+        Returns:
+            Dict: {interval_minutes: {'timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_index'}}
+                  with one array entry per completed candle. 'close_index' is the position of the tick
+                  that completed the candle.
+        """
+        if self.target_intervals is None:
+            self.initialize_intervals()
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.zeros(len(prices)) if volumes is None else np.asarray(volumes, dtype=np.float64)
+
+        candles = {}
         for interval_minutes in self.target_intervals:
-            # Add to partial candle
-            self.partial_candles[interval_minutes].append(candle)
-
-            # Determine if the candle is complete based on timestamp
-            if self.partial_candles[interval_minutes]:
-                latest_ts = self.partial_candles[interval_minutes][-1]['timestamp']
-                # Calculate the start of the current interval (in Unix time)
-                interval_seconds = interval_minutes * 60
-                interval_start = (latest_ts // interval_seconds) * interval_seconds
-                # Check if the next price point would fall into a new interval
-                next_ts = latest_ts + (self.base_interval_in_minutes * 60)
-                next_interval_start = (next_ts // interval_seconds) * interval_seconds
-                if interval_start != next_interval_start:
-                    # Complete the candle
-                    df = pd.DataFrame(self.partial_candles[interval_minutes])
-                    new_candle = {
-                        'timestamp': interval_start,  # Start of interval (Unix time)
-                        'open': df['open'].iloc[0],
-                        'high': df['high'].max(),
-                        'low': df['low'].min(),
-                        'close': df['close'].iloc[-1],
-                        'volume': df['volume'].sum()
-                    }
+            close_index = np.flatnonzero(self.candle_close_mask(timestamps, interval_minutes))
+            starts = np.r_[0, close_index[:-1] + 1] if len(close_index) else close_index
+            end = close_index[-1] + 1 if len(close_index) else 0
+            interval_seconds = interval_minutes * 60
+            resampled = {
+                'timestamp': timestamps[close_index] // interval_seconds * interval_seconds,
+                'open': prices[starts],
+                'high': np.maximum.reduceat(prices[:end], starts) if end else prices[:0],
+                'low': np.minimum.reduceat(prices[:end], starts) if end else prices[:0],
+                'close': prices[close_index],
+                'volume': np.add.reduceat(volumes[:end], starts) if end else volumes[:0],
+                'close_index': close_index,
+            }
+
+            accumulator = self.accumulators[interval_minutes]
+            if end and accumulator.count:
+                resampled['open'][0] = accumulator.open
+                resampled['high'][0] = max(resampled['high'][0], accumulator.high)
+                resampled['low'][0] = min(resampled['low'][0], accumulator.low)
+                resampled['volume'][0] += accumulator.volume
+            candles[interval_minutes] = resampled
+        return candles
+
+    def replay_interval_data(self, timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray = None):
+        """
+        Bulk-resample a price history, then hand out its candles tick by tick.
+
+        For callers that evaluate every tick (e.g. a warmup computing per-point metrics) and must only
+        see the candles completed so far. The resampling runs immediately; the returned generator
+        yields, for every tick, the dict update_interval_data would have returned after appending that
+        tick's completed candles. It must be consumed completely; the accumulators are primed after
+        the last tick.
+        """
+        candles = self.resample(timestamps, prices, volumes)
+        return self._replay(candles, prices, volumes)
+
+    def _replay(self, candles: Dict[int, Dict[str, np.ndarray]], prices: np.ndarray, volumes: np.ndarray = None):
+        positions = {interval_minutes: 0 for interval_minutes in candles}
+        for n in range(len(prices)):
+            new_candles = {}
+            for interval_minutes, resampled in candles.items():
+                j = positions[interval_minutes]
+                if j < len(resampled['close_index']) and resampled['close_index'][j] == n:
+                    new_candle = {field: resampled[field][j].item() for field in OHLCV_FIELDS}
                     self.interval_price_data[interval_minutes].append(new_candle)
                     new_candles[interval_minutes] = [new_candle]
-                    self.partial_candles[interval_minutes] = []  # Reset partial candle
+                    positions[interval_minutes] = j + 1
+            self._notify_candle_close(new_candles)
+            yield new_candles
+        self._prime_accumulators(candles, prices, volumes)
 
-        return new_candles
+    def _prime_accumulators(self, candles: Dict[int, Dict[str, np.ndarray]], prices: np.ndarray,
+                            volumes: np.ndarray = None) -> None:
+        """Leave every accumulator holding the ticks after the last completed candle of a bulk update."""
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.zeros(len(prices)) if volumes is None else np.asarray(volumes, dtype=np.float64)
+        for interval_minutes, resampled in candles.items():
+            accumulator = self.accumulators[interval_minutes]
+            if len(resampled['close_index']):
+                accumulator.reset()
+                tail_start = resampled['close_index'][-1] + 1
+            else:
+                tail_start = 0
+            tail = prices[tail_start:]
+            if len(tail):
+                accumulator.update(float(tail[0]), float(tail.max()), float(tail.min()), float(tail[-1]),
+                                   float(volumes[tail_start:].sum()), count=len(tail))
 
     def get_interval_data(self, interval_minutes: int, window: int = None) -> List[Dict]:
         """
@@ -117,10 +221,63 @@ class IntervalDataAggregator:
         Returns:
             List of dicts with OHLCV data (timestamps in Unix time).
         """
-        data = self.interval_price_data.get(interval_minutes, [])
-        if window:
-            return data[-window:]
-        return data
+        if self._base_from_store(interval_minutes):
+            store = self.metrics_collector.price_data
+        else:
+            store = self.interval_price_data.get(interval_minutes)
+            if store is None:
+                return []
+        return store[-window:] if window else list(store)
+
+    def get_interval_arrays(self, interval_minutes: int, window: int = None) -> Dict[str, np.ndarray]:
+        """
+        Retrieve OHLCV data for a specific interval as one array per field.
+
+        Args:
+            interval_minutes: Target interval in minutes (e.g., 60 for 1h).
+            window: Number of candles to return (optional).
+
+        Returns:
+            Dict of zero-copy arrays keyed by 'timestamp', 'open', 'high', 'low', 'close' and 'volume'.
+            Plain base-interval ticks are served from the PriceStore (open = high = low = close).
+        """
+        if self._base_from_store(interval_minutes):
+            store = self.metrics_collector.price_data
+            prices = store.prices[-window:] if window else store.prices
+            timestamps = store.timestamps[-window:] if window else store.timestamps
+            return {'timestamp': timestamps, 'open': prices, 'high': prices, 'low': prices,
+                    'close': prices, 'volume': np.zeros(len(prices))}
+
+        store = self.interval_price_data.get(interval_minutes)
+        if store is None:
+            store = CandleStore(initial_size=1)
+        return store.arrays(window)
+
+    def candle_close_mask(self, timestamps: np.ndarray, interval_minutes: int) -> np.ndarray:
+        """
+        Mark the base-interval ticks that complete a candle of `interval_minutes`.
+
+        Uses the same rule as update_interval_data (the next tick would start a new interval), so the
+        close of each candle is the price of the marked tick.
+
+        Args:
+            timestamps: Unix timestamps (seconds) of consecutive base-interval ticks.
+            interval_minutes: Target interval in minutes.
+
+        Returns:
+            Boolean array aligned with `timestamps`.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if interval_minutes == self.base_interval_in_minutes:
+            return np.ones(len(timestamps), dtype=bool)
+        interval_seconds = interval_minutes * 60
+        next_timestamps = timestamps + self.base_interval_in_minutes * 60
+        return (timestamps // interval_seconds) != (next_timestamps // interval_seconds)
+
+    def _base_from_store(self, interval_minutes: int) -> bool:
+        """True if the base interval consists of plain price ticks held by the PriceStore."""
+        return (interval_minutes == self.base_interval_in_minutes
+                and not self.interval_price_data.get(interval_minutes))
 
     def determine_largest_interval(self) -> int:
         """
@@ -129,10 +286,10 @@ class IntervalDataAggregator:
         Returns:
             int: Largest interval in minutes (e.g., 1440 for 1D).
         """
-        if not self.interval_price_data[self.base_interval_in_minutes]:
+        timestamps = self.get_interval_arrays(self.base_interval_in_minutes)['timestamp']
+        if len(timestamps) == 0:
             return self.base_interval_in_minutes
-        age_seconds = (self.interval_price_data[self.base_interval_in_minutes][-1]['timestamp'] -
-                       self.interval_price_data[self.base_interval_in_minutes][0]['timestamp'])
+        age_seconds = int(timestamps[-1] - timestamps[0])
         age_minutes = age_seconds / 60
         available_intervals = sorted(self.target_intervals + [self.base_interval_in_minutes, 1440, 10080, 43200])
         for interval in reversed(available_intervals):
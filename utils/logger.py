@@ -0,0 +1,139 @@
+import contextvars
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+LOG_LEVEL_ENV = "SENTRY_LOG_LEVEL"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(token)s] %(message)s"
+
+_token = contextvars.ContextVar("token", default="-")
+_handler: Optional[logging.Handler] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Module logger (use `get_logger(__name__)`).
+
+    Pass values as arguments instead of pre-formatting them (`logger.debug("levels: %s", levels)`), so
+    disabled levels cost one level check and the message is only formatted when a handler emits it.
+    """
+    return logging.getLogger(name)
+
+
+def set_token(token: Optional[str]) -> None:
+    """Set the token shown in log records of the current context (asyncio task, thread or process)."""
+    _token.set(token or "-")
+
+
+@contextmanager
+def token_context(token: Optional[str]):
+    """Tag all log records emitted inside the block with `token`."""
+    reset = _token.set(token or "-")
+    try:
+        yield
+    finally:
+        _token.reset(reset)
+
+
+class lazy:
+    """Log argument that calls `func(*args, **kwargs)` only when the message is formatted."""
+
+    __slots__ = ("func", "args", "kwargs")
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args, **self.kwargs))
+
+
+class TokenContextFilter(logging.Filter):
+    """Adds the current token context as `record.token`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.token = _token.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits repeated records per (logger, message template, token).
+
+    Records of WARNING and above always pass. Below that, `sample_every` keeps every n-th record of a
+    template and `max_per_second` drops records beyond that rate; dropped records are counted and the
+    count is appended to the next record of the template that passes.
+    """
+
+    def __init__(self, max_per_second: Optional[float] = None, sample_every: Optional[int] = None):
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.sample_every = sample_every
+        self.state: Dict[Tuple, list] = {}  # key -> [seen, last emit time, dropped]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg, getattr(record, "token", _token.get()))
+        state = self.state.get(key)
+        if state is None:
+            state = self.state[key] = [0, float("-inf"), 0]
+        state[0] += 1
+
+        passed = True
+        if self.sample_every and (state[0] - 1) % self.sample_every:
+            passed = False
+        elif self.max_per_second:
+            now = time.monotonic()
+            if now - state[1] < 1.0 / self.max_per_second:
+                passed = False
+            else:
+                state[1] = now
+
+        if not passed:
+            state[2] += 1
+            return False
+        if state[2]:
+            record.msg = f"{record.msg} ({state[2]} similar suppressed)"
+            state[2] = 0
+        return True
+
+
+def configure_logging(level=None, max_per_second: Optional[float] = None, sample_every: Optional[int] = None,
+                      stream=None) -> logging.Handler:
+    """
+    Install the application log handler on the root logger (replacing one installed before).
+
+    Args:
+        level: Log level name or number; defaults to $SENTRY_LOG_LEVEL or INFO. Per-tick messages of the
+               metric pipeline are DEBUG, so they cost nothing unless DEBUG is enabled.
+        max_per_second: Optional rate limit per message template below WARNING.
+        sample_every: Optional sampling, keep every n-th record per message template below WARNING.
+        stream: Output stream (default: stderr).
+
+    Returns:
+        The installed handler.
+    """
+    global _handler
+    if level is None:
+        level = os.getenv(LOG_LEVEL_ENV, "INFO")
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(TokenContextFilter())
+    if max_per_second or sample_every:
+        handler.addFilter(RateLimitFilter(max_per_second=max_per_second, sample_every=sample_every))
+    root.addHandler(handler)
+    root.setLevel(level)
+    _handler = handler
+    return handler
@@ -3,6 +3,26 @@ import os
 
 import os
 import json
+import mmap
+import re
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Columnar history files (.bin): magic, format version and header length, a JSON header, then one raw
+# little-endian array per item field at 64-byte aligned offsets
+HISTORY_MAGIC = b"SNTRYHST"
+HISTORY_VERSION = 1
+_HISTORY_PREFIX = struct.Struct("<8sII")
+_ALIGN = 64
+_HISTORY_NAME = re.compile(r"historical_price_(?P<token>[^_]+)_(?P<interval>[^_]+)_(?P<span>\d+)_(?P<ohlcv>True|False)")
+_CACHE_NAME = re.compile(r"cache_(?P<token>[^_]+)_(?P<interval>[^_]+)_(?P<ohlcv>True|False)\.bin$")
 
 def save_historical_data_to_file(data, filename="historical_price.json"):
     """
@@ -12,7 +32,7 @@ def save_historical_data_to_file(data, filename="historical_price.json"):
     :param filename: The name of the file to store data, can include path (e.g., "folder/subfolder/file.json").
     """
     if data is None:
-        print("No data to save.")
+        logger.warning("No data to save.")
         return
     
     # Extract directory path from filename
@@ -22,28 +42,29 @@ def save_historical_data_to_file(data, filename="historical_price.json"):
     if directory and not os.path.exists(directory):
         try:
             os.makedirs(directory)
-            print(f"Created directory: {directory}")
+            logger.info("Created directory: %s", directory)
         except Exception as e:
-            print(f"Error creating directory {directory}: {e}")
+            logger.error("Error creating directory %s: %s", directory, e)
             return
     
     # Save the file
     try:
         with open(filename, "w") as file:
             json.dump(data, file, indent=4)
-        print(f"Data successfully saved to {filename}")
+        logger.info("Data successfully saved to %s", filename)
     except Exception as e:
-        print(f"Error saving data: {e}")
+        logger.error("Error saving data: %s", e)
         
 def load_historical_data_from_file(filename="historical_price.json"):
     """
-    Loads historical price data from a JSON file.
+    Loads historical price data from a JSON file. Columnar (.bin) files are read with
+    load_historical_columns, or as arrays with load_historical_prices.
 
     :param filename: The name of the file to read data from.
     :return: The historical price data in the same format as returned by `get_historical_price`.
     """
     if not os.path.exists(filename):
-        print("No stored data found.")
+        logger.info("No stored data found.")
         return None
 
     try:
@@ -51,37 +72,262 @@ def load_historical_data_from_file(filename="historical_price.json"):
             data = json.load(file)
         return data
     except Exception as e:
-        print(f"Error loading data: {e}")
+        logger.error("Error loading data: %s", e)
         return None
 
 
+def load_historical_prices(filename) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Price and timestamp arrays of a stored history: zero-copy views of a memory-mapped .bin file, or
+    arrays built once from a JSON file. Feed them to TradingEngine.from_price_arrays.
+
+    Returns:
+        tuple: (prices, timestamps)
+
+    Raises:
+        FileNotFoundError: If there is no such file.
+    """
+    if filename.endswith(".bin"):
+        history = load_historical_columns(filename)
+        return history.prices, history.timestamps
+    data = load_historical_data_from_file(filename)
+    if not data:
+        raise FileNotFoundError(f"No stored history in {filename}")
+    return historical_price_arrays(data)
+
+
+def historical_price_arrays(data) -> Tuple[np.ndarray, np.ndarray]:
+    """(prices, timestamps) of historical data in the {'data': {'items': [...]}} layout ('c' for OHLCV items)."""
+    items = data["data"]["items"]
+    prices = np.fromiter((item["value"] if "value" in item else item["c"] for item in items),
+                         dtype=np.float64, count=len(items))
+    timestamps = np.fromiter((item["unixTime"] for item in items), dtype=np.int64, count=len(items))
+    return prices, timestamps
+
+
+class HistoricalColumns:
+    """
+    Memory-mapped columnar history file. Columns are zero-copy, read-only views of the mapped file.
+
+    Numeric item fields ('unixTime', 'value' or the OHLCV fields) are columns; string fields that are the
+    same for every item (e.g., 'address') are stored once in the header as constants.
+    """
+
+    def __init__(self, header: Dict, columns: Dict[str, np.ndarray]):
+        self.header = header
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return self.header["count"]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.columns["unixTime"]
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Price per point: 'value' for price histories, the close ('c') for OHLCV histories."""
+        return self.columns["value"] if "value" in self.columns else self.columns["c"]
+
+    def items(self) -> List[Dict]:
+        """The points as Birdeye-style dicts, in the original field order (missing values restored as None)."""
+        return historical_items(self.header["fields"], self.header["constants"], self.columns)
+
+    def to_response(self) -> Dict:
+        """
+        The history in the {'data': {'items': [...]}} layout of fetch_complete_test_data, for exports.
+        Analysis reads the columns (prices, timestamps) instead.
+        """
+        return {"data": {"items": self.items()}}
+
+
+def historical_items(fields: List[str], constants: Dict, columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Birdeye-style dicts of history columns (as in HistoricalColumns), in the given field order."""
+    values = [constants[name] if name in constants else None for name in fields]
+    column_values = [(i, _column_values(columns[name])) for i, name in enumerate(fields) if name not in constants]
+    rows = []
+    for n in range(len(next(iter(columns.values()))) if columns else 0):
+        for i, column in column_values:
+            values[i] = column[n]
+        rows.append(dict(zip(fields, values)))
+    return rows
+
+
+def _column_values(column: np.ndarray) -> List:
+    """Column as Python values; NaN is how save_historical_columns stores None (JSON has no NaN)."""
+    values = column.tolist()
+    if column.dtype.kind == "f" and np.isnan(column).any():
+        values = [None if value != value else value for value in values]
+    return values
+
+
+def historical_columns(items: List[Dict]) -> Tuple[List[str], Dict, Dict[str, np.ndarray]]:
+    """
+    (fields, constants, columns) of Birdeye-style items, the layout of a columnar .bin file: 'unixTime' as
+    int64, other numeric fields as float64 with None stored as NaN, and string fields as constants.
+
+    Raises:
+        ValueError: If the items do not share the same fields, or a string field differs between items.
+    """
+    fields = list(items[0]) if items else []
+    constants = {}
+    columns = {}
+    for name in fields:
+        try:
+            values = [item[name] for item in items]
+        except KeyError:
+            raise ValueError(f"Field '{name}' is missing in some items")
+        if isinstance(values[0], str) or values[0] is True or values[0] is False:
+            if any(value != values[0] for value in values):
+                raise ValueError(f"Field '{name}' is not numeric and not constant")
+            constants[name] = values[0]
+        elif name == "unixTime":
+            columns[name] = np.asarray(values, dtype="<i8")
+        else:
+            columns[name] = np.asarray([np.nan if value is None else value for value in values], dtype="<f8")
+    return fields, constants, columns
+
+
+def save_historical_columns(data, filename, token=None, interval=None, span_in_days=None, ohlcv=False,
+                            extra=None):
+    """
+    Saves historical data ({'data': {'items': [...]}}) as a columnar .bin file, creating directories if needed.
+    `extra` is an optional JSON-serializable dict stored in the header (e.g., the ranges a cache covers).
+    Missing numeric values (None) are stored as NaN and read back as None.
+
+    Raises:
+        ValueError: If the items do not share the same fields, or a string field differs between items.
+    """
+    items = data["data"]["items"]
+    fields, constants, columns = historical_columns(items)
+    write_historical_columns(filename, fields, constants, columns, len(items), token=token, interval=interval,
+                             span_in_days=span_in_days, ohlcv=ohlcv, extra=extra)
+
+
+def write_historical_columns(filename, fields: List[str], constants: Dict, columns: Dict[str, np.ndarray],
+                             count: int, token=None, interval=None, span_in_days=None, ohlcv=False, extra=None):
+    """Write `count` points already split into columns (see historical_columns) as a columnar .bin file."""
+    columns = {name: np.ascontiguousarray(column, dtype="<i8" if name == "unixTime" else "<f8")
+               for name, column in columns.items()}
+
+    # Column offsets are relative to the data section, which starts at the first aligned position after the header
+    layout = []
+    offset = 0
+    for name, column in columns.items():
+        layout.append((name, column.dtype.str, offset))
+        offset += -(-column.nbytes // _ALIGN) * _ALIGN
+    header = {"token": token, "interval": interval, "span_in_days": span_in_days, "ohlcv": ohlcv,
+              "count": count, "fields": fields, "constants": constants, "columns": layout,
+              "extra": extra or {}}
+    header_bytes = json.dumps(header).encode()
+    data_start = _data_start(len(header_bytes))
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{filename}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(_HISTORY_PREFIX.pack(HISTORY_MAGIC, HISTORY_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for (name, _, position), column in zip(layout, columns.values()):
+            file.write(b"\0" * (data_start + position - file.tell()))
+            file.write(column.tobytes())
+    os.replace(temporary, filename)
+    logger.info("Saved %d points to %s", count, filename)
+
+
+def load_historical_columns(filename) -> HistoricalColumns:
+    """
+    Memory-map a columnar .bin history file.
+
+    Raises:
+        ValueError: If the file is not a columnar history file of a supported version.
+    """
+    with open(filename, "rb") as file:
+        prefix = file.read(_HISTORY_PREFIX.size)
+        if len(prefix) < _HISTORY_PREFIX.size:
+            raise ValueError(f"{filename} is not a columnar history file")
+        magic, version, header_length = _HISTORY_PREFIX.unpack(prefix)
+        if magic != HISTORY_MAGIC:
+            raise ValueError(f"{filename} is not a columnar history file")
+        if version != HISTORY_VERSION:
+            raise ValueError(f"{filename} has format version {version}, expected {HISTORY_VERSION}")
+        header = json.loads(file.read(header_length))
+        size = os.fstat(file.fileno()).st_size
+        buffer = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+    count = header["count"]
+    data_start = _data_start(header_length)
+    columns = {name: np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + offset)
+               for name, dtype, offset in header["columns"]}
+    return HistoricalColumns(header, columns)
+
+
+def _data_start(header_length: int) -> int:
+    return -(-(_HISTORY_PREFIX.size + header_length) // _ALIGN) * _ALIGN
+
+
+def history_cache_filename(token, interval, ohlcv=False, directory="historical_data/") -> str:
+    """File of a token's HistoryCache, the store of its fetched history."""
+    return os.path.join(directory, f"cache_{token}_{interval}_{ohlcv}.bin")
+
+
+def historical_metadata_from_filename(filename) -> Dict:
+    """
+    Token, interval, OHLCV flag (and span) encoded in a history cache name (cache_<token>_<interval>_<ohlcv>.bin)
+    or a historical_price_<token>_<interval>_<span>_<ohlcv> name.
+    """
+    name = os.path.basename(filename)
+    match = _CACHE_NAME.match(name)
+    if match:
+        return {"token": match["token"], "interval": match["interval"], "ohlcv": match["ohlcv"] == "True"}
+    match = _HISTORY_NAME.search(name)
+    if not match:
+        return {}
+    return {"token": match["token"], "interval": match["interval"], "span_in_days": int(match["span"]),
+            "ohlcv": match["ohlcv"] == "True"}
+
+
+def convert_historical_json_files(directory="historical_data/", remove_json=False) -> List[str]:
+    """One-shot conversion of every historical_price_*.json file in `directory` to a columnar .bin file."""
+    converted = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("historical_price_") and name.endswith(".json")):
+            continue
+        source = os.path.join(directory, name)
+        target = source[:-len(".json")] + ".bin"
+        with open(source, "r") as file:
+            data = json.load(file)
+        save_historical_columns(data, target, **historical_metadata_from_filename(source))
+        converted.append(target)
+        if remove_json:
+            os.remove(source)
+    return converted
+
+
+def export_historical_json(filename, target=None) -> str:
+    """Export a columnar .bin history file as JSON (the save_historical_data_to_file layout)."""
+    target = target or filename[:-len(".bin")] + ".json"
+    save_historical_data_to_file(load_historical_columns(filename).to_response(), target)
+    return target
+
+
 def save_metrics_to_csv(metrics, token_address, output_dir="metrics"):
     """
     Save collected metrics for a token to a CSV file.
     
     Args:
-        metrics (list): List of dictionaries containing metrics for a token.
+        metrics (MetricsTable): Columnar metrics history of a token (MetricCollector.metrics).
         token_address (str): Token mint address (e.g., 'tokenA_address').
         output_dir (str): Directory to save CSV files (default: 'metrics').
     """
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
-    # Flatten nested dictionaries in metrics
-    flat_metrics = []
-    for metric in metrics:
-        flat_dict = {}
-        for key, value in metric.items():
-            if isinstance(value, dict):
-                # Flatten nested dicts (e.g., 'momentum', 'volatility')
-                for sub_key, sub_value in value.items():
-                    flat_dict[f"{key}_{sub_key}"] = sub_value
-            else:
-                flat_dict[key] = value
-        flat_metrics.append(flat_dict)
-    
-    # Create DataFrame
-    df = pd.DataFrame(flat_metrics)
+    # One CSV column per metric field (nested keys joined with '_', e.g. 'momentum_short')
+    df = metrics.to_dataframe()
     
     # Sanitize token address for filename
     safe_token = "".join(c for c in token_address if c.isalnum() or c in ['_', '-'])
@@ -89,4 +335,18 @@ def save_metrics_to_csv(metrics, token_address, output_dir="metrics"):
     
     # Save to CSV
     df.to_csv(filename, index=False)
-    print(f"Saved metrics for {token_address} to {filename} ({len(df)} rows)")
\ No newline at end of file
+    logger.info("Saved metrics for %s to %s (%d rows)", token_address, filename, len(df))
+
+
+if __name__ == "__main__":
+    # python -m utils.os_utils convert [directory] [--remove-json]
+    # python -m utils.os_utils export <file>.bin [<target>.json]
+    command, args = sys.argv[1], sys.argv[2:]
+    if command == "convert":
+        paths = [arg for arg in args if not arg.startswith("--")]
+        for path in convert_historical_json_files(*paths[:1], remove_json="--remove-json" in args):
+            print(f"Converted {path}")
+    elif command == "export":
+        print(f"Exported {export_historical_json(*args)}")
+    else:
+        raise SystemExit(f"Unknown command: {command}")
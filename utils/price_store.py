@@ -0,0 +1,198 @@
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+
+class PriceStore:
+    """
+    Columnar store for price ticks shared by all analyzers of a token.
+
+    Prices live in one contiguous float64 array and timestamps in one int64 array, so readers take
+    zero-copy NumPy views instead of walking lists of dicts. By default the store grows without limit;
+    with `capacity` set it becomes a ring buffer that keeps the newest `capacity` points. Every ring
+    write lands at i and i + capacity, which keeps the retained points one contiguous slice.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, initial_size: int = 1024):
+        """
+        Args:
+            capacity: Number of points to retain (ring-buffer mode), or None to keep everything.
+            initial_size: Initial allocation for the growable mode.
+        """
+        self.capacity = capacity
+        size = 2 * capacity if capacity else max(1, initial_size)
+        self._prices = np.empty(size, dtype=np.float64)
+        self._timestamps = np.empty(size, dtype=np.int64)
+        self._start = 0
+        self._end = 0
+        self.total = 0  # Points appended since creation, including ones dropped from the ring
+        self.first_timestamp = None
+
+    @classmethod
+    def from_arrays(cls, prices: np.ndarray, timestamps: np.ndarray,
+                    first_timestamp: Optional[int] = None) -> "PriceStore":
+        """Store over existing price and timestamp arrays (e.g., attached shared memory), without copying."""
+        store = cls.__new__(cls)
+        store.capacity = None
+        store._prices = prices
+        store._timestamps = timestamps
+        store._start = 0
+        store._end = len(prices)
+        store.total = len(prices)
+        if first_timestamp is None and len(timestamps):
+            first_timestamp = int(timestamps[0])
+        store.first_timestamp = first_timestamp
+        return store
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __bool__(self) -> bool:
+        return self._end > self._start
+
+    def __getitem__(self, index):
+        """Dict view of a single point ({'value', 'unixTime'}) or a list of them for a slice."""
+        if isinstance(index, slice):
+            return [self._point(i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("PriceStore index out of range")
+        return self._point(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._point(i)
+
+    def _point(self, i: int) -> Dict:
+        return {"value": float(self._prices[self._start + i]), "unixTime": int(self._timestamps[self._start + i])}
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Zero-copy view of the retained prices, oldest first."""
+        return self._prices[self._start:self._end]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Zero-copy view of the retained unix timestamps (seconds), oldest first."""
+        return self._timestamps[self._start:self._end]
+
+    @property
+    def last_price(self) -> float:
+        return float(self._prices[self._end - 1])
+
+    @property
+    def last_timestamp(self) -> int:
+        return int(self._timestamps[self._end - 1])
+
+    @property
+    def last_index(self) -> int:
+        """Absolute index of the newest point, counting points already dropped from the ring."""
+        return self.total - 1
+
+    def append(self, price_point: Dict) -> None:
+        """Append a Birdeye-style price point ({'value': price, 'unixTime': ts})."""
+        self.append_value(price_point["value"], price_point["unixTime"])
+
+    def append_value(self, value: float, unix_time: int) -> None:
+        if self.first_timestamp is None:
+            self.first_timestamp = int(unix_time)
+
+        if self.capacity:
+            pos = self.total % self.capacity
+            self._prices[pos] = value
+            self._prices[pos + self.capacity] = value
+            self._timestamps[pos] = unix_time
+            self._timestamps[pos + self.capacity] = unix_time
+            self.total += 1
+            if self.total > self.capacity:
+                self._start = self.total % self.capacity
+                self._end = self._start + self.capacity
+            else:
+                self._end = self.total
+            return
+
+        if self._end == len(self._prices):
+            self._grow(self._end + 1)
+        self._prices[self._end] = value
+        self._timestamps[self._end] = unix_time
+        self._end += 1
+        self.total += 1
+
+    def extend(self, price_points: Iterable[Dict]) -> None:
+        """Append many Birdeye-style price points."""
+        price_points = list(price_points)
+        self.extend_arrays(
+            np.fromiter((p["value"] for p in price_points), dtype=np.float64, count=len(price_points)),
+            np.fromiter((p["unixTime"] for p in price_points), dtype=np.int64, count=len(price_points)),
+        )
+
+    def extend_arrays(self, prices: np.ndarray, timestamps: np.ndarray) -> None:
+        """Append aligned price and timestamp arrays in one copy."""
+        count = len(prices)
+        if count == 0:
+            return
+        if self.first_timestamp is None:
+            self.first_timestamp = int(timestamps[0])
+
+        if self.capacity:
+            # Points that would be overwritten straight away are only counted
+            skipped = max(0, count - self.capacity)
+            self.total += skipped
+            for value, unix_time in zip(prices[skipped:], timestamps[skipped:]):
+                self.append_value(value, unix_time)
+            return
+
+        if self._end + count > len(self._prices):
+            self._grow(self._end + count)
+        self._prices[self._end:self._end + count] = prices
+        self._timestamps[self._end:self._end + count] = timestamps
+        self._end += count
+        self.total += count
+
+    def state(self) -> Dict:
+        """Retained points and counters as plain arrays and scalars (e.g., for a checkpoint)."""
+        return {
+            "capacity": self.capacity,
+            "prices": self.prices,
+            "timestamps": self.timestamps,
+            "total": self.total,
+            "first_timestamp": self.first_timestamp,
+        }
+
+    def load_state(self, state: Dict) -> None:
+        """Restore a state() into this empty store, which must have the same capacity."""
+        if state["capacity"] != self.capacity or self.total:
+            raise ValueError("PriceStore state does not fit this store")
+        prices, timestamps, total = state["prices"], state["timestamps"], state["total"]
+        count = len(prices)
+        if len(timestamps) != count or count > total:
+            raise ValueError("Inconsistent PriceStore state")
+
+        if self.capacity:
+            if count != min(total, self.capacity):
+                raise ValueError("Inconsistent PriceStore state")
+            # Same double-write placement as append_value, for the absolute indices total - count .. total - 1
+            positions = np.arange(total - count, total) % self.capacity
+            for offset in (0, self.capacity):
+                self._prices[positions + offset] = prices
+                self._timestamps[positions + offset] = timestamps
+            self._start = total % self.capacity if total > self.capacity else 0
+        else:
+            if count > len(self._prices):
+                self._grow(count)
+            self._prices[:count] = prices
+            self._timestamps[:count] = timestamps
+            self._start = 0
+        self._end = self._start + count
+        self.total = total
+        self.first_timestamp = state["first_timestamp"]
+
+    def _grow(self, required: int) -> None:
+        size = max(required, 2 * len(self._prices))
+        prices = np.empty(size, dtype=np.float64)
+        timestamps = np.empty(size, dtype=np.int64)
+        prices[:self._end] = self._prices[:self._end]
+        timestamps[:self._end] = self._timestamps[:self._end]
+        self._prices = prices
+        self._timestamps = timestamps
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def next_smaller_index(values: np.ndarray) -> np.ndarray:
+    """
+    Index of the first later value strictly below each value (monotonic stack, O(n)).
+
+    Returns len(values) where there is none. NaN values are never "smaller" and have no result of their
+    own (len(values)).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    result = np.full(n, n, dtype=np.int64)
+    stack = []  # Indices with non-decreasing values
+    for j, value in enumerate(values.tolist()):
+        if value != value:  # NaN
+            continue
+        while stack and value < values[stack[-1]]:
+            result[stack.pop()] = j
+        stack.append(j)
+    return result
+
+
+def next_greater_index(values: np.ndarray) -> np.ndarray:
+    """Index of the first later value strictly above each value, len(values) where there is none."""
+    return next_smaller_index(-np.asarray(values, dtype=np.float64))
+
+
+class SparseTable:
+    """
+    Range maximum or minimum queries over a static array in O(1) after O(n log n) preprocessing.
+
+    Level k holds the extreme of every window of 2**k values, so any range is covered by two
+    overlapping windows. NaN values are ignored (fmax / fmin).
+    """
+
+    def __init__(self, values: np.ndarray, mode: str = "max"):
+        if mode not in ("max", "min"):
+            raise ValueError(f"Unknown SparseTable mode: {mode}")
+        self.mode = mode
+        self._combine = np.fmax if mode == "max" else np.fmin
+        level = np.asarray(values, dtype=np.float64)
+        self.levels = [level]
+        width = 1
+        while 2 * width <= len(level):
+            previous = self.levels[-1]
+            self.levels.append(self._combine(previous[:-width], previous[width:]))
+            width *= 2
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def query(self, start: int, end: int) -> float:
+        """Extreme of values[start:end] (end exclusive, start < end)."""
+        k = (end - start).bit_length() - 1
+        level = self.levels[k]
+        return float(self._combine(level[start], level[end - (1 << k)]))
+
+    def query_many(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Vectorized query for aligned arrays of non-empty ranges [starts, ends)."""
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        result = np.empty(len(starts))
+        if not len(starts):
+            return result
+        k = np.frexp((ends - starts).astype(np.float64))[1] - 1  # floor(log2(length)), exact for integers
+        for level_index in np.unique(k).tolist():
+            mask = k == level_index
+            level = self.levels[level_index]
+            result[mask] = self._combine(level[starts[mask]], level[ends[mask] - (1 << level_index)])
+        return result
+
+    def first_reaching(self, start: int, end: int, threshold: float) -> int:
+        """
+        First index in [start, end) whose value is >= threshold (max mode) or <= threshold (min mode), in
+        O(log n) by skipping power-of-two blocks that cannot contain it. Returns end if there is none.
+        """
+        position = start
+        for k in range(len(self.levels) - 1, -1, -1):
+            if position + (1 << k) <= end:
+                block = self.levels[k][position]
+                reached = block >= threshold if self.mode == "max" else block <= threshold
+                if not reached:
+                    position += 1 << k
+        return position
@@ -0,0 +1,160 @@
+import numpy as np
+from typing import Dict, Optional
+
+
+class RollingSeries:
+    """
+    The newest `capacity` values of one named time series, with a running least-squares slope.
+
+    Values are kept in a double-write ring like PriceStore, so the last n values are always one
+    zero-copy slice. Sums of y and x*y over the retained values (x = 0 for the oldest) are updated in
+    constant time per append and rebuilt once per `capacity` appends to stop floating point drift.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("RollingSeries capacity must be at least 1")
+        self.capacity = capacity
+        self._values = np.empty(2 * capacity, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        self.total = 0  # Values appended since creation, including ones dropped from the ring
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.updates_since_rebuild = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def values(self) -> np.ndarray:
+        """Zero-copy view of the retained values, oldest first."""
+        return self._values[self._start:self._end]
+
+    def last(self, n: int) -> np.ndarray:
+        """Zero-copy view of the last n values (fewer if the series is shorter)."""
+        return self._values[max(self._start, self._end - n):self._end]
+
+    def append(self, value: float) -> None:
+        n = len(self)
+        if n == self.capacity:
+            # The oldest value leaves and every other value moves one x position down
+            oldest = self._values[self._start]
+            self.sum_y -= oldest
+            self.sum_xy -= self.sum_y
+            n -= 1
+        self.sum_y += value
+        self.sum_xy += n * value
+
+        pos = self.total % self.capacity
+        self._values[pos] = value
+        self._values[pos + self.capacity] = value
+        self.total += 1
+        if self.total > self.capacity:
+            self._start = self.total % self.capacity
+            self._end = self._start + self.capacity
+        else:
+            self._end = self.total
+
+        self.updates_since_rebuild += 1
+        if self.updates_since_rebuild >= self.capacity:
+            self._rebuild()
+
+    def state(self) -> Dict:
+        """Retained values, counters and running sums as plain values (e.g., for a checkpoint)."""
+        return {
+            "capacity": self.capacity,
+            "values": self.values,
+            "total": self.total,
+            "sum_y": self.sum_y,
+            "sum_xy": self.sum_xy,
+            "updates_since_rebuild": self.updates_since_rebuild,
+        }
+
+    def load_state(self, state: Dict) -> None:
+        """Restore a state() into this empty series, which must have the same capacity."""
+        values, total = state["values"], state["total"]
+        if state["capacity"] != self.capacity or self.total or len(values) != min(total, self.capacity):
+            raise ValueError("RollingSeries state does not fit this series")
+        positions = np.arange(total - len(values), total) % self.capacity
+        self._values[positions] = values
+        self._values[positions + self.capacity] = values
+        self._start = total % self.capacity if total > self.capacity else 0
+        self._end = self._start + len(values)
+        self.total = total
+        # The sums are restored as saved, not recomputed, so later slopes round exactly as before
+        self.sum_y = state["sum_y"]
+        self.sum_xy = state["sum_xy"]
+        self.updates_since_rebuild = state["updates_since_rebuild"]
+
+    def _rebuild(self) -> None:
+        values = self.values
+        self.sum_y = float(values.sum())
+        self.sum_xy = float(np.arange(len(values)) @ values)
+        self.updates_since_rebuild = 0
+
+    def slope(self, n: Optional[int] = None) -> Optional[float]:
+        """
+        Least-squares slope per step over the last n values (all retained values if None).
+
+        Constant time from the running sums when the whole series is used, otherwise computed over the
+        n values directly. Returns None below two values.
+        """
+        count = len(self)
+        if n is None or n >= count:
+            return _least_squares_slope(count, self.sum_y, self.sum_xy)
+        if n < 2:
+            return None
+        values = self.last(n)
+        return _least_squares_slope(n, float(values.sum()), float(np.arange(n) @ values))
+
+    def endpoint_slope(self, n: int) -> Optional[float]:
+        """(last - first) / (n - 1) over the last n values, the mean step between them, or None below two values."""
+        values = self.last(n)
+        if len(values) < 2:
+            return None
+        return float((values[-1] - values[0]) / (len(values) - 1))
+
+
+def _least_squares_slope(n: int, sum_y: float, sum_xy: float) -> Optional[float]:
+    if n < 2:
+        return None
+    sum_x = n * (n - 1) / 2
+    sum_xx = (n - 1) * n * (2 * n - 1) / 6
+    return float((n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x))
+
+
+class SeriesRegistry:
+    """
+    Named time series of derived values (e.g., 'RSI-5m', 'zone_confidence') for slope-based features.
+
+    Each series is a bounded RollingSeries, so reading the last n values or the slope of a series never
+    scans the metric history.
+    """
+
+    def __init__(self):
+        self.series: Dict[str, RollingSeries] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.series
+
+    def __getitem__(self, name: str) -> RollingSeries:
+        return self.series[name]
+
+    def register(self, name: str, capacity: int) -> RollingSeries:
+        """Create a series keeping the last `capacity` values, or return the existing one of that name."""
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = RollingSeries(capacity)
+        return series
+
+    def append(self, name: str, value: Optional[float]) -> None:
+        """Append a value to a registered series; missing values (None) are skipped."""
+        if value is not None:
+            self.series[name].append(value)
+
+    def last(self, name: str, n: int) -> np.ndarray:
+        return self.series[name].last(n)
+
+    def slope(self, name: str, n: Optional[int] = None) -> Optional[float]:
+        return self.series[name].slope(n)
@@ -0,0 +1,127 @@
+import glob
+import mmap
+import multiprocessing
+import os
+import tempfile
+import weakref
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# RAM-backed where available, so sharing never touches the disk
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+_PREFIX = "sentry-"
+_SUFFIX = ".arrays"
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SharedArrays:
+    """
+    Small picklable descriptor of NumPy arrays written to one memory-mapped file by share_arrays().
+
+    A worker process shares its results and returns only this descriptor; the receiving process maps
+    the file with attach() and reads the arrays as zero-copy, read-only views.
+
+    The process that unpickles the descriptor owns the file: if the descriptor is garbage collected (or
+    the interpreter exits) before attach() or discard(), the file is removed. Files of owners that died
+    without cleaning up are removed by remove_stale_arrays().
+    """
+    path: str
+    size: int
+    layout: Tuple[Tuple[str, str, Tuple[int, ...], int], ...]  # (name, dtype, shape, byte offset)
+
+    def __getstate__(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_finalizer", weakref.finalize(self, _unlink, self.path))
+
+    def attach(self) -> Dict[str, np.ndarray]:
+        """
+        Map the arrays (once). The file is unlinked right after mapping, so it never outlives the reader:
+        the memory is released when the last view is garbage collected.
+        """
+        with open(self.path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), self.size, access=mmap.ACCESS_READ)
+        self.discard()
+        return {
+            name: np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+            for name, dtype, shape, offset in self.layout
+        }
+
+    def discard(self) -> None:
+        """Remove the file without reading it (e.g., when the result is not needed)."""
+        finalizer = getattr(self, "_finalizer", None)
+        if finalizer is not None:
+            finalizer.detach()
+        _unlink(self.path)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def share_arrays(arrays: Dict[str, np.ndarray], directory: Optional[str] = None) -> SharedArrays:
+    """
+    Write named numeric arrays into one memory-mapped file and return its descriptor.
+
+    Raises:
+        TypeError: For object arrays, which have no raw memory representation to share.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise TypeError(f"Cannot share object array '{name}'")
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    size = max(offset, 1)  # Zero-length files cannot be mapped
+
+    # The file name records the owner (the pool's parent when called in a worker) for remove_stale_arrays
+    parent = multiprocessing.parent_process()
+    owner = parent.pid if parent is not None else os.getpid()
+    fd, path = tempfile.mkstemp(prefix=f"{_PREFIX}{owner}-", suffix=_SUFFIX, dir=directory or SHARED_DIR)
+    try:
+        os.ftruncate(fd, size)
+        with mmap.mmap(fd, size) as buffer:
+            for (name, dtype, shape, start), array in zip(layout, arrays.values()):
+                buffer[start:start + array.nbytes] = memoryview(array).cast("B")
+    except BaseException:
+        os.unlink(path)
+        raise
+    finally:
+        os.close(fd)
+    return SharedArrays(path, size, tuple(layout))
+
+
+def remove_stale_arrays(directory: Optional[str] = None) -> int:
+    """
+    Remove shared array files whose owning process is no longer running (e.g., it crashed before
+    attaching them). Returns the number of files removed.
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(directory or SHARED_DIR, f"{_PREFIX}*{_SUFFIX}")):
+        owner = os.path.basename(path)[len(_PREFIX):].split("-", 1)[0]
+        if owner.isdigit() and not _is_running(int(owner)):
+            _unlink(path)
+            removed += 1
+    return removed
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True